@@ -0,0 +1,281 @@
+from typing import TYPE_CHECKING, AsyncIterator, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+import logging
+
+from app.api.dependencies import overloaded_error, request_timeout, response_shape
+from app.core.cpu_executor import run_cpu_bound
+from app.core.deadline import ClientDisconnected, cancel_on_disconnect, deadline_scope
+from app.core.json_response import ORJSONResponse
+from app.models.batch_scoring.requests import BatchScoringRequest, RescoreRequest
+from app.models.batch_scoring.responses import BatchScoringResponse, BatchUploadResponse, BulkJobStatus, SimilarityReport, SkippedFile
+from app.models.common.llm_provider import LLMProvider
+from app.models.scoring.requests import EnsembleSettings, ModelTier, ScoringRequest, TestCase
+from app.models.scoring.responses import ScoringResponse
+from app.models.scoring.rubric import Rubric
+from app.services.export.response_shape import ResponseShape
+from app.services.export.result_export import EXPORT_MEDIA_TYPES, ExportItem, category_names, iter_csv, iter_json, iter_ndjson
+from app.services.ingestion.submission_archive import SubmissionFile, group_by_student, iter_upload_submissions
+from app.services.llm_services.admission import BatchTicket, Overloaded, get_admission
+from app.services.llm_services.llm_base_service import batch_error
+from app.services.llm_services.llm_common_service import LLMCommonService
+
+if TYPE_CHECKING:
+    from app.services.llm_services.openai_compatible_service import OpenAICompatibleService
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _score_batch(request: BatchScoringRequest, http_request: Request, timeout: Optional[float]) -> BatchScoringResponse:
+    """Items the deadline cuts off come back as per-item errors; a client disconnect cancels the whole batch."""
+    if not request.submissions:
+        raise HTTPException(status_code=400, detail="At least one submission is required")
+    try:
+        with get_admission().batch(request), deadline_scope(timeout):
+            return await cancel_on_disconnect(http_request, LLMCommonService.score_batch(request))
+    except Overloaded as err:
+        raise overloaded_error(err)
+    except ClientDisconnected as err:
+        raise HTTPException(status_code=499, detail=str(err))
+    except Exception as err:
+        logger.exception("Unexpected error while batch scoring")
+        raise HTTPException(status_code=502, detail=f"Batch scoring failed: {err}")
+
+
+@router.post("/batch-score", response_model=BatchScoringResponse)
+async def batch_score(
+    request: BatchScoringRequest,
+    http_request: Request,
+    shape: ResponseShape = Depends(response_shape),
+    timeout: Optional[float] = Depends(request_timeout),
+) -> ORJSONResponse:
+    result = await _score_batch(request, http_request, timeout)
+    return ORJSONResponse(shape.dump_container(result))
+
+
+async def _export_items(request: BatchScoringRequest, timeout: Optional[float], ticket: BatchTicket) -> AsyncIterator[ExportItem]:
+    # StreamingResponse cancels this generator when the client disconnects, which
+    # cancels the provider workers and their in-flight LLM calls
+    try:
+        with deadline_scope(timeout):
+            async for index, outcome in LLMCommonService.iter_batch(request):
+                submission = request.submissions[index]
+                if not isinstance(outcome, ScoringResponse):
+                    outcome = batch_error(index, submission, outcome)
+                yield index, submission.student_id, outcome
+    finally:
+        ticket.release()
+
+
+@router.post("/batch-score/export")
+async def batch_score_export(
+    request: BatchScoringRequest,
+    format: Literal["csv", "ndjson", "json"] = Query("csv"),
+    shape: ResponseShape = Depends(response_shape),
+    timeout: Optional[float] = Depends(request_timeout),
+) -> StreamingResponse:
+    """Score a batch and stream each result to the client as soon as it is ready."""
+    if not request.submissions:
+        raise HTTPException(status_code=400, detail="At least one submission is required")
+
+    # Admitted before the response starts, while a 503 can still be sent
+    try:
+        ticket = get_admission().admit_batch(request)
+    except Overloaded as err:
+        raise overloaded_error(err)
+    items = _export_items(request, timeout, ticket)
+    if format == "csv":
+        body = iter_csv(items, category_names(request))
+    elif format == "ndjson":
+        body = iter_ndjson(items, shape)
+    else:
+        body = iter_json(items, shape)
+
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="batch-results.{format}"'},
+        # Also releases the budget if the body was never iterated
+        background=BackgroundTask(ticket.release),
+    )
+
+
+def _read_uploads(files: List[UploadFile]) -> tuple[list[SubmissionFile], list[SkippedFile]]:
+    """Expand uploaded files/archives (blocking file I/O, run in a worker thread)."""
+    submissions: list[SubmissionFile] = []
+    skipped: list[SkippedFile] = []
+    for item in iter_upload_submissions((f.filename, f.file) for f in files):
+        if isinstance(item, SkippedFile):
+            skipped.append(item)
+        else:
+            submissions.append(item)
+    return submissions, skipped
+
+
+def _join_files(files: list[SubmissionFile], programming_language: str) -> str:
+    if len(files) == 1:
+        return files[0].code
+    comment = "#" if programming_language == "python" else "//"
+    return "\n\n".join(f"{comment} ===== {f.path} =====\n{f.code}" for f in files)
+
+
+@router.post("/batch-score/upload", response_model=BatchUploadResponse)
+async def batch_score_upload(
+    http_request: Request,
+    files: List[UploadFile] = File(..., description="ZIP archives and/or .txt/.cpp/.py source files"),
+    llm_provider: LLMProvider = Form(...),
+    model: str = Form(...),
+    problem_description: str = Form(...),
+    rubric: str = Form(..., description="Rubric as a JSON string"),
+    programming_language: str = Form("cpp"),
+    language: str = Form("Vietnamese"),
+    precheck: bool = Form(False),
+    test_cases: Optional[str] = Form(None, description="List of test cases as a JSON string"),
+    escalation: Optional[str] = Form(None, description="Escalation tiers as a JSON list of {llm_provider, model}"),
+    ensemble: Optional[str] = Form(None, description="Ensemble settings as a JSON object"),
+    dedupe: Literal["off", "reuse"] = Form("off"),
+    similarity_threshold: float = Form(0.9, ge=0, le=1),
+    spot_check_rate: float = Form(0.0, ge=0, le=1),
+    priority: Literal["batch", "backfill"] = Form("batch"),
+    tenant: Optional[str] = Form(None, max_length=64),
+    shape: ResponseShape = Depends(response_shape),
+    timeout: Optional[float] = Depends(request_timeout),
+) -> ORJSONResponse:
+    try:
+        parsed_rubric = Rubric.model_validate_json(rubric)
+    except ValidationError as err:
+        raise HTTPException(status_code=400, detail=f"Invalid rubric: {err}")
+    try:
+        parsed_test_cases = TypeAdapter(List[TestCase]).validate_json(test_cases) if test_cases else []
+    except ValidationError as err:
+        raise HTTPException(status_code=400, detail=f"Invalid test_cases: {err}")
+    try:
+        parsed_escalation = TypeAdapter(List[ModelTier]).validate_json(escalation) if escalation else []
+    except ValidationError as err:
+        raise HTTPException(status_code=400, detail=f"Invalid escalation: {err}")
+    try:
+        parsed_ensemble = EnsembleSettings.model_validate_json(ensemble) if ensemble else None
+    except ValidationError as err:
+        raise HTTPException(status_code=400, detail=f"Invalid ensemble: {err}")
+
+    try:
+        submission_files, skipped = await run_in_threadpool(_read_uploads, files)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    finally:
+        for f in files:
+            await f.close()
+
+    if not submission_files:
+        raise HTTPException(status_code=400, detail="No supported source files found in upload")
+
+    try:
+        submissions = []
+        for student_id, student_files in group_by_student(submission_files).items():
+            file_language = student_files[0].programming_language or programming_language
+            submissions.append(ScoringRequest(
+                llm_provider=llm_provider,
+                problem_description=problem_description,
+                student_code=_join_files(student_files, file_language),
+                programming_language=file_language,
+                rubric=parsed_rubric,
+                language=language,
+                model=model,
+                student_id=student_id,
+                precheck=precheck,
+                test_cases=parsed_test_cases,
+                escalation=parsed_escalation,
+                ensemble=parsed_ensemble,
+            ))
+    except ValidationError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    logger.info("Batch upload: files=%d, submissions=%d, skipped=%d", len(submission_files), len(submissions), len(skipped))
+
+    result = await _score_batch(BatchScoringRequest(
+        submissions=submissions,
+        dedupe=dedupe,
+        similarity_threshold=similarity_threshold,
+        spot_check_rate=spot_check_rate,
+        priority=priority,
+        tenant=tenant,
+    ), http_request, timeout)
+    return ORJSONResponse(shape.dump_container(BatchUploadResponse(
+        results=result.results,
+        total_processed=result.total_processed,
+        errors=result.errors,
+        batch_id=result.batch_id,
+        skipped_files=skipped,
+    )))
+
+
+@router.post("/batch-score/rescore", response_model=BatchScoringResponse)
+async def batch_score_rescore(request: RescoreRequest, shape: ResponseShape = Depends(response_shape)) -> ORJSONResponse:
+    """Re-weight stored LLM payloads under an edited rubric (weights, penalty points) without calling any LLM."""
+    # Imported here: rescoring pulls in numpy, which nothing on the scoring path needs
+    from app.services.rescoring import load_many, rescore_payloads
+
+    records = await load_many(request.payload_ids)
+    # Each payload holds about a kilobyte of scores and rationales to rebuild
+    result = await run_cpu_bound(rescore_payloads, request.rubric, request.payload_ids, records, size=len(records) * 1000)
+    return ORJSONResponse(shape.dump_container(result))
+
+
+@router.post("/batch-score/similarity", response_model=SimilarityReport)
+async def batch_score_similarity(request: BatchScoringRequest) -> SimilarityReport:
+    """Cluster near-duplicate submissions (MinHash/LSH) without calling any LLM."""
+    if not request.submissions:
+        raise HTTPException(status_code=400, detail="At least one submission is required")
+    # Imported here: similarity pulls in numpy, which nothing on the scoring path needs
+    from app.services.similarity.dedupe import build_similarity_report
+
+    size = sum(len(s.student_code) for s in request.submissions)
+    return await run_cpu_bound(build_similarity_report, request, size=size)
+
+
+def _bulk_service(provider: LLMProvider) -> "OpenAICompatibleService":
+    from app.services.llm_services.openai_compatible_service import OpenAICompatibleService
+
+    service = LLMCommonService.get_llm_service(provider)
+    if not isinstance(service, OpenAICompatibleService):
+        raise HTTPException(status_code=400, detail=f"Bulk mode is not supported for provider: {provider.value}")
+    return service
+
+
+@router.post("/batch-score/bulk", response_model=BulkJobStatus)
+async def batch_score_bulk(request: BatchScoringRequest) -> BulkJobStatus:
+    """Submit a whole batch as one provider-side bulk job (OpenAI-compatible /v1/batches)."""
+    if not request.submissions:
+        raise HTTPException(status_code=400, detail="At least one submission is required")
+    service = _bulk_service(request.submissions[0].llm_provider)
+    try:
+        return await service.submit_bulk_job(request)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    except Exception as err:
+        logger.exception("Failed to submit bulk job")
+        raise HTTPException(status_code=502, detail=f"Bulk submission failed: {err}")
+
+
+@router.get("/batch-score/bulk/{provider}/{job_id}", response_model=BulkJobStatus)
+async def batch_score_bulk_status(
+    provider: LLMProvider, job_id: str, shape: ResponseShape = Depends(response_shape)
+) -> ORJSONResponse:
+    """Poll a bulk job; results are included once the provider batch has finished."""
+    service = _bulk_service(provider)
+    try:
+        status = await service.get_bulk_job(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown bulk job: {job_id}")
+    except Exception as err:
+        logger.exception("Failed to poll bulk job %s", job_id)
+        raise HTTPException(status_code=502, detail=f"Bulk polling failed: {err}")
+    content = status.model_dump(exclude={"results"})
+    content["results"] = shape.dump_container(status.results) if status.results is not None else None
+    return ORJSONResponse(content)
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException, Query
+
+from app.services.export.response_shape import ResponseShape, Verbosity
+from app.services.llm_services.admission import Overloaded
+
+
+def response_shape(
+    verbosity: Verbosity = Query("full", description="full | summary (no rationales) | scores (gradebook only)"),
+    fields: Optional[str] = Query(None, description="Comma-separated ScoringResponse fields to keep, e.g. student_id,total_score"),
+) -> ResponseShape:
+    try:
+        return ResponseShape(verbosity, fields)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+
+
+def request_timeout(
+    x_request_timeout: Optional[float] = Header(
+        None, gt=0, description="Seconds the client is willing to wait; LLM calls still running after that are cancelled",
+    ),
+) -> Optional[float]:
+    return x_request_timeout
+
+
+def overloaded_error(err: Overloaded) -> HTTPException:
+    """503 with Retry-After when admission is full; 413 for a batch no budget would ever admit."""
+    headers = {"Retry-After": str(err.retry_after)} if err.retry_after is not None else None
+    return HTTPException(status_code=err.status_code, detail=str(err), headers=headers)
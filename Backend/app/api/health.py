@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.llm_services.admission import get_admission
+from app.services.llm_services.model_warmup import readiness
+from app.services.llm_services.scheduler import scheduler_snapshot
+
+
+router = APIRouter()
+
+
+@router.get("/health/live")
+async def live() -> dict:
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def ready() -> JSONResponse:
+    """200 once the configured local models are loaded, 503 while they are (re)loading."""
+    is_ready, models = await readiness()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "warming_up", "models": models},
+    )
+
+
+@router.get("/health/scheduler")
+async def scheduler() -> dict:
+    """Per provider and priority class: queued calls, calls in flight and queueing delay (this worker only)."""
+    return {"providers": scheduler_snapshot()}
+
+
+@router.get("/health/admission")
+async def admission() -> dict:
+    """Admitted and shed /score requests per provider, and the batch memory budget in use (this worker only)."""
+    return get_admission().snapshot()
@@ -0,0 +1,107 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.dependencies import response_shape
+from app.core.json_response import ORJSONResponse
+from app.models.common.llm_provider import LLMProvider
+from app.models.history.requests import HistoryFilter
+from app.models.history.responses import BatchSummary, HistoryAggregates, HistoryEntry, HistoryPage, ProblemSummary
+from app.services.export.response_shape import ResponseShape
+from app.services.history import HistoryStore, flush_history, get_env_history_enabled, get_history_store
+
+
+router = APIRouter()
+
+
+def history_filter(
+    course: Optional[str] = Query(None, description="Tenant the results were scored for; 'default' when none was given"),
+    problem: Optional[str] = Query(None, description="problem_hash, as listed by GET /history/problems"),
+    student_id: Optional[str] = Query(None),
+    batch_id: Optional[str] = Query(None, description="batch_id returned by /batch-score"),
+    fingerprint: Optional[str] = Query(None, description="Results of requests graded alike"),
+    provider: Optional[LLMProvider] = Query(None),
+    since: Optional[datetime] = Query(None, description="Graded at or after (ISO 8601; UTC unless a zone is given)"),
+    until: Optional[datetime] = Query(None, description="Graded before"),
+    min_score: Optional[float] = Query(None, description="Lowest total_score, inclusive"),
+    max_score: Optional[float] = Query(None, description="Highest total_score, inclusive"),
+) -> HistoryFilter:
+    return HistoryFilter(
+        course=course, problem=problem, student_id=student_id, batch_id=batch_id, fingerprint=fingerprint,
+        provider=provider, since=since, until=until, min_score=min_score, max_score=max_score,
+    )
+
+
+async def _history_store() -> HistoryStore:
+    if not get_env_history_enabled():
+        raise HTTPException(status_code=404, detail="Grading history is off (GRADING_HISTORY=false)")
+    # Results this worker has scored but not written yet are listed too
+    await flush_history()
+    return await asyncio.to_thread(get_history_store)
+
+
+def _dump_entry(entry: HistoryEntry, shape: ResponseShape) -> dict:
+    content = entry.model_dump(exclude={"response"})
+    content["response"] = shape.dump(entry.response)
+    return content
+
+
+@router.get("/history/results", response_model=HistoryPage)
+async def history_results(
+    filters: HistoryFilter = Depends(history_filter),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    shape: ResponseShape = Depends(response_shape),
+    store: HistoryStore = Depends(_history_store),
+) -> ORJSONResponse:
+    """Stored results matching every given filter, newest first, one page at a time."""
+    try:
+        page = await asyncio.to_thread(store.page, filters, limit, cursor)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    if shape.is_full:
+        return ORJSONResponse(page)
+    return ORJSONResponse({"items": [_dump_entry(e, shape) for e in page.items], "next_cursor": page.next_cursor})
+
+
+@router.get("/history/results/{result_id}", response_model=HistoryEntry)
+async def history_result(
+    result_id: int,
+    shape: ResponseShape = Depends(response_shape),
+    store: HistoryStore = Depends(_history_store),
+) -> ORJSONResponse:
+    entry = await asyncio.to_thread(store.get, result_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown history result: {result_id}")
+    return ORJSONResponse(_dump_entry(entry, shape))
+
+
+@router.get("/history/aggregates", response_model=HistoryAggregates)
+async def history_aggregates(
+    filters: HistoryFilter = Depends(history_filter),
+    store: HistoryStore = Depends(_history_store),
+) -> HistoryAggregates:
+    """total_score and per-category raw_score statistics, band counts, tokens and latency over the matching results."""
+    return await asyncio.to_thread(store.aggregates, filters)
+
+
+@router.get("/history/problems", response_model=list[ProblemSummary])
+async def history_problems(
+    filters: HistoryFilter = Depends(history_filter),
+    limit: int = Query(100, ge=1, le=1000),
+    store: HistoryStore = Depends(_history_store),
+) -> list[ProblemSummary]:
+    """Problems with results matching the filters, most recently graded first."""
+    return await asyncio.to_thread(store.problems, filters, limit)
+
+
+@router.get("/history/batches", response_model=list[BatchSummary])
+async def history_batches(
+    filters: HistoryFilter = Depends(history_filter),
+    limit: int = Query(100, ge=1, le=1000),
+    store: HistoryStore = Depends(_history_store),
+) -> list[BatchSummary]:
+    """Batches with results matching the filters, most recent first."""
+    return await asyncio.to_thread(store.batches, filters, limit)
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 import logging
 
+from app.api.dependencies import overloaded_error, request_timeout, response_shape
+from app.core.deadline import ClientDisconnected, DeadlineExceeded, cancel_on_disconnect, deadline_scope
+from app.core.json_response import ORJSONResponse
 from app.models.scoring.requests import ScoringRequest
 from app.models.scoring.responses import ScoringResponse
+from app.services.export.response_shape import ResponseShape
+from app.services.llm_services.admission import Overloaded, get_admission
 from app.services.llm_services.llm_common_service import LLMCommonService
 
 
@@ -12,15 +19,30 @@ router = APIRouter()
 
 
 @router.post("/score", response_model=ScoringResponse)
-async def score(request: ScoringRequest) -> ScoringResponse:
+async def score(
+    request: ScoringRequest,
+    http_request: Request,
+    shape: ResponseShape = Depends(response_shape),
+    timeout: Optional[float] = Depends(request_timeout),
+) -> ORJSONResponse:
     llm_service = LLMCommonService.get_llm_service(request.llm_provider)
     try:
-        return await llm_service.generate_response(request)
+        # Turned away at once when the provider's queue is full, instead of waiting out the timeout
+        with get_admission().request(request.llm_provider), deadline_scope(timeout):
+            response = await cancel_on_disconnect(http_request, llm_service.generate_response(request))
     except HTTPException:
         raise
+    except Overloaded as err:
+        raise overloaded_error(err)
+    except ClientDisconnected as err:
+        # Nobody is left to read it; 499 only shows up in access logs
+        raise HTTPException(status_code=499, detail=str(err))
+    except DeadlineExceeded as err:
+        raise HTTPException(status_code=504, detail=str(err))
     except ValueError as err:
         logger.exception("Validation or parsing error while scoring")
         raise HTTPException(status_code=400, detail=str(err))
     except Exception as err:
         logger.exception("Unexpected error while scoring")
         raise HTTPException(status_code=502, detail=f"Scoring failed: {err}")
+    return ORJSONResponse(shape.dump(response))
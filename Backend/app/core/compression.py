@@ -0,0 +1,109 @@
+import logging
+from os import environ
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:  # optional: brotli is only offered when the package is installed
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_env_compression_enabled() -> bool:
+    return environ.get("RESPONSE_COMPRESSION", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def get_env_compression_min_bytes() -> int:
+    return _env_int("COMPRESSION_MIN_BYTES", 1000)
+
+
+def get_env_gzip_level() -> int:
+    # Out-of-range levels would make gzip fail on every compressed response
+    return min(9, max(1, _env_int("GZIP_LEVEL", 6)))
+
+
+def get_env_brotli_quality() -> int:
+    return min(11, max(0, _env_int("BROTLI_QUALITY", 4)))
+
+
+def negotiate_encoding(accept_encoding: str, brotli_available: bool) -> str:
+    """Pick "br", "gzip" or "identity" from an Accept-Encoding header, honouring q-values; br wins ties."""
+    offered = {"gzip": 2}
+    if brotli_available:
+        offered["br"] = 3
+    best, best_key = "identity", (0.0, 0)
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        candidates = offered if name == "*" else ({name: offered[name]} if name in offered else {})
+        for candidate, rank in candidates.items():
+            if q > 0 and (q, rank) > best_key:
+                best, best_key = candidate, (q, rank)
+    return best
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int, thread_minimum_size: int = 128 * 1024) -> None:
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self.thread_minimum_size = thread_minimum_size
+        self._compressor = None
+
+    def _compress_body(self, body: bytes, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        data = self._compressor.process(body)
+        return data + (self._compressor.flush() if more_body else self._compressor.finish())
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= self.thread_minimum_size:
+            # Large batch responses would block the event loop while compressing
+            return await anyio.to_thread.run_sync(self._compress_body, body, more_body)
+        return self._compress_body(body, more_body)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Starlette's gzip middleware plus brotli, chosen per request from Accept-Encoding."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=gzip_level)
+        self.brotli_quality = brotli_quality
+        if brotli is None:
+            logger.info("brotli package not installed; responses are compressed with gzip only")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("Accept-Encoding", ""), brotli is not None)
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
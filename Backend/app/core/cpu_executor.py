@@ -0,0 +1,98 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from logging.handlers import QueueListener
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.log_utils import get_env_payload_log_limit
+from app.core.logging_config import init_worker_logging, start_worker_log_listener
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+EXECUTOR_KINDS = {"none", "thread", "process"}
+
+_executor: Optional[Executor] = None
+_worker_log_listener: Optional[QueueListener] = None
+
+
+def get_env_executor_kind() -> str:
+    """Return CPU_EXECUTOR (none|thread|process), default thread."""
+    kind = os.environ.get("CPU_EXECUTOR", "thread").strip().lower()
+    return kind if kind in EXECUTOR_KINDS else "thread"
+
+
+def get_env_executor_workers() -> int:
+    """Return CPU_EXECUTOR_WORKERS, default min(4, cpu_count)."""
+    default = min(4, os.cpu_count() or 1)
+    try:
+        return max(1, int(os.environ.get("CPU_EXECUTOR_WORKERS", default)))
+    except ValueError:
+        return default
+
+
+def get_env_offload_min_chars() -> int:
+    """Return CPU_OFFLOAD_MIN_CHARS; inputs smaller than this run inline on the event loop."""
+    try:
+        return max(0, int(os.environ.get("CPU_OFFLOAD_MIN_CHARS", 4000)))
+    except ValueError:
+        return 4000
+
+
+def get_executor() -> Optional[Executor]:
+    """Return the shared executor for CPU-bound stages, creating it on first use."""
+    global _executor, _worker_log_listener
+    if _executor is not None:
+        return _executor
+
+    kind = get_env_executor_kind()
+    if kind == "none":
+        return None
+
+    workers = get_env_executor_workers()
+    if kind == "process":
+        # Workers log through a queue this process drains with its own handlers
+        record_queue = multiprocessing.get_context().Queue()
+        _worker_log_listener = start_worker_log_listener(record_queue)
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker_logging,
+            initargs=(record_queue, logging.getLogger().level, get_env_payload_log_limit()),
+        )
+    else:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cpu")
+    logger.info("CPU executor started: kind=%s, workers=%d", kind, workers)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Shut down the shared executor, if one was started."""
+    global _executor, _worker_log_listener
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        logger.info("CPU executor stopped")
+    if _worker_log_listener is not None:
+        _worker_log_listener.stop()
+        _worker_log_listener = None
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, size: int = 0) -> T:
+    """
+    Run a CPU-bound callable, offloading it when `size` reaches CPU_OFFLOAD_MIN_CHARS.
+
+    `size` is a cheap estimate of the work (usually the input length in chars).
+    With the process executor, `func` and its arguments must be picklable.
+    """
+    if size < get_env_offload_min_chars():
+        return func(*args)
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args))
@@ -0,0 +1,18 @@
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+_loaded = False
+
+
+def load_env() -> None:
+    """Load `.env` into os.environ once per process; variables already set take precedence."""
+    global _loaded
+    if _loaded:
+        return
+    from dotenv import load_dotenv
+
+    found = load_dotenv()
+    _loaded = True
+    logger.debug("Loaded .env: %s", found)
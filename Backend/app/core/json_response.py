@@ -0,0 +1,21 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON rendered with orjson.
+
+    Skips FastAPI's jsonable_encoder pass and writes UTF-8 directly, so Vietnamese
+    rationales are not inflated into \\uXXXX escapes. Pydantic models are dumped
+    first; enums, datetimes and non-str dict keys are handled by orjson (UTC
+    datetimes end in "Z", as in FastAPI's own rendering).
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
@@ -0,0 +1,56 @@
+import logging
+import os
+from typing import Any
+
+
+def get_env_payload_log_limit() -> int:
+    """Return LOG_PAYLOAD_MAX_CHARS (default 2000); 0 or less disables truncation."""
+    try:
+        return int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", 2000))
+    except ValueError:
+        return 2000
+
+
+# Read once by configure_logging(); Truncated is built on every logging call, whatever the level
+_payload_log_limit = get_env_payload_log_limit()
+
+
+def set_payload_log_limit(limit: int) -> None:
+    global _payload_log_limit
+    _payload_log_limit = limit
+
+
+class Truncated:
+    """
+    Log argument wrapper that defers str() until the record is formatted and caps its size.
+
+    Use it for prompts, payloads and raw responses:
+        logger.debug("Request payload: %s", Truncated(payload))
+    Nothing is rendered when the level is disabled.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int | None = None) -> None:
+        self.value = value
+        self.limit = _payload_log_limit if limit is None else limit
+
+    def __str__(self) -> str:
+        text = str(self.value)
+        if self.limit <= 0 or len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... [truncated {len(text) - self.limit} chars]"
+
+    __repr__ = __str__
+
+
+def mask_secret(value: str | None, keep: int = 3) -> str:
+    """Return a masked form of a secret suitable for logs."""
+    if not value:
+        return "***"
+    return f"{value[:keep]}...{value[-keep:]}" if len(value) > keep * 2 else "***"
+
+
+def debug_enabled(logger: logging.Logger) -> bool:
+    """Guard for log statements whose arguments are expensive to build."""
+    return logger.isEnabledFor(logging.DEBUG)
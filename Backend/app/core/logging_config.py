@@ -1,10 +1,16 @@
 import logging
 import logging.config
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 import os
 import json
-from typing import Any, Dict, Optional
+import queue
+from typing import Any, Dict, List, Optional
+
+from app.core.log_utils import get_env_payload_log_limit, set_payload_log_limit
+
+
+_queue_listeners: List[QueueListener] = []
 
 
 def get_repo_root() -> Path:
@@ -39,6 +45,11 @@ def get_env_log_level() -> str:
     return level if level in {"CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"} else "INFO"
 
 
+def get_env_log_queue_enabled() -> bool:
+    """Return whether handlers should be moved behind a queue (LOG_QUEUE, default on)."""
+    return os.environ.get("LOG_QUEUE", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+
 def read_json_file(path: Path) -> Optional[Dict[str, Any]]:
     if not path.exists():
         return None
@@ -172,6 +183,92 @@ def apply_overrides(
     return config
 
 
+def install_queue_handlers() -> int:
+    """
+    Move every configured handler behind a QueueHandler served by a QueueListener thread.
+
+    Each real handler gets its own queue and listener, so per-logger routing and
+    handler levels stay exactly as configured while stream/file writes leave the
+    event loop thread. Returns the number of handlers moved.
+    """
+    stop_queue_listeners()
+
+    loggers = [logging.getLogger()] + [
+        obj for obj in logging.Logger.manager.loggerDict.values()
+        if isinstance(obj, logging.Logger) and obj.handlers
+    ]
+
+    wrapped: Dict[int, QueueHandler] = {}
+    for target in loggers:
+        replaced = []
+        for handler in target.handlers:
+            if isinstance(handler, QueueHandler):
+                replaced.append(handler)
+                continue
+            queue_handler = wrapped.get(id(handler))
+            if queue_handler is None:
+                record_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+                queue_handler = QueueHandler(record_queue)
+                queue_handler.setLevel(handler.level)
+                listener = QueueListener(record_queue, handler, respect_handler_level=True)
+                listener.start()
+                _queue_listeners.append(listener)
+                wrapped[id(handler)] = queue_handler
+            replaced.append(queue_handler)
+        target.handlers = replaced
+
+    return len(wrapped)
+
+
+class _Redispatch(logging.Handler):
+    """Hand a record logged in a worker process to the logger of the same name here."""
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        logger = logging.getLogger(record.name)
+        if not logger.disabled:
+            logger.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        pass
+
+
+def start_worker_log_listener(record_queue: Any) -> QueueListener:
+    """
+    Serve records that worker processes put on `record_queue` with this process's handlers.
+
+    Pair it with init_worker_logging() as the pool initializer; stop the listener
+    after the pool has shut down.
+    """
+    listener = QueueListener(record_queue, _Redispatch())
+    listener.start()
+    return listener
+
+
+def init_worker_logging(record_queue: Any, level: int, payload_log_limit: int) -> None:
+    """
+    Pool initializer: send every record of a worker process to the parent's listener.
+
+    A forked worker inherits the parent's QueueHandlers but not the listener
+    threads behind them, so records it logs would never be written.
+    """
+    for obj in list(logging.Logger.manager.loggerDict.values()) + [logging.getLogger()]:
+        if isinstance(obj, logging.Logger):
+            # The parent routes each record by its logger name, as if it had been logged there
+            obj.handlers = []
+            obj.propagate = True
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(record_queue))
+    root.setLevel(level)
+    set_payload_log_limit(payload_log_limit)
+
+
+def stop_queue_listeners() -> None:
+    """Flush and stop listener threads started by install_queue_handlers()."""
+    while _queue_listeners:
+        _queue_listeners.pop().stop()
+
+
 def configure_logging() -> None:
     """Configure logging for the application."""
     paths = resolve_paths()
@@ -192,11 +289,15 @@ def configure_logging() -> None:
         access_log=paths["access_log"],
     )
 
+    stop_queue_listeners()
     logging.config.dictConfig(config)
+    set_payload_log_limit(get_env_payload_log_limit())
+    queued = install_queue_handlers() if get_env_log_queue_enabled() else 0
     logging.getLogger(__name__).info(
-        "Logging configured: level=%s, dir=%s",
+        "Logging configured: level=%s, dir=%s, queued_handlers=%d",
         level,
         str(paths["logs_dir"]),
+        queued,
     )
 
 
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from os import environ
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+_state: Optional["SharedState"] = None
+
+
+def get_env_backend() -> str:
+    """SHARED_STATE_BACKEND: sqlite (default, one host), redis (many hosts) or memory (single process)."""
+    backend = environ.get("SHARED_STATE_BACKEND", "sqlite").strip().lower()
+    return backend if backend in {"sqlite", "redis", "memory"} else "sqlite"
+
+
+def get_env_sqlite_path() -> str:
+    return environ.get("SHARED_STATE_PATH", os.path.join("state", "shared_state.db"))
+
+
+def get_env_redis_url() -> str:
+    return environ.get("SHARED_STATE_URL", "redis://localhost:6379/0")
+
+
+class SharedState(ABC):
+    """
+    Small key/value store shared by every uvicorn worker.
+
+    Values are bytes; `ttl` is in seconds and None means no expiry. `add` and
+    `incr` are atomic across processes, which is what locks and counters need.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Set `key` only if it is absent (or expired); True when this call set it."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Add to an integer counter and return the new value; `ttl` applies when the counter is created."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        """Values for `keys` in order, None where absent; backends override this with one round trip."""
+        return [await self.get(key) for key in keys]
+
+    async def close(self) -> None:
+        return None
+
+
+class MemoryState(SharedState):
+    """Process-local store; only correct with a single worker."""
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[bytes | int, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[bytes | int]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    @staticmethod
+    def _expiry(ttl: Optional[float]) -> Optional[float]:
+        return time.time() + ttl if ttl is not None else None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self._live(key)
+        return str(value).encode() if isinstance(value, int) else value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._data[key] = (value, self._expiry(ttl))
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._data[key] = (value, self._expiry(ttl))
+        return True
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        current = self._live(key)
+        if current is None:
+            self._data[key] = (amount, self._expiry(ttl))
+            return amount
+        value = int(current) + amount
+        self._data[key] = (value, self._data[key][1])
+        return value
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class SQLiteState(SharedState):
+    """
+    Store in one SQLite file in WAL mode, shared by all workers on a host.
+
+    Statements are single-row and run in a worker thread so lock waits
+    (busy_timeout) never block the event loop.
+    """
+
+    _PURGE_EVERY = 1000  # writes between sweeps of expired rows
+    _MAX_PARAMS = 500     # keys per SELECT ... IN (...), well below SQLite's variable limit
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+        logger.info("Shared state: SQLite at %s", path)
+
+    def _execute(self, sql: str, params: tuple) -> list[tuple]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            if sql.lstrip().upper().startswith(("INSERT", "DELETE")):
+                self._writes += 1
+                if self._writes % self._PURGE_EVERY == 0:
+                    self._conn.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+            return rows
+
+    async def _run(self, sql: str, params: tuple) -> list[tuple]:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    @staticmethod
+    def _expiry(ttl: Optional[float]) -> Optional[float]:
+        return time.time() + ttl if ttl is not None else None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        rows = await self._run(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        )
+        if not rows:
+            return None
+        value = rows[0][0]
+        return str(value).encode() if isinstance(value, int) else value
+
+    def _select_many(self, keys: list[str]) -> dict[str, bytes]:
+        found: dict[str, bytes] = {}
+        now = time.time()
+        for start in range(0, len(keys), self._MAX_PARAMS):
+            chunk = keys[start:start + self._MAX_PARAMS]
+            rows = self._execute(
+                f"SELECT key, value FROM kv WHERE key IN ({','.join('?' * len(chunk))}) "
+                "AND (expires_at IS NULL OR expires_at > ?)", (*chunk, now),
+            )
+            found.update(rows)
+        return found
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        found = await asyncio.to_thread(self._select_many, keys)
+        return [found.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self._run(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, self._expiry(ttl)),
+        )
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        rows = await self._run(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE kv.expires_at IS NOT NULL AND kv.expires_at <= ? RETURNING 1",
+            (key, value, self._expiry(ttl), now),
+        )
+        return bool(rows)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.time()
+        rows = await self._run(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "value = CASE WHEN kv.expires_at IS NOT NULL AND kv.expires_at <= ? THEN excluded.value ELSE kv.value + excluded.value END, "
+            "expires_at = CASE WHEN kv.expires_at IS NOT NULL AND kv.expires_at <= ? THEN excluded.expires_at ELSE kv.expires_at END "
+            "RETURNING value",
+            (key, amount, self._expiry(ttl), now, now),
+        )
+        return int(rows[0][0])
+
+    async def delete(self, key: str) -> None:
+        await self._run("DELETE FROM kv WHERE key = ?", (key,))
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisState(SharedState):
+    """Redis (or any RESP-compatible server) for deployments spanning several hosts; needs the `redis` package."""
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as err:
+            raise RuntimeError("SHARED_STATE_BACKEND=redis requires the 'redis' package (pip install redis)") from err
+        self._client = redis.from_url(url)
+        logger.info("Shared state: Redis at %s", url.split("@")[-1])
+
+    @staticmethod
+    def _px(ttl: Optional[float]) -> Optional[int]:
+        return max(1, int(ttl * 1000)) if ttl is not None else None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return await self._client.mget(keys) if keys else []
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self._client.set(key, value, px=self._px(ttl))
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return bool(await self._client.set(key, value, px=self._px(ttl), nx=True))
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        # SET NX creates the counter with its expiry; INCRBY keeps the TTL
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.set(key, 0, px=self._px(ttl), nx=True)
+            pipe.incrby(key, amount)
+            _, value = await pipe.execute()
+        return int(value)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def get_shared_state() -> SharedState:
+    """The process-wide store, created on first use from SHARED_STATE_* settings."""
+    global _state
+    if _state is None:
+        backend = get_env_backend()
+        if backend == "redis":
+            _state = RedisState(get_env_redis_url())
+        elif backend == "memory":
+            _state = MemoryState()
+        else:
+            _state = SQLiteState(get_env_sqlite_path())
+    return _state
+
+
+async def close_shared_state() -> None:
+    global _state
+    if _state is not None:
+        await _state.close()
+        _state = None
@@ -4,8 +4,22 @@ from contextlib import asynccontextmanager
 import logging
 import os
 
-from app.core.logging_config import configure_logging
+from app.core.compression import (
+    CompressionMiddleware,
+    get_env_brotli_quality, get_env_compression_enabled, get_env_compression_min_bytes, get_env_gzip_level,
+)
+from app.core.cpu_executor import shutdown_executor
+from app.core.env import load_env
+from app.core.json_response import ORJSONResponse
+from app.core.shared_state import close_shared_state
+from app.core.logging_config import configure_logging, stop_queue_listeners
+from app.services.history import close_history
+from app.services.llm_services.model_warmup import start_model_warmup, stop_model_warmup
+from app.services.precheck.sandbox import shutdown_pool as shutdown_precheck_pool
 from app.api.score import router as score_router
+from app.api.batch_score import router as batch_score_router
+from app.api.health import router as health_router
+from app.api.history import router as history_router
 
 
 def log_effective_levels() -> None:
@@ -25,12 +39,22 @@ async def lifespan(app: FastAPI):
     configure_logging()
     logging.getLogger(__name__).info("Application startup: logging configured")
     log_effective_levels()
+    start_model_warmup()
     yield
     logging.getLogger(__name__).info("Application shutdown")
+    await stop_model_warmup()
+    # Writes the results still buffered for the grading history
+    await close_history()
+    await close_shared_state()
+    shutdown_executor()
+    shutdown_precheck_pool()
+    stop_queue_listeners()
 
 
 def create_app() -> FastAPI:
-    application = FastAPI(lifespan=lifespan)
+    # Settings are read from os.environ at use time, so .env only has to be loaded once, here
+    load_env()
+    application = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
     
     # Configure CORS
     cors_origins_str = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000")
@@ -47,8 +71,19 @@ def create_app() -> FastAPI:
         allow_methods=["*"],  # Allow all methods (GET, POST, OPTIONS, etc.)
         allow_headers=["*"],  # Allow all headers
     )
+    if get_env_compression_enabled():
+        # gzip or brotli per Accept-Encoding; batch results compress well (repeated keys, band texts)
+        application.add_middleware(
+            CompressionMiddleware,
+            minimum_size=get_env_compression_min_bytes(),
+            gzip_level=get_env_gzip_level(),
+            brotli_quality=get_env_brotli_quality(),
+        )
     
     application.include_router(score_router)
+    application.include_router(batch_score_router)
+    application.include_router(health_router)
+    application.include_router(history_router)
     return application
 
 
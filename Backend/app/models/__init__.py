@@ -1,7 +1,11 @@
 from .common import *
 from .scoring import *
+from .batch_scoring import *
+from .history import *
 
 __all__ = [
     "common",
     "scoring",
+    "batch_scoring",
+    "history",
 ]
@@ -0,0 +1,11 @@
+from .requests import BatchScoringRequest
+from .responses import (
+    BatchScoringResponse, BatchScoringError, BatchUploadResponse, SkippedFile, BulkJobStatus,
+    SimilarityMember, SimilarityCluster, SimilarityReport,
+)
+
+__all__ = [
+    "BatchScoringRequest",
+    "BatchScoringResponse", "BatchScoringError", "BatchUploadResponse", "SkippedFile", "BulkJobStatus",
+    "SimilarityMember", "SimilarityCluster", "SimilarityReport",
+]
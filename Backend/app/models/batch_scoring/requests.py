@@ -1,7 +1,22 @@
 
+from typing import Literal, Optional
 from app.models.scoring.requests import ScoringRequest
-from pydantic import BaseModel
+from app.models.scoring.rubric import Rubric
+from pydantic import BaseModel, Field
 
 
 class BatchScoringRequest(BaseModel):
-    submissions: list[ScoringRequest]
\ No newline at end of file
+    submissions: list[ScoringRequest]
+    # "reuse": score one representative per cluster of near-duplicate submissions and copy its result
+    dedupe: Literal["off", "reuse"] = "off"
+    similarity_threshold: float = Field(default=0.9, ge=0, le=1)
+    spot_check_rate: float = Field(default=0.0, ge=0, le=1)  # share of duplicates still sent to the LLM
+    # Scheduling class of the batch's LLM calls; single /score requests always run as "interactive"
+    priority: Literal["batch", "backfill"] = "batch"
+    # Course/tenant id for submissions that do not carry their own
+    tenant: Optional[str] = Field(default=None, max_length=64)
+
+
+class RescoreRequest(BaseModel):
+    rubric: Rubric                    # the edited rubric: new weights and penalty points
+    payload_ids: list[str] = Field(min_length=1)  # from earlier ScoringResponse.payload_id values
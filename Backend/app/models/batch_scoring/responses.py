@@ -1,9 +1,55 @@
 
+from app.models.common.llm_provider import LLMProvider
 from app.models.scoring.responses import ScoringResponse
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class BatchScoringError(BaseModel):
+    index: int                        # position in the submitted batch
+    student_id: Optional[str] = None
+    detail: str
 
 
 class BatchScoringResponse(BaseModel):
     results: List[ScoringResponse]
-    total_processed: int
\ No newline at end of file
+    total_processed: int
+    errors: List[BatchScoringError] = Field(default_factory=list)
+    batch_id: Optional[str] = None    # grading history: GET /history/results?batch_id=... lists these results again
+
+
+class SkippedFile(BaseModel):
+    path: str                         # file name or path inside the uploaded archive
+    reason: str
+
+
+class BatchUploadResponse(BatchScoringResponse):
+    skipped_files: List[SkippedFile] = Field(default_factory=list)
+
+
+class BulkJobStatus(BaseModel):
+    job_id: str                       # provider batch id (e.g. "batch_abc123")
+    provider: LLMProvider
+    status: str                       # provider status: validating, in_progress, completed, failed, expired, cancelled...
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    results: Optional[BatchScoringResponse] = None  # set once the provider batch has completed
+
+
+class SimilarityMember(BaseModel):
+    index: int                        # position in the submitted batch
+    student_id: Optional[str] = None
+    similarity: float                 # estimated Jaccard similarity to the representative (0–1)
+
+
+class SimilarityCluster(BaseModel):
+    representative: SimilarityMember
+    members: List[SimilarityMember]   # near-duplicates of the representative
+
+
+class SimilarityReport(BaseModel):
+    total_submissions: int
+    threshold: float
+    duplicates: int                   # submissions that belong to a cluster but are not its representative
+    clusters: List[SimilarityCluster]
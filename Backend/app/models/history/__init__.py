@@ -0,0 +1,9 @@
+from .requests import HistoryFilter
+from .responses import (
+    HistoryEntry, HistoryPage, BandCount, CategoryAggregate, HistoryAggregates, ProblemSummary, BatchSummary,
+)
+
+__all__ = [
+    "HistoryFilter",
+    "HistoryEntry", "HistoryPage", "BandCount", "CategoryAggregate", "HistoryAggregates", "ProblemSummary", "BatchSummary",
+]
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.models.common.llm_provider import LLMProvider
+
+
+class HistoryFilter(BaseModel):
+    course: Optional[str] = None      # tenant the result was scored for ("default" when none was given)
+    problem: Optional[str] = None     # problem_hash, as listed by GET /history/problems
+    student_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    fingerprint: Optional[str] = None
+    provider: Optional[LLMProvider] = None
+    since: Optional[datetime] = None  # graded at or after
+    until: Optional[datetime] = None  # graded before
+    min_score: Optional[float] = None  # total_score range, inclusive
+    max_score: Optional[float] = None
@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.models.common.llm_provider import LLMProvider
+from app.models.scoring.responses import ScoringResponse
+
+
+class HistoryEntry(BaseModel):
+    id: int
+    created_at: datetime
+    course: str
+    problem_hash: str                 # sha256 of the problem description, first 16 hex digits
+    problem_title: str                # first line of the problem description
+    student_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    fingerprint: str                  # same value for requests that would be graded identically
+    provider: LLMProvider
+    model: Optional[str] = None
+    total_score: float
+    latency_ms: Optional[float] = None  # from request to result; None for batch dedupe copies
+    llm_calls: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    response: ScoringResponse
+
+
+class HistoryPage(BaseModel):
+    items: List[HistoryEntry]
+    next_cursor: Optional[str] = None  # pass as `cursor` for the next page; None on the last one
+
+
+class BandCount(BaseModel):
+    min_score: Optional[int] = None
+    max_score: Optional[int] = None
+    count: int
+
+
+class CategoryAggregate(BaseModel):
+    category_name: str
+    count: int
+    mean: float                       # of raw_score
+    stdev: float
+    min_score: float
+    max_score: float
+    bands: List[BandCount] = Field(default_factory=list)  # how often each band was chosen
+
+
+class HistoryAggregates(BaseModel):
+    count: int
+    mean: Optional[float] = None      # of total_score
+    stdev: Optional[float] = None
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+    mean_latency_ms: Optional[float] = None
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    categories: List[CategoryAggregate] = Field(default_factory=list)
+
+
+class ProblemSummary(BaseModel):
+    problem_hash: str
+    problem_title: str
+    results: int
+    mean: float
+    first_graded: datetime
+    last_graded: datetime
+
+
+class BatchSummary(BaseModel):
+    batch_id: str
+    course: str
+    results: int
+    mean: float
+    started_at: datetime
+    finished_at: datetime
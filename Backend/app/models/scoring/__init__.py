@@ -1,13 +1,15 @@
 from .rubric import Rubric, RubricBand, RubricCategory, PenaltyRule
-from .requests import ScoringRequest
+from .requests import ScoringRequest, TestCase
 from .responses import (
     ScoringResponse,
-    CategoryResult, PenaltyApplied, CategoryBandDecision
+    CategoryResult, PenaltyApplied, CategoryBandDecision,
+    PrecheckResult, TestCaseResult,
 )
 
 __all__ = [
     "Rubric", "RubricBand", "RubricCategory", "PenaltyRule",
-    "ScoringRequest",
+    "ScoringRequest", "TestCase",
     "ScoringResponse",
     "CategoryResult", "PenaltyApplied", "CategoryBandDecision",
+    "PrecheckResult", "TestCaseResult",
 ]
\ No newline at end of file
@@ -1,9 +1,25 @@
-from typing import Literal
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
 
 from app.models.common.llm_provider import LLMProvider
 from .rubric import Rubric
 
+class TestCase(BaseModel):
+    name: Optional[str] = None
+    input: str = ""               # fed to stdin
+    expected_output: str          # compared to stdout, ignoring trailing whitespace
+
+class ModelTier(BaseModel):
+    llm_provider: LLMProvider
+    model: str
+
+class EnsembleSettings(BaseModel):
+    samples: int = Field(default=3, ge=2, le=9)
+    quorum: Optional[int] = Field(default=None, ge=1)  # samples that must agree on every band to stop early; default a majority
+    models: List[ModelTier] = Field(default_factory=list)  # samples rotate over llm_provider/model and these
+    # Every sample is sent with this temperature and its own seed instead of TEMPERATURE, so samples can differ
+    temperature: float = Field(default=0.7, gt=0.0, le=2.0)
+
 class ScoringRequest(BaseModel):
     llm_provider: LLMProvider
     problem_description: str
@@ -11,4 +27,14 @@ class ScoringRequest(BaseModel):
     programming_language: Literal["cpp", "python", "javascript", "java"] = "cpp"
     rubric: Rubric
     language: str = "Vietnamese"
-    model: str
\ No newline at end of file
+    model: str
+    student_id: Optional[str] = None  # echoed back on the response, e.g. file name in batch uploads
+    tenant: Optional[str] = Field(default=None, max_length=64)  # course/tenant id; LLM capacity is shared fairly between tenants
+    precheck: bool = False            # compile and run test_cases locally before calling the LLM
+    test_cases: List[TestCase] = Field(default_factory=list)
+    # Cascade: llm_provider/model score first; while the result looks uncertain, these tiers are tried in order
+    escalation: List[ModelTier] = Field(default_factory=list)
+    # Self-consistency: score several samples concurrently and aggregate them
+    ensemble: Optional[EnsembleSettings] = None
+    # payload_id of an earlier result: only rubric categories and penalties changed since then are re-asked
+    regrade_from: Optional[str] = None
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 from app.models.common.llm_provider import LLMProvider
@@ -20,29 +20,85 @@ class PenaltyApplied(BaseModel):
     points: float                 # negative for deduction (e.g., -2)
     reason: Optional[str] = None  # optional explanation
 
+class TestCaseResult(BaseModel):
+    name: str
+    status: Literal["passed", "failed", "timeout", "runtime_error"]
+    detail: Optional[str] = None  # short excerpt of actual output or error
+
+class PrecheckResult(BaseModel):
+    status: Literal["ok", "empty", "compile_error", "unsupported", "unavailable"]
+    compile_output: Optional[str] = None
+    tests: List[TestCaseResult] = Field(default_factory=list)
+
+    @property
+    def passed(self) -> int:
+        return sum(1 for t in self.tests if t.status == "passed")
+
+class CascadeStep(BaseModel):
+    llm_provider: LLMProvider
+    model: str
+    reasons: List[str]            # why this tier's result was not accepted
+
+class CascadeTrace(BaseModel):
+    tier: int                     # 0 = the request's own model, 1.. = escalation tiers
+    llm_provider: LLMProvider
+    model: str
+    escalations: List[CascadeStep] = Field(default_factory=list)
+    unresolved: List[str] = Field(default_factory=list)  # doubts left when the last tier still looked uncertain
+
+class CategorySpread(BaseModel):
+    category_name: str
+    min_score: float              # lowest raw_score among the samples
+    max_score: float
+    bands: int                    # distinct bands the samples picked
+
+class LLMUsage(BaseModel):
+    model: Optional[str] = None   # model that decided (for a cascade, the last tier asked; for an ensemble, every model sampled)
+    calls: int = 0                # LLM calls made; 0 when answered from the result cache or copied
+    prompt_tokens: Optional[int] = None      # None when the provider did not report them
+    completion_tokens: Optional[int] = None
+
+class EnsembleReport(BaseModel):
+    samples: int                  # samples that returned a result
+    failed: int = 0               # samples whose output did not parse or validate
+    cancelled: int = 0            # samples stopped early once a quorum agreed
+    agreeing: int                 # samples whose bands match the aggregated ones in every category
+    total_score_min: float
+    total_score_max: float
+    categories: List[CategorySpread] = Field(default_factory=list)
+    usage: List[LLMUsage] = Field(default_factory=list)  # calls and tokens per sampled model
+
+class RegradeReport(BaseModel):
+    from_payload_id: str
+    categories: List[str] = Field(default_factory=list)  # re-asked because they are new or their bands changed
+    penalties: List[str] = Field(default_factory=list)   # penalty codes re-asked because they are new or reworded
+    reused: List[str] = Field(default_factory=list)      # categories taken over from the earlier result
+
 class ScoringResponse(BaseModel):
     category_results: List[CategoryResult]
     penalties_applied: List[PenaltyApplied] = Field(default_factory=list)
     provider_used: LLMProvider
     feedback: Optional[str] = None  # optional overall narrative
     total_score: float            # final score after weighting/penalties (0–10)
+    student_id: Optional[str] = None  # copied from the request
+    precheck: Optional[PrecheckResult] = None  # local compile/test results, when requested
+    reused_from: Optional[str] = None  # batch dedupe: student id (or index) of the representative whose result was copied
+    cascade: Optional[CascadeTrace] = None  # model cascade: which tier decided, and why earlier tiers were passed over
+    ensemble: Optional[EnsembleReport] = None  # self-consistency: how far the samples were apart
+    payload_id: Optional[str] = None  # stored LLM payload; POST /batch-score/rescore re-weights it without the LLM
+    regrade: Optional[RegradeReport] = None  # with regrade_from: what was re-asked and what was reused
+    usage: Optional[LLMUsage] = None  # LLM calls and tokens spent on this result; None when scored by rule or re-scored
 
-class LLMCategoryBandDecision(BaseModel):
-    min_score: int
-    max_score: int
-    description: str
-    rationale: str
+# The LLM's band decisions and penalties are validated once, when its answer is
+# parsed, and the same objects are handed on to ScoringResponse
+LLMCategoryBandDecision = CategoryBandDecision
+LLMPenaltyApplied = PenaltyApplied
 
 class LLMCategoryResult(BaseModel):
     category_name: str
     raw_score: float
     band_decision: LLMCategoryBandDecision
 
-class LLMPenaltyApplied(BaseModel):
-    code: str
-    points: float
-    reason: Optional[str] = None
-
 class LLMScoringPayload(BaseModel):
     category_results: List[LLMCategoryResult]
     penalties_applied: List[LLMPenaltyApplied] = []
@@ -1,5 +1,29 @@
-from .llm_services import *
+import importlib
+
+from .ingestion import *
+from .export import *
+from .history import *
+
+
+# Imported on first use: provider clients and numpy dominate startup time otherwise
+_LAZY_SUBPACKAGES = ("llm_services", "similarity", "rescoring")
+
+
+def __getattr__(name: str):
+    if name in _LAZY_SUBPACKAGES:
+        return importlib.import_module(f".{name}", __name__)
+    for subpackage in _LAZY_SUBPACKAGES:
+        module = importlib.import_module(f".{subpackage}", __name__)
+        if name in module.__all__:
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "llm_services",
-]
\ No newline at end of file
+    "ingestion",
+    "export",
+    "history",
+    "similarity",
+    "rescoring",
+]
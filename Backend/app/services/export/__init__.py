@@ -0,0 +1,9 @@
+from .result_export import (
+    EXPORT_MEDIA_TYPES,
+    category_names, csv_columns, iter_csv, iter_ndjson, iter_json,
+)
+
+__all__ = [
+    "EXPORT_MEDIA_TYPES",
+    "category_names", "csv_columns", "iter_csv", "iter_ndjson", "iter_json",
+]
@@ -0,0 +1,62 @@
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel
+
+from app.models.scoring.responses import ScoringResponse
+
+
+# full: everything; summary: no per-category rationales or compiler output;
+# scores: gradebook view with scores, bands and ids only
+Verbosity = Literal["full", "summary", "scores"]
+
+_VERBOSITY_EXCLUDE: dict[str, Optional[dict[str, Any]]] = {
+    "full": None,
+    "summary": {
+        "category_results": {"__all__": {"band_decision": {"rationale"}}},
+        "precheck": {"compile_output"},
+    },
+    "scores": {
+        "category_results": {"__all__": {"band_decision": {"description", "rationale"}}},
+        "penalties_applied": {"__all__": {"reason"}},
+        "feedback": True,
+        "precheck": True,
+        "cascade": True,
+        "ensemble": True,
+        "regrade": True,
+        "usage": True,
+    },
+}
+
+
+class ResponseShape:
+    """Which parts of each ScoringResponse to serialize, from the `verbosity` and `fields` options."""
+
+    def __init__(self, verbosity: Verbosity = "full", fields: Optional[str] = None) -> None:
+        self.verbosity = verbosity
+        self.exclude = _VERBOSITY_EXCLUDE[verbosity]
+        self.include: Optional[set[str]] = None
+        if fields:
+            names = {name.strip() for name in fields.split(",") if name.strip()}
+            unknown = names - set(ScoringResponse.model_fields)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; "
+                                 f"allowed: {', '.join(ScoringResponse.model_fields)}")
+            self.include = names
+
+    @property
+    def is_full(self) -> bool:
+        return self.exclude is None and self.include is None
+
+    def dump(self, response: ScoringResponse) -> dict[str, Any]:
+        return response.model_dump(include=self.include, exclude=self.exclude)
+
+    def dump_container(self, container: BaseModel, field: str = "results") -> dict[str, Any]:
+        """Dump a model holding a list of ScoringResponse under `field`, trimming each item."""
+        if self.is_full:
+            return container.model_dump()
+        include = None
+        if self.include is not None:
+            include = {name: True for name in type(container).model_fields}
+            include[field] = {"__all__": self.include}
+        exclude = {field: {"__all__": self.exclude}} if self.exclude is not None else None
+        return container.model_dump(include=include, exclude=exclude)
@@ -0,0 +1,105 @@
+import csv
+import io
+from typing import AsyncIterator, Iterable, Optional
+
+import orjson
+
+from app.models.batch_scoring.requests import BatchScoringRequest
+from app.models.batch_scoring.responses import BatchScoringError
+from app.models.scoring.responses import CategoryResult, ScoringResponse
+from app.services.export.response_shape import ResponseShape
+
+
+# One exported item: (index in the batch, student id, response or error)
+ExportItem = tuple[int, Optional[str], ScoringResponse | BatchScoringError]
+
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def category_names(request: BatchScoringRequest) -> list[str]:
+    """Ordered union of rubric category names across the batch; drives the per-category CSV columns."""
+    names: dict[str, None] = {}
+    for submission in request.submissions:
+        for category in submission.rubric.categories:
+            names.setdefault(category.name, None)
+    return list(names)
+
+
+def csv_columns(categories: Iterable[str]) -> list[str]:
+    columns = ["index", "student_id", "total_score", "provider_used"]
+    for name in categories:
+        columns += [f"{name}_raw_score", f"{name}_weight", f"{name}_band"]
+    columns += ["penalties", "feedback", "error"]
+    return columns
+
+
+def _category_cells(result: Optional[CategoryResult]) -> list[object]:
+    if result is None:
+        return ["", "", ""]
+    band = result.band_decision
+    return [result.raw_score, result.weight, f"{band.min_score}-{band.max_score}"]
+
+
+def _csv_row(item: ExportItem, categories: list[str]) -> list[object]:
+    index, student_id, outcome = item
+    if isinstance(outcome, BatchScoringError):
+        return [index, student_id or "", "", ""] + [""] * (3 * len(categories)) + ["", "", outcome.detail]
+
+    by_name = {c.category_name: c for c in outcome.category_results}
+    row: list[object] = [index, student_id or "", outcome.total_score, outcome.provider_used.value]
+    for name in categories:
+        row += _category_cells(by_name.get(name))
+    row.append("; ".join(f"{p.code}:{p.points:g}" for p in outcome.penalties_applied))
+    row.append(outcome.feedback or "")
+    row.append("")
+    return row
+
+
+async def iter_csv(items: AsyncIterator[ExportItem], categories: list[str]) -> AsyncIterator[str]:
+    """Yield CSV text one row at a time (header first); a single small buffer is reused per row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def render(row: list[object]) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue()
+
+    # BOM so spreadsheet apps open Vietnamese text as UTF-8
+    yield "\ufeff" + render(csv_columns(categories))
+    async for item in items:
+        yield render(_csv_row(item, categories))
+
+
+def _json_record(item: ExportItem, shape: ResponseShape) -> bytes:
+    index, student_id, outcome = item
+    if isinstance(outcome, BatchScoringError):
+        return orjson.dumps({"index": index, "student_id": student_id, "error": outcome.detail})
+    return orjson.dumps({"index": index, "result": shape.dump(outcome)})
+
+
+async def iter_ndjson(items: AsyncIterator[ExportItem], shape: ResponseShape = ResponseShape()) -> AsyncIterator[bytes]:
+    """Yield one JSON object per line: {"index", "result"} or {"index", "student_id", "error"}."""
+    async for item in items:
+        yield _json_record(item, shape) + b"\n"
+
+
+async def iter_json(items: AsyncIterator[ExportItem], shape: ResponseShape = ResponseShape()) -> AsyncIterator[bytes]:
+    """Yield a single JSON document {"results": [...], "errors": [...]} incrementally."""
+    yield b'{"results":['
+    errors: list[BatchScoringError] = []
+    first = True
+    async for item in items:
+        outcome = item[2]
+        if isinstance(outcome, BatchScoringError):
+            # Errors are small; they are written after the results
+            errors.append(outcome)
+            continue
+        yield (b"" if first else b",") + orjson.dumps(shape.dump(outcome))
+        first = False
+    yield b'],"errors":' + orjson.dumps([e.model_dump() for e in errors]) + b"}"
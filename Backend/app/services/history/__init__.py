@@ -0,0 +1,15 @@
+from .store import (
+    HistoryStore, get_history_store, close_history_store, get_env_history_path, get_env_history_days,
+    encode_cursor, decode_cursor,
+)
+from .recorder import (
+    get_env_history_enabled, record, batch_scope, flush_history, close_history,
+    fingerprint, problem_hash, problem_title,
+)
+
+__all__ = [
+    "HistoryStore", "get_history_store", "close_history_store", "get_env_history_path", "get_env_history_days",
+    "encode_cursor", "decode_cursor",
+    "get_env_history_enabled", "record", "batch_scope", "flush_history", "close_history",
+    "fingerprint", "problem_hash", "problem_title",
+]
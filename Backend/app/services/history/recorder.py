@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import logging
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from os import environ
+from typing import Iterator, Optional
+
+from app.models.scoring.requests import ScoringRequest
+from app.models.scoring.responses import ScoringResponse
+from app.services.history.store import close_history_store, get_history_store
+
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_ROWS = 64          # results that trigger a write before the interval is up
+_FLUSH_INTERVAL = 0.5     # seconds a result waits at most before it is written
+_MAX_BUFFERED = 10_000    # results held while the database is slow or locked; later ones are dropped
+
+# Batch the results recorded by the current task belong to; tasks spawned for it inherit it
+_batch: ContextVar[Optional[str]] = ContextVar("history_batch", default=None)
+
+_recorder: Optional["HistoryRecorder"] = None
+
+
+def get_env_history_enabled() -> bool:
+    """GRADING_HISTORY (default on): keep every scored result in the local grading history."""
+    return environ.get("GRADING_HISTORY", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+
+@contextmanager
+def batch_scope(batch_id: Optional[str]) -> Iterator[None]:
+    """Record the results scored inside the block as part of batch `batch_id`."""
+    token = _batch.set(batch_id)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+
+
+def fingerprint(request: ScoringRequest) -> str:
+    """Same for requests graded alike: everything but who submitted them, for which course, and regrade_from."""
+    material = request.model_dump_json(exclude={"student_id", "tenant", "regrade_from"})
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+
+
+def problem_hash(problem_description: str) -> str:
+    return hashlib.sha256(problem_description.encode("utf-8")).hexdigest()[:16]
+
+
+def problem_title(problem_description: str) -> str:
+    return next((line.strip() for line in problem_description.splitlines() if line.strip()), "")[:120]
+
+
+@dataclass
+class _Pending:
+    request: ScoringRequest
+    response: ScoringResponse
+    created_at: float
+    course: str
+    batch_id: Optional[str]
+    latency_ms: Optional[float]
+
+
+def _encode(pending: _Pending) -> tuple[tuple, list[tuple]]:
+    request, response, usage = pending.request, pending.response, pending.response.usage
+    result = (
+        pending.created_at,
+        pending.course,
+        problem_hash(request.problem_description),
+        problem_title(request.problem_description),
+        response.student_id,
+        pending.batch_id,
+        fingerprint(request),
+        response.provider_used.value,
+        (usage.model if usage else None) or request.model,
+        response.total_score,
+        pending.latency_ms,
+        usage.calls if usage else None,
+        usage.prompt_tokens if usage else None,
+        usage.completion_tokens if usage else None,
+        # Level 1: a third of the CPU of the default level for nearly the same size on these small JSON documents
+        zlib.compress(response.model_dump_json().encode("utf-8"), 1),
+    )
+    categories = [
+        (c.category_name, c.raw_score, c.weight, c.band_decision.min_score, c.band_decision.max_score)
+        for c in response.category_results
+    ]
+    return result, categories
+
+
+def _write(pending: list[_Pending]) -> None:
+    # The store is opened here, in the worker thread, the first time results are written
+    get_history_store().insert_many([_encode(p) for p in pending])
+
+
+class HistoryRecorder:
+    """
+    Results recorded on the event loop, written to the history store in the
+    background: up to _FLUSH_INTERVAL seconds' worth (or _FLUSH_ROWS) go in one
+    transaction, encoded and inserted in a worker thread, so scoring never
+    waits on SQLite.
+    """
+
+    def __init__(self) -> None:
+        self._pending: list[_Pending] = []
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._dropped = 0
+
+    def add(self, pending: _Pending) -> None:
+        if len(self._pending) >= _MAX_BUFFERED:
+            self._dropped += 1
+            if self._dropped % 1000 == 1:
+                logger.warning("Grading history is behind; %d results dropped so far", self._dropped)
+            return
+        self._pending.append(pending)
+        if len(self._pending) >= _FLUSH_ROWS:
+            self._full.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._full.wait(), _FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything recorded so far."""
+        self._full.clear()
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            await asyncio.to_thread(_write, pending)
+        except Exception as err:
+            logger.warning("Could not write %d results to the grading history: %s", len(pending), err)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+
+
+def record(request: ScoringRequest, response: ScoringResponse, course: str, latency: Optional[float] = None) -> None:
+    """Queue a scored result for the grading history; `latency` is seconds from request to result."""
+    global _recorder
+    if not get_env_history_enabled():
+        return
+    if _recorder is None:
+        _recorder = HistoryRecorder()
+    _recorder.add(_Pending(
+        request=request,
+        response=response,
+        created_at=time.time(),
+        course=course,
+        batch_id=_batch.get(),
+        latency_ms=latency * 1000 if latency is not None else None,
+    ))
+
+
+async def flush_history() -> None:
+    """Write the results recorded so far, so queries see them."""
+    if _recorder is not None:
+        await _recorder.flush()
+
+
+async def close_history() -> None:
+    global _recorder
+    if _recorder is not None:
+        await _recorder.close()
+        _recorder = None
+    close_history_store()
@@ -0,0 +1,314 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from os import environ
+from typing import Any, Optional
+
+from app.models.history.requests import HistoryFilter
+from app.models.history.responses import (
+    BandCount, BatchSummary, CategoryAggregate, HistoryAggregates, HistoryEntry, HistoryPage, ProblemSummary,
+)
+from app.models.scoring.responses import ScoringResponse
+
+
+logger = logging.getLogger(__name__)
+
+_store: Optional["HistoryStore"] = None
+_open_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    course TEXT NOT NULL,
+    problem_hash TEXT NOT NULL,
+    problem_title TEXT NOT NULL,
+    student_id TEXT,
+    batch_id TEXT,
+    fingerprint TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT,
+    total_score REAL NOT NULL,
+    latency_ms REAL,
+    llm_calls INTEGER,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    response BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_created ON results (created_at);
+CREATE INDEX IF NOT EXISTS results_course ON results (course, created_at);
+CREATE INDEX IF NOT EXISTS results_problem ON results (problem_hash, created_at);
+CREATE INDEX IF NOT EXISTS results_student ON results (student_id, created_at);
+CREATE INDEX IF NOT EXISTS results_batch ON results (batch_id, created_at) WHERE batch_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS results_fingerprint ON results (fingerprint);
+CREATE INDEX IF NOT EXISTS results_score ON results (total_score);
+CREATE TABLE IF NOT EXISTS category_scores (
+    result_id INTEGER NOT NULL REFERENCES results (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    raw_score REAL NOT NULL,
+    weight REAL NOT NULL,
+    band_min INTEGER,
+    band_max INTEGER,
+    PRIMARY KEY (result_id, category)
+) WITHOUT ROWID;
+"""
+
+_ENTRY_COLUMNS = (
+    "id, created_at, course, problem_hash, problem_title, student_id, batch_id, fingerprint, provider, model, "
+    "total_score, latency_ms, llm_calls, prompt_tokens, completion_tokens, response"
+)
+
+
+def get_env_history_path() -> str:
+    return environ.get("GRADING_HISTORY_PATH", os.path.join("state", "grading_history.db"))
+
+
+def get_env_history_days() -> float:
+    """GRADING_HISTORY_DAYS (default 0 = keep everything): results older than this many days are purged."""
+    try:
+        return max(0.0, float(environ.get("GRADING_HISTORY_DAYS", 0)))
+    except ValueError:
+        return 0.0
+
+
+def _epoch(moment: datetime) -> float:
+    # Dates and times without a zone are taken as UTC
+    return (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _moment(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+def _stdev(mean: Optional[float], mean_square: Optional[float]) -> Optional[float]:
+    if mean is None or mean_square is None:
+        return None
+    return math.sqrt(max(0.0, mean_square - mean * mean))
+
+
+def _where(filters: HistoryFilter, *extra: str) -> tuple[str, list[Any]]:
+    clauses = list(extra)
+    params: list[Any] = []
+    for column, value in (
+        ("course", filters.course),
+        ("problem_hash", filters.problem),
+        ("student_id", filters.student_id),
+        ("batch_id", filters.batch_id),
+        ("fingerprint", filters.fingerprint),
+        ("provider", filters.provider.value if filters.provider else None),
+    ):
+        if value is not None:
+            clauses.append(f"r.{column} = ?")
+            params.append(value)
+    for clause, value in (
+        ("r.created_at >= ?", _epoch(filters.since) if filters.since else None),
+        ("r.created_at < ?", _epoch(filters.until) if filters.until else None),
+        ("r.total_score >= ?", filters.min_score),
+        ("r.total_score <= ?", filters.max_score),
+    ):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def encode_cursor(created_at: float, result_id: int) -> str:
+    return f"{created_at!r}:{result_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    created_at, _, result_id = cursor.rpartition(":")
+    try:
+        return float(created_at), int(result_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+
+
+class HistoryStore:
+    """
+    Scored results in one SQLite file in WAL mode, shared by all workers on a host.
+
+    `results` holds one row per result with the columns queries filter on, each
+    behind an index, and the full ScoringResponse as compressed JSON;
+    `category_scores` holds one row per category so aggregates are computed by
+    SQLite. Pages are keyset-paginated on (created_at, id), newest first, so a
+    page costs the same however deep it is. Methods block: call them in a
+    worker thread.
+    """
+
+    _PURGE_EVERY = 1000  # inserts between sweeps of results older than GRADING_HISTORY_DAYS
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._inserts = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+        self._purge()
+        logger.info("Grading history: SQLite at %s", path)
+
+    def insert_many(self, rows: list[tuple[tuple, list[tuple]]]) -> None:
+        """Insert (results row, category_scores rows without result_id) pairs in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for result, categories in rows:
+                    cursor = self._conn.execute(
+                        "INSERT INTO results (created_at, course, problem_hash, problem_title, student_id, batch_id, "
+                        "fingerprint, provider, model, total_score, latency_ms, llm_calls, prompt_tokens, "
+                        "completion_tokens, response) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        result,
+                    )
+                    # A category the LLM answered twice keeps its first score, as in the response
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO category_scores (result_id, category, raw_score, weight, band_min, band_max) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        [(cursor.lastrowid, *category) for category in categories],
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            before = self._inserts
+            self._inserts += len(rows)
+        if self._inserts // self._PURGE_EVERY != before // self._PURGE_EVERY:
+            self._purge()
+
+    def _purge(self) -> None:
+        days = get_env_history_days()
+        if days <= 0:
+            return
+        with self._lock:
+            purged = self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - days * 86400,)).rowcount
+        if purged:
+            logger.info("Grading history: purged %d results older than %g days", purged, days)
+
+    def _select(self, sql: str, params: list[Any]) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _entry(row: tuple) -> HistoryEntry:
+        *columns, response = row
+        fields = dict(zip(_ENTRY_COLUMNS.split(", "), columns))
+        fields["created_at"] = _moment(fields["created_at"])
+        return HistoryEntry(**fields, response=ScoringResponse.model_validate_json(zlib.decompress(response)))
+
+    def page(self, filters: HistoryFilter, limit: int = 50, cursor: Optional[str] = None) -> HistoryPage:
+        """Results matching `filters`, newest first; `cursor` is the previous page's next_cursor."""
+        after = ["(r.created_at, r.id) < (?, ?)"] if cursor else []
+        where, params = _where(filters, *after)
+        if cursor:
+            params = [*decode_cursor(cursor), *params]
+        rows = self._select(
+            f"SELECT {_ENTRY_COLUMNS} FROM results r{where} ORDER BY r.created_at DESC, r.id DESC LIMIT ?",
+            [*params, limit + 1],
+        )
+        items = [self._entry(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        return HistoryPage(items=items, next_cursor=next_cursor)
+
+    def get(self, result_id: int) -> Optional[HistoryEntry]:
+        rows = self._select(f"SELECT {_ENTRY_COLUMNS} FROM results r WHERE r.id = ?", [result_id])
+        return self._entry(rows[0]) if rows else None
+
+    def aggregates(self, filters: HistoryFilter) -> HistoryAggregates:
+        """Score statistics over the matching results, overall and per category, computed by SQLite."""
+        where, params = _where(filters)
+        count, mean, mean_square, lowest, highest, latency, calls, prompt, completion = self._select(
+            "SELECT COUNT(*), AVG(r.total_score), AVG(r.total_score * r.total_score), MIN(r.total_score), "
+            "MAX(r.total_score), AVG(r.latency_ms), TOTAL(r.llm_calls), TOTAL(r.prompt_tokens), "
+            f"TOTAL(r.completion_tokens) FROM results r{where}",
+            params,
+        )[0]
+        # One pass grouped by band; each category's statistics are summed from its bands
+        bands: dict[str, list[tuple]] = {}
+        for category, *group in self._select(
+            "SELECT c.category, c.band_min, c.band_max, COUNT(*), TOTAL(c.raw_score), TOTAL(c.raw_score * c.raw_score), "
+            "MIN(c.raw_score), MAX(c.raw_score) FROM results r JOIN category_scores c ON c.result_id = r.id"
+            f"{where} GROUP BY c.category, c.band_min, c.band_max ORDER BY c.category, c.band_min, c.band_max",
+            params,
+        ):
+            bands.setdefault(category, []).append(tuple(group))
+        categories = []
+        for category, groups in bands.items():
+            n = sum(g[2] for g in groups)
+            category_mean = sum(g[3] for g in groups) / n
+            categories.append(CategoryAggregate(
+                category_name=category,
+                count=n,
+                mean=category_mean,
+                stdev=_stdev(category_mean, sum(g[4] for g in groups) / n),
+                min_score=min(g[5] for g in groups),
+                max_score=max(g[6] for g in groups),
+                bands=[BandCount(min_score=g[0], max_score=g[1], count=g[2]) for g in groups],
+            ))
+        return HistoryAggregates(
+            count=count, mean=mean, stdev=_stdev(mean, mean_square), min_score=lowest, max_score=highest,
+            mean_latency_ms=latency, llm_calls=int(calls), prompt_tokens=int(prompt), completion_tokens=int(completion),
+            categories=categories,
+        )
+
+    def problems(self, filters: HistoryFilter, limit: int = 100) -> list[ProblemSummary]:
+        """Problems graded under `filters`, most recently graded first."""
+        where, params = _where(filters)
+        rows = self._select(
+            "SELECT r.problem_hash, MAX(r.problem_title), COUNT(*), AVG(r.total_score), MIN(r.created_at), "
+            f"MAX(r.created_at) AS last FROM results r{where} GROUP BY r.problem_hash ORDER BY last DESC LIMIT ?",
+            [*params, limit],
+        )
+        return [
+            ProblemSummary(problem_hash=problem, problem_title=title, results=n, mean=mean,
+                           first_graded=_moment(first), last_graded=_moment(last))
+            for problem, title, n, mean, first, last in rows
+        ]
+
+    def batches(self, filters: HistoryFilter, limit: int = 100) -> list[BatchSummary]:
+        """Batches graded under `filters`, most recent first."""
+        where, params = _where(filters, "r.batch_id IS NOT NULL")
+        rows = self._select(
+            "SELECT r.batch_id, MIN(r.course), COUNT(*), AVG(r.total_score), MIN(r.created_at), "
+            f"MAX(r.created_at) AS last FROM results r{where} GROUP BY r.batch_id ORDER BY last DESC LIMIT ?",
+            [*params, limit],
+        )
+        return [
+            BatchSummary(batch_id=batch, course=course, results=n, mean=mean,
+                         started_at=_moment(started), finished_at=_moment(finished))
+            for batch, course, n, mean, started, finished in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            # Refreshes the planner's statistics for the indexes queries have used
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
+
+
+def get_history_store() -> HistoryStore:
+    """
+    The process-wide history store, opened on first use at GRADING_HISTORY_PATH.
+    Opening it runs SQLite (schema, purge), so call it from a worker thread.
+    """
+    global _store
+    with _open_lock:
+        if _store is None:
+            _store = HistoryStore(get_env_history_path())
+    return _store
+
+
+def close_history_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -0,0 +1,11 @@
+from .submission_archive import (
+    SubmissionFile,
+    iter_upload_submissions, group_by_student,
+    SUPPORTED_EXTENSIONS,
+)
+
+__all__ = [
+    "SubmissionFile",
+    "iter_upload_submissions", "group_by_student",
+    "SUPPORTED_EXTENSIONS",
+]
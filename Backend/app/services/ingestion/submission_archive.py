@@ -0,0 +1,185 @@
+import logging
+import zipfile
+from os import environ
+from pathlib import PurePosixPath
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+from pydantic import BaseModel
+
+from app.models.batch_scoring.responses import SkippedFile
+
+
+logger = logging.getLogger(__name__)
+
+
+# File extension -> ScoringRequest.programming_language (None = use the form default)
+SUPPORTED_EXTENSIONS: dict[str, Optional[str]] = {
+    ".txt": None,
+    ".cpp": "cpp",
+    ".cc": "cpp",
+    ".cxx": "cpp",
+    ".h": "cpp",
+    ".hpp": "cpp",
+    ".py": "python",
+    ".js": "javascript",
+    ".java": "java",
+}
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class SubmissionFile(BaseModel):
+    student_id: str
+    path: str                               # path inside the upload/archive
+    code: str
+    programming_language: Optional[str]     # inferred from the extension, if any
+
+
+def get_env_max_source_bytes() -> int:
+    """Return MAX_SOURCE_BYTES, the per-file size limit for uploaded sources (default 20000)."""
+    try:
+        return int(environ.get("MAX_SOURCE_BYTES", 20000))
+    except ValueError:
+        return 20000
+
+
+def get_env_max_archive_members() -> int:
+    """Return MAX_ARCHIVE_MEMBERS, the number of entries read from one ZIP (default 2000)."""
+    try:
+        return int(environ.get("MAX_ARCHIVE_MEMBERS", 2000))
+    except ValueError:
+        return 2000
+
+
+def _as_path(name: str) -> PurePosixPath:
+    return PurePosixPath(name.replace("\\", "/"))
+
+
+def _is_ignored(path: PurePosixPath) -> bool:
+    return any(part.startswith(".") or part == "__MACOSX" for part in path.parts)
+
+
+def _student_id_for(path: PurePosixPath) -> str:
+    """
+    Map a file path, with the common root already stripped, to a student id.
+
+    One folder per student ("alice/main.cpp", "alice/src/main.cpp") uses the
+    top-level folder name, a file directly at the top ("student 1.txt") uses the
+    file name without extension.
+    """
+    return path.parts[0] if len(path.parts) > 1 else path.stem
+
+
+def _strip_common_root(paths: list[PurePosixPath]) -> list[PurePosixPath]:
+    """Drop a single top-level folder shared by every path (e.g. the zipped 'Samples/')."""
+    roots = {p.parts[0] for p in paths if len(p.parts) > 1}
+    if len(roots) == 1 and all(len(p.parts) > 1 for p in paths):
+        return [PurePosixPath(*p.parts[1:]) for p in paths]
+    return paths
+
+
+def _read_limited(stream: BinaryIO, limit: int) -> Optional[bytes]:
+    """Read at most `limit` bytes in chunks; return None if the stream is larger."""
+    chunks: list[bytes] = []
+    size = 0
+    while True:
+        chunk = stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            return b"".join(chunks)
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+
+
+def _decode(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("utf-8", errors="replace")
+
+
+def _iter_zip(fileobj: BinaryIO, max_bytes: int) -> Iterator[Union[SubmissionFile, SkippedFile]]:
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Invalid ZIP archive: {e}") from e
+
+    with archive:
+        # Only the central directory is read up front; members are decompressed one at a time
+        infos = [i for i in archive.infolist() if not i.is_dir()]
+        max_members = get_env_max_archive_members()
+        if len(infos) > max_members:
+            raise ValueError(f"ZIP archive has {len(infos)} files; limit is {max_members}")
+
+        # Ignored entries (__MACOSX/, dotfiles) are dropped first so they cannot hide the common root
+        members = [(i, _as_path(i.filename)) for i in infos]
+        members = [(i, p) for i, p in members if not _is_ignored(p)]
+        raw_paths = [p for _, p in members]
+        for (info, raw_path), path in zip(members, _strip_common_root(raw_paths)):
+            if raw_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+                yield SkippedFile(path=str(raw_path), reason="unsupported file type")
+                continue
+            if info.file_size > max_bytes:
+                yield SkippedFile(path=str(raw_path), reason=f"larger than {max_bytes} bytes")
+                continue
+            with archive.open(info) as member:
+                data = _read_limited(member, max_bytes)
+            if data is None:
+                yield SkippedFile(path=str(raw_path), reason=f"larger than {max_bytes} bytes")
+                continue
+            yield SubmissionFile(
+                student_id=_student_id_for(path),
+                path=str(raw_path),
+                code=_decode(data),
+                programming_language=SUPPORTED_EXTENSIONS[raw_path.suffix.lower()],
+            )
+
+
+def iter_upload_submissions(
+    uploads: Iterable[tuple[str, BinaryIO]],
+) -> Iterator[Union[SubmissionFile, SkippedFile]]:
+    """
+    Yield submissions from uploaded (filename, file object) pairs.
+
+    ZIP archives are expanded member by member; plain source files (including
+    browser folder uploads, whose names carry the relative path) are read directly.
+    Nothing larger than MAX_SOURCE_BYTES is ever held in memory per file.
+    """
+    max_bytes = get_env_max_source_bytes()
+    uploads = list(uploads)
+    plain_paths = [_as_path(name or "") for name, _ in uploads if not (name or "").lower().endswith(".zip")]
+    plain_iter = iter(_strip_common_root([p for p in plain_paths if not _is_ignored(p)]))
+
+    for name, fileobj in uploads:
+        name = name or ""
+        if name.lower().endswith(".zip"):
+            logger.debug("Expanding ZIP upload %s", name)
+            yield from _iter_zip(fileobj, max_bytes)
+            continue
+
+        raw_path = _as_path(name)
+        if _is_ignored(raw_path):
+            continue
+        path = next(plain_iter)
+        if raw_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            yield SkippedFile(path=name, reason="unsupported file type")
+            continue
+        data = _read_limited(fileobj, max_bytes)
+        if data is None:
+            yield SkippedFile(path=name, reason=f"larger than {max_bytes} bytes")
+            continue
+        yield SubmissionFile(
+            student_id=_student_id_for(path),
+            path=name,
+            code=_decode(data),
+            programming_language=SUPPORTED_EXTENSIONS[raw_path.suffix.lower()],
+        )
+
+
+def group_by_student(files: Iterable[SubmissionFile]) -> dict[str, list[SubmissionFile]]:
+    """Group files per student, keeping upload order; multi-file submissions are scored together."""
+    grouped: dict[str, list[SubmissionFile]] = {}
+    for f in files:
+        grouped.setdefault(f.student_id, []).append(f)
+    return grouped
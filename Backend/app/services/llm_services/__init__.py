@@ -1,8 +1,25 @@
+import importlib
+
 from .llm_base_service import LLMBaseService
 from .llm_common_service import LLMCommonService
-from .gemini_service import GeminiService
-from .lmstudio_service import LMStudioService
-from .ollama_service import OllamaService
+
+
+# Provider services import their HTTP clients; load them on first attribute access
+_LAZY_EXPORTS = {
+    "GeminiService": ".gemini_service",
+    "LMStudioService": ".lmstudio_service",
+    "OllamaService": ".ollama_service",
+    "OpenAICompatibleService": ".openai_compatible_service",
+    "OpenAIService": ".openai_compatible_service",
+    "DeepSeekService": ".openai_compatible_service",
+    "GrokService": ".openai_compatible_service",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
@@ -10,5 +27,9 @@ __all__ = [
     "GeminiService",
     "LMStudioService",
     "OllamaService",
+    "OpenAICompatibleService",
+    "OpenAIService",
+    "DeepSeekService",
+    "GrokService",
     "LLMCommonService",
 ]
@@ -0,0 +1,210 @@
+import logging
+import math
+from contextlib import contextmanager
+from dataclasses import dataclass
+from os import environ
+from typing import Any, Iterator, Optional
+
+from app.models.batch_scoring.requests import BatchScoringRequest
+from app.models.common.llm_provider import LLMProvider
+from app.models.scoring.requests import ScoringRequest
+from app.services.llm_services.scheduler import get_scheduler
+
+
+logger = logging.getLogger(__name__)
+
+# Besides its own text, an admitted submission holds a prompt (the code once more, plus
+# the rubric) and, once scored, the LLM answer and the parsed response: a few KiB each
+_SUBMISSION_OVERHEAD = 24 * 1024
+
+# Retry-After when nothing has finished lately to measure a drain rate from
+_FALLBACK_RETRY_AFTER = 10
+_MAX_RETRY_AFTER = 300
+
+
+def get_env_max_queued(provider: LLMProvider) -> int:
+    """
+    <PROVIDER>_MAX_QUEUED, else LLM_MAX_QUEUED (default 32): /score requests
+    per provider and worker admitted beyond its in-flight slots; -1 admits all.
+    """
+    value = environ.get(f"{provider.name}_MAX_QUEUED") or environ.get("LLM_MAX_QUEUED", "32")
+    try:
+        return max(-1, int(value))
+    except ValueError:
+        return 32
+
+
+def get_env_batch_memory_budget() -> int:
+    """BATCH_MEMORY_BUDGET_MB (default 256, 0 = unlimited) in bytes: estimated memory of the batches a worker admits."""
+    try:
+        return max(0, int(float(environ.get("BATCH_MEMORY_BUDGET_MB", 256)) * 1024 * 1024))
+    except ValueError:
+        return 256 * 1024 * 1024
+
+
+class Overloaded(Exception):
+    """
+    Not admitted: the provider's queue or the batch memory budget is full
+    (503, retry after `retry_after` seconds), or a batch could never fit the
+    budget (413, `retry_after` None).
+    """
+
+    def __init__(self, detail: str, retry_after: Optional[int], status_code: int = 503) -> None:
+        super().__init__(detail)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+def estimate_bytes(submission: ScoringRequest) -> int:
+    """Rough memory a submission holds from admission until its batch is answered (str chars as 2 bytes)."""
+    return 2 * (len(submission.student_code or "") + len(submission.problem_description or "")) + _SUBMISSION_OVERHEAD
+
+
+def _retry_after(backlog: float, rate: Optional[float]) -> int:
+    """Seconds for `backlog` calls to drain at `rate` calls/s."""
+    if not rate:
+        return _FALLBACK_RETRY_AFTER
+    return min(_MAX_RETRY_AFTER, max(1, math.ceil(backlog / rate)))
+
+
+@dataclass
+class _Counts:
+    pending: int = 0        # admitted and not yet answered
+    admitted: int = 0
+    rejected: int = 0
+
+
+class BatchTicket:
+    """Budget held by one admitted batch; released once, when the batch is answered or abandoned."""
+
+    def __init__(self, controller: "AdmissionController", size: int, items: int) -> None:
+        self._controller = controller
+        self.size = size
+        self.items = items
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release_batch(self)
+
+
+class AdmissionController:
+    """
+    Admission of scoring work in one worker, ahead of the LLM scheduler.
+
+    /score requests are counted per provider and turned away once the
+    provider's in-flight slots plus LLM_MAX_QUEUED are taken, instead of
+    piling up as coroutines that each hold a request and a prompt until they
+    time out. Batches are admitted whole, while their estimated memory fits
+    BATCH_MEMORY_BUDGET_MB. Retry-After is how long the provider's recent
+    drain rate takes to make room.
+    """
+
+    def __init__(self) -> None:
+        self._requests: dict[LLMProvider, _Counts] = {}
+        self._batches = _Counts()
+        self._batch_bytes = 0
+        self._batch_items = 0
+
+    @contextmanager
+    def request(self, provider: LLMProvider) -> Iterator[None]:
+        """Hold a place among the provider's admitted /score requests for the duration of the block."""
+        counts = self._requests.setdefault(provider, _Counts())
+        queued = get_env_max_queued(provider)
+        scheduler = get_scheduler(provider)
+        limit = scheduler.capacity + queued
+        if queued >= 0 and counts.pending >= limit:
+            counts.rejected += 1
+            retry_after = _retry_after(counts.pending - limit + 1, scheduler.drain_rate())
+            logger.warning("Shedding /score for %s: %d admitted, limit %d; retry after %ds",
+                           provider.value, counts.pending, limit, retry_after)
+            raise Overloaded(
+                f"Provider {provider.value} is at capacity ({counts.pending} requests admitted, limit {limit})",
+                retry_after,
+            )
+        counts.pending += 1
+        counts.admitted += 1
+        try:
+            yield
+        finally:
+            counts.pending -= 1
+
+    def admit_batch(self, request: BatchScoringRequest) -> BatchTicket:
+        """Admit a whole batch against the memory budget, or raise Overloaded; release the ticket when done."""
+        size = sum(estimate_bytes(s) for s in request.submissions)
+        budget = get_env_batch_memory_budget()
+        if budget and size > budget:
+            self._batches.rejected += 1
+            raise Overloaded(
+                f"Batch needs about {size / 2**20:.1f} MiB, more than the {budget / 2**20:.1f} MiB budget; "
+                f"send it in smaller parts",
+                None, status_code=413,
+            )
+        if budget and self._batch_bytes + size > budget:
+            self._batches.rejected += 1
+            # Admitted batches free memory as their calls finish, at about the mean size per submission
+            shortfall = self._batch_bytes + size - budget
+            per_item = self._batch_bytes / self._batch_items if self._batch_items else size / len(request.submissions)
+            providers = {s.llm_provider for s in request.submissions}
+            rates = [r for r in (get_scheduler(p).drain_rate() for p in providers) if r]
+            retry_after = _retry_after(shortfall / per_item, sum(rates) if rates else None)
+            logger.warning("Shedding batch of %d submissions (%.1f MiB): %.1f of %.0f MiB admitted; retry after %ds",
+                           len(request.submissions), size / 2**20, self._batch_bytes / 2**20, budget / 2**20, retry_after)
+            raise Overloaded(
+                f"Batch memory budget is in use ({self._batch_bytes / 2**20:.1f} of {budget / 2**20:.0f} MiB)",
+                retry_after,
+            )
+        self._batches.pending += 1
+        self._batches.admitted += 1
+        self._batch_bytes += size
+        self._batch_items += len(request.submissions)
+        return BatchTicket(self, size, len(request.submissions))
+
+    def _release_batch(self, ticket: BatchTicket) -> None:
+        self._batches.pending -= 1
+        self._batch_bytes -= ticket.size
+        self._batch_items -= ticket.items
+
+    @contextmanager
+    def batch(self, request: BatchScoringRequest) -> Iterator[BatchTicket]:
+        ticket = self.admit_batch(request)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Admitted and rejected requests per provider, and the batch memory budget in use (this worker only)."""
+        requests = {}
+        for provider, counts in self._requests.items():
+            queued = get_env_max_queued(provider)
+            requests[provider.value] = {
+                "pending": counts.pending,
+                "limit": get_scheduler(provider).capacity + queued if queued >= 0 else None,
+                "admitted": counts.admitted,
+                "rejected": counts.rejected,
+            }
+        budget = get_env_batch_memory_budget()
+        return {
+            "requests": requests,
+            "batches": {
+                "pending": self._batches.pending,
+                "submissions": self._batch_items,
+                "memory_mb": round(self._batch_bytes / 2**20, 1),
+                "budget_mb": round(budget / 2**20) if budget else None,
+                "admitted": self._batches.admitted,
+                "rejected": self._batches.rejected,
+            },
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission() -> AdmissionController:
+    """The process-wide admission controller, created on first use."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,109 @@
+import logging
+from os import environ
+from typing import TYPE_CHECKING, Optional
+
+from app.models.scoring.requests import ModelTier, ScoringRequest
+from app.models.scoring.responses import CascadeStep, CascadeTrace, LLMUsage, PrecheckResult, ScoringResponse
+from app.models.scoring.rubric import RubricBand, RubricCategory
+from app.services.llm_services.llm_base_service import combine_usage
+from app.services.llm_services.provider_registry import get_service_class
+
+if TYPE_CHECKING:
+    from app.services.llm_services.llm_base_service import LLMBaseService
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_env_boundary_margin() -> float:
+    """
+    CASCADE_BOUNDARY_MARGIN (default 0 = off): a raw score closer than this to
+    an edge its band shares with a neighbouring band counts as a boundary call
+    and is escalated.
+    """
+    try:
+        return float(environ.get("CASCADE_BOUNDARY_MARGIN", 0.0))
+    except ValueError:
+        return 0.0
+
+
+def _on_boundary(score: float, band: RubricBand, bands: list[RubricBand], margin: float) -> bool:
+    others = [b for b in bands if (b.min_score, b.max_score) != (band.min_score, band.max_score)]
+    # Integer bands either share an edge ([4-6], [6-8]) or are adjacent ([4-6], [7-10])
+    below = any(b.max_score >= band.min_score - 1 and b.min_score < band.min_score for b in others)
+    above = any(b.min_score <= band.max_score + 1 and b.max_score > band.max_score for b in others)
+    return (below and score - band.min_score < margin) or (above and band.max_score - score < margin)
+
+
+def uncertainty_reasons(request: ScoringRequest, response: ScoringResponse) -> list[str]:
+    """Why a tier's result should not be trusted as final; empty when it looks sound."""
+    margin = get_env_boundary_margin()
+    categories: dict[str, RubricCategory] = {c.name: c for c in request.rubric.categories}
+    reasons: list[str] = []
+    seen: set[str] = set()
+    for result in response.category_results:
+        name = result.category_name
+        category = categories.get(name)
+        if category is None:
+            reasons.append(f"unknown category '{name}'")
+            continue
+        seen.add(name)
+        decision = result.band_decision
+        band = next((b for b in category.bands if (b.min_score, b.max_score) == (decision.min_score, decision.max_score)), None)
+        if band is None:
+            reasons.append(f"{name}: band [{decision.min_score}-{decision.max_score}] is not in the rubric")
+            continue
+        if not band.min_score <= result.raw_score <= band.max_score:
+            reasons.append(f"{name}: raw_score {result.raw_score:g} outside chosen band [{band.min_score}-{band.max_score}]")
+        elif margin > 0 and _on_boundary(result.raw_score, band, category.bands, margin):
+            reasons.append(f"{name}: raw_score {result.raw_score:g} on the edge of band [{band.min_score}-{band.max_score}]")
+    for name in categories.keys() - seen:
+        reasons.append(f"missing category '{name}'")
+    return reasons
+
+
+async def generate_with_cascade(
+    first: "LLMBaseService", request: ScoringRequest, precheck: Optional[PrecheckResult]
+) -> ScoringResponse:
+    """
+    Score with the request's own model, escalating through `request.escalation`
+    while the result is uncertain or unparseable. The last tier's result is
+    kept whatever it looks like; the trace records which tier decided and why
+    earlier tiers were passed over.
+    """
+    tiers = [ModelTier(llm_provider=request.llm_provider, model=request.model), *request.escalation]
+    escalations: list[CascadeStep] = []
+    spent: list[Optional[LLMUsage]] = []  # usage of the tiers passed over
+    for index, tier in enumerate(tiers):
+        last = index == len(tiers) - 1
+        if index == 0:
+            service = first
+        else:
+            service_cls = get_service_class(tier.llm_provider)
+            if service_cls is None:
+                raise ValueError(f"Unsupported provider in escalation: {tier.llm_provider.value}")
+            service = service_cls()
+        tier_request = request.model_copy(update={"llm_provider": tier.llm_provider, "model": tier.model, "escalation": []})
+        try:
+            response = await service.generate_from_llm(tier_request, precheck)
+        except ValueError as err:
+            # Unparseable or invalid output: the next tier may do better
+            if last:
+                raise
+            reasons = [f"invalid output: {err}"]
+        else:
+            reasons = uncertainty_reasons(tier_request, response)
+            if not reasons or last:
+                response.cascade = CascadeTrace(
+                    tier=index, llm_provider=tier.llm_provider, model=tier.model,
+                    escalations=escalations, unresolved=reasons,
+                )
+                if spent:
+                    response.usage = combine_usage([*spent, response.usage], response.usage.model if response.usage else tier.model)
+                if index:
+                    logger.info("Cascade: student_id=%s decided by tier %d (%s)", request.student_id, index, tier.model)
+                return response
+            spent.append(response.usage)
+        logger.debug("Cascade: escalating from %s; reasons=%s", tier.model, reasons)
+        escalations.append(CascadeStep(llm_provider=tier.llm_provider, model=tier.model, reasons=reasons))
+    raise AssertionError("unreachable: the last tier always returns or raises")
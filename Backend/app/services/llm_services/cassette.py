@@ -0,0 +1,279 @@
+import asyncio
+import difflib
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from os import environ
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+_MODES = ("off", "record", "replay")
+
+
+def get_env_cassette_mode() -> str:
+    """LLM_CASSETTE: off (default), record (call the provider and keep every answer) or replay (never call it)."""
+    mode = environ.get("LLM_CASSETTE", "off").strip().lower()
+    return mode if mode in _MODES else "off"
+
+
+def get_env_cassette_dir() -> Path:
+    return Path(environ.get("LLM_CASSETTE_DIR", "cassettes"))
+
+
+def get_env_cassette_match() -> str:
+    """LLM_CASSETTE_MATCH: strict (default, the exact request) or fuzzy (the most similar recorded prompt)."""
+    return "fuzzy" if environ.get("LLM_CASSETTE_MATCH", "strict").strip().lower() == "fuzzy" else "strict"
+
+
+def get_env_cassette_fuzzy_min() -> float:
+    """LLM_CASSETTE_FUZZY_MIN, share of matching prompt lines (0-1, default 0.9) a fuzzy match needs."""
+    try:
+        return min(1.0, max(0.0, float(environ.get("LLM_CASSETTE_FUZZY_MIN", 0.9))))
+    except ValueError:
+        return 0.9
+
+
+def get_env_cassette_latency() -> Optional[float]:
+    """
+    LLM_CASSETTE_LATENCY for replays: none (default, answer at once), recorded
+    (as long as the recorded call took) or a fixed number of milliseconds.
+    None stands for "recorded", 0.0 for none.
+    """
+    value = environ.get("LLM_CASSETTE_LATENCY", "none").strip().lower()
+    if value == "recorded":
+        return None
+    try:
+        return max(0.0, float(value)) / 1000
+    except ValueError:
+        return 0.0
+
+
+class CassetteMiss(httpx.TransportError):
+    """Replay found no recording for a request."""
+
+
+def _canonical_body(content: bytes) -> Any:
+    """The request body as JSON where it is JSON, so key order and spacing don't change the match."""
+    try:
+        return json.loads(content) if content else None
+    except ValueError:
+        return content.decode("utf-8", errors="replace")
+
+
+def _dumps(material: Any) -> str:
+    return json.dumps(material, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _lines(body: Any) -> list[str]:
+    """A body split at its prompt's line breaks, the unit fuzzy matching compares."""
+    return _dumps(body).split("\\n")
+
+
+def request_key(method: str, path: str, body: Any) -> str:
+    """
+    Content address of a request: method, URL path and body. Host, query
+    string and headers are left out, so API keys never reach the store and a
+    recording replays against any base URL.
+    """
+    return hashlib.sha256(_dumps([method, path, body]).encode("utf-8")).hexdigest()
+
+
+class CassetteStore:
+    """
+    Recorded request/response pairs, one gzipped JSON file per request under
+    <dir>/<key[:2]>/<key>.json.gz. Files are plain enough to read, edit or
+    hand to someone reproducing a parse failure.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        # (method, path, model) -> [(body lines, key)], built on the first fuzzy lookup
+        self._index: Optional[dict[tuple, list[tuple[list[str], str]]]] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json.gz"
+
+    def _read(self, path: Path) -> Optional[dict]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as err:
+            logger.warning("Unreadable cassette entry %s: %s", path, err)
+            return None
+
+    def _write(self, key: str, entry: dict) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        with gzip.open(partial, "wt", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(partial, path)  # readers never see half an entry
+
+    @staticmethod
+    def _index_key(entry_request: dict) -> tuple:
+        body = entry_request.get("body")
+        model = body.get("model") if isinstance(body, dict) else None
+        return entry_request["method"], entry_request["path"], model
+
+    def _build_index(self) -> dict[tuple, list[tuple[list[str], str]]]:
+        index: dict[tuple, list[tuple[list[str], str]]] = {}
+        for path in self.directory.glob("*/*.json.gz"):
+            entry = self._read(path)
+            if entry is not None:
+                index.setdefault(self._index_key(entry["request"]), []).append(
+                    (_lines(entry["request"]["body"]), path.name.split(".")[0])
+                )
+        return index
+
+    def save(self, key: str, entry: dict) -> None:
+        self._write(key, entry)
+        if self._index is not None:
+            self._index.setdefault(self._index_key(entry["request"]), []).append((_lines(entry["request"]["body"]), key))
+
+    def find(self, key: str, method: str, path: str, body: Any, fuzzy: bool) -> Optional[dict]:
+        """
+        The recording for `key`; with `fuzzy`, else the recorded body for the
+        same endpoint and model that shares the most prompt lines with `body`.
+        """
+        entry = self._read(self._path(key))
+        if entry is not None or not fuzzy:
+            return entry
+        if self._index is None:
+            self._index = self._build_index()
+        model = body.get("model") if isinstance(body, dict) else None
+        candidates = self._index.get((method, path, model), [])
+        wanted = _lines(body)
+        threshold = get_env_cassette_fuzzy_min()
+        best_key, best_ratio = None, threshold
+        for lines, candidate in candidates:
+            matcher = difflib.SequenceMatcher(None, wanted, lines, autojunk=False)
+            # The quick upper bounds rule most candidates out before the quadratic ratio()
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best_key, best_ratio = candidate, ratio
+        if best_key is None:
+            return None
+        logger.info("Cassette fuzzy match %s for %s %s (similarity %.3f)", best_key[:12], method, path, best_ratio)
+        return self._read(self._path(best_key))
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Pass a response body through, keeping it once it has been read to the end."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_complete: Callable[[bytes], Awaitable[None]]):
+        self._stream = stream
+        self._on_complete = on_complete
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks = []
+        async for chunk in self._stream:
+            chunks.append(chunk)
+            yield chunk
+        # A stream closed early (a cancelled call) is an incomplete answer; don't record it
+        await self._on_complete(b"".join(chunks))
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that records every exchange to a CassetteStore, or
+    answers from it without touching the network.
+    """
+
+    def __init__(self, store: CassetteStore, mode: str):
+        self._store = store
+        self._mode = mode
+        self._inner = httpx.AsyncHTTPTransport() if mode == "record" else None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = _canonical_body(await request.aread())
+        method, path = request.method, request.url.path
+        key = request_key(method, path, body)
+        if self._mode == "replay":
+            return await self._replay(request, key, body)
+
+        # Keep the recorded body readable; a compressed one would need decoding on replay
+        request.headers["Accept-Encoding"] = "identity"
+        started = time.monotonic()
+        response = await self._inner.handle_async_request(request)
+
+        async def record(content: bytes) -> None:
+            entry = {
+                "request": {"method": method, "path": path, "body": body},
+                "response": {
+                    "status": response.status_code,
+                    "content_type": response.headers.get("content-type", ""),
+                    "body": content.decode("utf-8", errors="replace"),
+                },
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            try:
+                await asyncio.to_thread(self._store.save, key, entry)
+            except OSError as err:
+                logger.warning("Could not record cassette entry %s: %s", key[:12], err)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, record),
+            extensions=response.extensions,
+        )
+
+    async def _replay(self, request: httpx.Request, key: str, body: Any) -> httpx.Response:
+        fuzzy = get_env_cassette_match() == "fuzzy"
+        entry = await asyncio.to_thread(self._store.find, key, request.method, request.url.path, body, fuzzy)
+        if entry is None:
+            raise CassetteMiss(
+                f"No cassette recording for {request.method} {request.url.path} (key {key[:12]}) "
+                f"in {self._store.directory}",
+                request=request,
+            )
+        latency = get_env_cassette_latency()
+        delay = entry.get("elapsed_ms", 0) / 1000 if latency is None else latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+        recorded = entry["response"]
+        return httpx.Response(
+            status_code=recorded["status"],
+            headers={"content-type": recorded["content_type"]} if recorded["content_type"] else None,
+            content=recorded["body"].encode("utf-8"),
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        if self._inner is not None:
+            await self._inner.aclose()
+
+
+_stores: dict[Path, CassetteStore] = {}
+
+
+def llm_http_client(timeout: float) -> httpx.AsyncClient:
+    """
+    The HTTP client for a provider's LLM call. With LLM_CASSETTE=record or
+    replay, its requests go through the cassette store in LLM_CASSETTE_DIR.
+    """
+    mode = get_env_cassette_mode()
+    if mode == "off":
+        return httpx.AsyncClient(timeout=timeout)
+    directory = get_env_cassette_dir()
+    store = _stores.get(directory)
+    if store is None:
+        store = _stores[directory] = CassetteStore(directory)
+        logger.info("LLM cassette %s at %s", mode, directory)
+    return httpx.AsyncClient(timeout=timeout, transport=CassetteTransport(store, mode))
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from collections import Counter
+from statistics import median
+from typing import TYPE_CHECKING, Optional
+
+from app.models.scoring.requests import ModelTier, ScoringRequest
+from app.models.scoring.responses import (
+    CategoryResult, CategorySpread, EnsembleReport, LLMUsage, PrecheckResult, ScoringResponse,
+)
+from app.services.llm_services.llm_base_service import combine_usage, sampling_scope
+from app.services.llm_services.provider_registry import get_service_class
+
+if TYPE_CHECKING:
+    from app.services.llm_services.llm_base_service import LLMBaseService
+
+
+logger = logging.getLogger(__name__)
+
+# (category, band min, band max) for every category: two samples agree when these match
+Bands = tuple[tuple[str, int, int], ...]
+
+
+def _bands(response: ScoringResponse) -> Bands:
+    return tuple(sorted(
+        (c.category_name, c.band_decision.min_score, c.band_decision.max_score) for c in response.category_results
+    ))
+
+
+def aggregate(samples: list[ScoringResponse]) -> ScoringResponse:
+    """
+    Majority band and median raw_score (among the samples that picked that
+    band) per category. The rationale comes from the sample nearest the
+    median; penalties and feedback from the sample that agrees with the most
+    aggregated bands.
+    """
+    by_category: dict[str, list[CategoryResult]] = {}
+    for response in samples:
+        for result in response.category_results:
+            by_category.setdefault(result.category_name, []).append(result)
+
+    category_results: list[CategoryResult] = []
+    for results in by_category.values():
+        # Ties go to the band that arrived first
+        votes = Counter((r.band_decision.min_score, r.band_decision.max_score) for r in results)
+        band = votes.most_common(1)[0][0]
+        chosen = [r for r in results if (r.band_decision.min_score, r.band_decision.max_score) == band]
+        score = median(r.raw_score for r in chosen)
+        nearest = min(chosen, key=lambda r: abs(r.raw_score - score))
+        category_results.append(nearest.model_copy(update={"raw_score": score}))
+
+    consensus = {(c.category_name, c.band_decision.min_score, c.band_decision.max_score) for c in category_results}
+    representative = max(samples, key=lambda r: len(consensus.intersection(_bands(r))))
+    total = sum(c.raw_score * c.weight for c in category_results) + sum(p.points for p in representative.penalties_applied)
+    # Same clamp and rounding as a single scoring
+    return representative.model_copy(update={
+        "category_results": category_results,
+        "total_score": round(max(0.0, min(10.0, total)), 2),
+    })
+
+
+def _report(samples: list[ScoringResponse], result: ScoringResponse, failed: int, cancelled: int) -> EnsembleReport:
+    spreads = []
+    for category in result.category_results:
+        results = [r for s in samples for r in s.category_results if r.category_name == category.category_name]
+        spreads.append(CategorySpread(
+            category_name=category.category_name,
+            min_score=min(r.raw_score for r in results),
+            max_score=max(r.raw_score for r in results),
+            bands=len({(r.band_decision.min_score, r.band_decision.max_score) for r in results}),
+        ))
+    consensus = _bands(result)
+    return EnsembleReport(
+        samples=len(samples),
+        failed=failed,
+        cancelled=cancelled,
+        agreeing=sum(1 for s in samples if _bands(s) == consensus),
+        total_score_min=min(s.total_score for s in samples),
+        total_score_max=max(s.total_score for s in samples),
+        categories=spreads,
+    )
+
+
+def _usage_by_model(samples: list[ScoringResponse]) -> list[LLMUsage]:
+    """Usage of the kept samples added up per model, in the order the models first answered."""
+    by_model: dict[Optional[str], list[LLMUsage]] = {}
+    for response in samples:
+        if response.usage is not None:
+            by_model.setdefault(response.usage.model, []).append(response.usage)
+    return [combine_usage(usages, model) for model, usages in by_model.items()]
+
+
+async def generate_ensemble(
+    first: "LLMBaseService", request: ScoringRequest, precheck: Optional[PrecheckResult]
+) -> ScoringResponse:
+    """
+    Score `request.ensemble.samples` samples concurrently, rotating over the
+    request's own model and `ensemble.models`, each at `ensemble.temperature`
+    with its own seed. As soon as `quorum` samples agree on every band the
+    rest are cancelled, which closes their LLM connections. A sample that
+    fails is left out; only if all fail is the first error raised.
+    """
+    settings = request.ensemble
+    members = [ModelTier(llm_provider=request.llm_provider, model=request.model), *settings.models]
+    quorum = min(settings.quorum or settings.samples // 2 + 1, settings.samples)
+
+    async def sample(index: int) -> ScoringResponse:
+        member = members[index % len(members)]
+        if member.llm_provider == first.provider:
+            service = first
+        else:
+            service_cls = get_service_class(member.llm_provider)
+            if service_cls is None:
+                raise ValueError(f"Unsupported provider in ensemble: {member.llm_provider.value}")
+            service = service_cls()
+        member_request = request.model_copy(update={"llm_provider": member.llm_provider, "model": member.model, "ensemble": None})
+        # Samples of the same model differ only by their seed, which also gives each its own cache entry
+        with sampling_scope(settings.temperature, seed=index):
+            return await service.generate_from_llm(member_request, precheck)
+
+    pending = {asyncio.create_task(sample(i)) for i in range(settings.samples)}
+    samples: list[ScoringResponse] = []
+    errors: list[BaseException] = []
+    votes: Counter[Bands] = Counter()
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is not None:
+                    logger.warning("Ensemble sample failed; student_id=%s: %s", request.student_id, error)
+                    errors.append(error)
+                    continue
+                response = task.result()
+                samples.append(response)
+                votes[_bands(response)] += 1
+            if votes and max(votes.values()) >= quorum:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if not samples:
+        raise errors[0]
+    result = aggregate(samples)
+    result.ensemble = _report(samples, result, failed=len(errors), cancelled=len(pending))
+    per_model = _usage_by_model(samples)
+    result.ensemble.usage = per_model
+    result.usage = combine_usage(per_model, ", ".join(u.model for u in per_model if u.model) or request.model or first.model)
+    logger.debug("Ensemble: student_id=%s, samples=%d, agreeing=%d, cancelled=%d",
+                 request.student_id, len(samples), result.ensemble.agreeing, len(pending))
+    return result
@@ -1,21 +1,37 @@
+import asyncio
 import logging
-import httpx
-from typing import Any
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional
 from app.models.scoring.rubric import Rubric
-from app.models.scoring.responses import CategoryBandDecision, CategoryResult, LLMScoringPayload, ScoringResponse, PenaltyApplied
+from app.models.scoring.responses import CategoryBandDecision, CategoryResult, LLMScoringPayload, LLMUsage, PrecheckResult, RegradeReport, ScoringResponse, PenaltyApplied
 from app.models.scoring.requests import ScoringRequest
 from app.models.common.llm_provider import LLMProvider
-from app.models.batch_scoring.responses import BatchScoringResponse
-from app.models.batch_scoring.requests import BatchScoringRequest
+from app.models.batch_scoring.responses import BatchScoringError
+from app.core import deadline
+from app.core.cpu_executor import run_cpu_bound
+from app.core.log_utils import debug_enabled, mask_secret
+from app.services.llm_services import result_cache
+from app.services.llm_services.rate_limit import acquire_call_slot
+from app.services.llm_services.scheduler import current_tenant, get_scheduler
+from app.services.precheck.sandbox import describe_precheck, precheck_submission
+from app.services import history
+from app.services.rescoring import payload_store
+from app.services.rescoring.regrade import changed_rubric, merge_payloads
 from abc import ABC, abstractmethod
 from os import environ
 import re
 import json
-from dotenv import load_dotenv
-load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Characters that can change the state of the balanced-brace scanner
+_BALANCE_TOKENS = re.compile(r"[{}\"'\\]")
+
+# (temperature, seed) of the ensemble sample the current task scores; None outside ensembles
+_sample_sampling: ContextVar[Optional[tuple[float, int]]] = ContextVar("llm_sample_sampling", default=None)
+
 
 LLM_PROVIDER_URLS: dict[LLMProvider, tuple[str, str]] = {
     LLMProvider.OPENAI:   ("OPENAI_URL",   "https://api.openai.com/v1/chat/completions"),
@@ -45,6 +61,35 @@ LLM_PROVIDER_MODELS: dict[LLMProvider, str] = {
 }
 
 
+def combine_usage(usages: Iterable[Optional[LLMUsage]], model: Optional[str]) -> Optional[LLMUsage]:
+    """Calls and tokens of several LLM results added up; token counts only over the results that report them."""
+    known = [u for u in usages if u is not None]
+    if not known:
+        return None
+    prompt = [u.prompt_tokens for u in known if u.prompt_tokens is not None]
+    completion = [u.completion_tokens for u in known if u.completion_tokens is not None]
+    return LLMUsage(
+        model=model,
+        calls=sum(u.calls for u in known),
+        prompt_tokens=sum(prompt) if prompt else None,
+        completion_tokens=sum(completion) if completion else None,
+    )
+
+
+@contextmanager
+def sampling_scope(temperature: float, seed: int) -> Iterator[None]:
+    """Send the LLM calls made inside the block with this temperature and seed instead of TEMPERATURE."""
+    token = _sample_sampling.set((temperature, seed))
+    try:
+        yield
+    finally:
+        _sample_sampling.reset(token)
+
+
+def batch_error(index: int, request: ScoringRequest, error: BaseException) -> BatchScoringError:
+    return BatchScoringError(index=index, student_id=request.student_id, detail=str(error) or type(error).__name__)
+
+
 class LLMBaseService(ABC):
     @property
     @abstractmethod
@@ -53,7 +98,14 @@ class LLMBaseService(ABC):
 
     @property
     def temperature(self) -> float:
-        return float(environ.get("TEMPERATURE", 0.0))
+        sampling = _sample_sampling.get()
+        return sampling[0] if sampling else float(environ.get("TEMPERATURE", 0.0))
+
+    @property
+    def seed(self) -> Optional[int]:
+        """Seed of the current ensemble sample; None (the provider's choice) otherwise."""
+        sampling = _sample_sampling.get()
+        return sampling[1] if sampling else None
 
     @property
     def top_p(self) -> float:
@@ -75,6 +127,15 @@ class LLMBaseService(ABC):
     def max_retries(self) -> int:
         return int(environ.get("MAX_RETRIES", 3))
 
+    @property
+    def stream_responses(self) -> bool:
+        # Local runtimes stream tokens, so dropping the connection stops generation server-side
+        return environ.get("LLM_STREAM", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+    @property
+    def max_concurrency(self) -> int:
+        return max(1, int(environ.get("MAX_CONCURRENCY", 4)))
+
     @property
     def base_url(self) -> str:
         try:
@@ -100,12 +161,10 @@ class LLMBaseService(ABC):
             raise NotImplementedError(f"Unsupported provider: {self.provider}")
         logger.debug("Resolving api_key for provider=%s", self.provider)
         api_key = environ.get(env_key)
-        masked = None
-        if api_key:
-            masked = (f"{api_key[:3]}...{api_key[-3:]}" if len(api_key) > 6 else "***")
-        else:
+        if not api_key:
             logger.warning("No API key found for provider=%s", self.provider)
-        logger.debug("Resolved API key using env var %s; present=%s; masked=%s", env_key, api_key is not None, masked)
+        if debug_enabled(logger):
+            logger.debug("Resolved API key using env var %s; present=%s; masked=%s", env_key, api_key is not None, mask_secret(api_key) if api_key else None)
         return api_key
 
     @property
@@ -123,13 +182,197 @@ class LLMBaseService(ABC):
     def prompt_name(self) -> str:
         return environ.get("PROMPT_NAME", "scoring_prompt.yml")
 
-    @abstractmethod
-    def generate_response(self, request: ScoringRequest) -> ScoringResponse:
-        raise NotImplementedError
+    @property
+    def rule_score_compile_errors(self) -> bool:
+        return environ.get("PRECHECK_RULE_COMPILE_ERRORS", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+    async def warm_up(self, model: str) -> None:
+        """Load `model` on the provider ahead of real traffic; hosted APIs have nothing to load."""
+        return None
+
+    async def is_resident(self, model: str) -> bool:
+        """Whether `model` is currently loaded in memory; always true for hosted APIs."""
+        return True
+
+    async def generate_response(self, request: ScoringRequest) -> ScoringResponse:
+        logger.debug("generate_response: start for provider=%s", self.provider)
+        started = time.perf_counter()
+        response = await self._score_request(request)
+        # Kept with the rubric hash, so weight and penalty edits can be re-scored without the LLM
+        response.payload_id = await payload_store.save(request, response)
+        # And in the grading history, so past results can be looked up without asking the LLM again
+        history.record(request, response, request.tenant or current_tenant(), time.perf_counter() - started)
+        return response
+
+    async def _score_request(self, request: ScoringRequest) -> ScoringResponse:
+        precheck = await precheck_submission(request) if request.precheck else None
+        if precheck is not None and self._is_rule_decided(precheck):
+            logger.info("Scored by rule without LLM; precheck status=%s, student_id=%s", precheck.status, request.student_id)
+            return self._build_rule_based_response(request, precheck)
+
+        if request.regrade_from:
+            return await self._regrade(request, precheck)
+        return await self.score_with_llm(request, precheck)
+
+    async def score_with_llm(self, request: ScoringRequest, precheck: PrecheckResult | None = None) -> ScoringResponse:
+        """Score with the request's ensemble, escalation cascade or single model."""
+        if request.ensemble is not None:
+            if request.escalation:
+                raise ValueError("escalation and ensemble cannot be combined")
+            # Imported here: ensemble members may use other providers, resolved through the registry
+            from app.services.llm_services.ensemble import generate_ensemble
+
+            return await generate_ensemble(self, request, precheck)
+        if request.escalation:
+            # Imported here: cascade resolves escalation tiers through the provider registry
+            from app.services.llm_services.cascade import generate_with_cascade
+
+            return await generate_with_cascade(self, request, precheck)
+        return await self.generate_from_llm(request, precheck)
+
+    async def _regrade(self, request: ScoringRequest, precheck: PrecheckResult | None) -> ScoringResponse:
+        """Re-ask only the rubric parts changed since the result `regrade_from` names; reuse the rest."""
+        record = await payload_store.load(request.regrade_from)
+        if record is None:
+            logger.info("No stored payload %s to regrade from; scoring in full", request.regrade_from)
+            return await self.score_with_llm(request, precheck)
+        mismatch = payload_store.mismatch(record, request)
+        if mismatch is not None:
+            # Stale scores of other code are never reused
+            logger.info("Stored payload %s does not match student_id=%s (%s); scoring in full",
+                        request.regrade_from, request.student_id, mismatch)
+            return await self.score_with_llm(request, precheck)
+
+        changed = changed_rubric(request.rubric, record)
+        fresh = LLMScoringPayload(category_results=[])
+        provider_used = record.provider_used
+        usage = LLMUsage(calls=0, prompt_tokens=0, completion_tokens=0)
+        if changed.categories or changed.penalties:
+            # The usual prompt over the changed part of the rubric only
+            partial = await self.score_with_llm(request.model_copy(update={"rubric": changed, "regrade_from": None}), precheck)
+            fresh = payload_store.payload_of(partial)
+            provider_used = partial.provider_used
+            usage = partial.usage
+        merged = merge_payloads(request.rubric, changed, record.payload, fresh)
+        category_results, total_score = self._score_results(request, merged)
+
+        response = self._build_scoring_response(merged, category_results, total_score, student_id=request.student_id)
+        changed_names = {c.name for c in changed.categories}
+        response.provider_used = provider_used
+        response.precheck = precheck
+        response.usage = usage
+        response.regrade = RegradeReport(
+            from_payload_id=request.regrade_from,
+            categories=[c.name for c in changed.categories],
+            penalties=[p.code for p in changed.penalties],
+            reused=[c.category_name for c in category_results if c.category_name not in changed_names],
+        )
+        logger.debug("Regraded student_id=%s: categories=%s, penalties=%s",
+                     request.student_id, response.regrade.categories, response.regrade.penalties)
+        return response
 
-    @abstractmethod
-    def generate_batch_response(self, request: BatchScoringRequest) -> BatchScoringResponse:
-        raise NotImplementedError
+    async def generate_from_llm(
+        self, request: ScoringRequest, precheck: PrecheckResult | None = None
+    ) -> ScoringResponse:
+        """
+        Score `request` with its own model; `precheck` holds local compile/test results already gathered.
+        Inside a sampling_scope() the call uses that temperature and seed, and gets its own cached answer.
+        """
+        self._validate_request(request)
+        logger.debug("Request validation passed")
+
+        prompt = await self._build_prompt_async(request, precheck)
+        logger.debug("Built prompt; length=%d chars", len(prompt))
+
+        # Workers share LLM answers: an identical prompt is answered from the cache,
+        # or waits for the worker already calling the LLM with it
+        sampling = self._sampling_settings()
+        key = result_cache.cache_key(self.provider.value, request.model, prompt, sampling)
+        left = deadline.remaining()
+        wait = self.api_timeout if left is None else max(0.0, min(self.api_timeout, left))
+        raw_response, claimed = await result_cache.lookup(key, wait=wait)
+        usage = LLMUsage(model=request.model or self.model, calls=0, prompt_tokens=0, completion_tokens=0)
+        try:
+            if raw_response is None:
+                # Cancelling the call closes its connection, which aborts generation on local runtimes
+                result = await deadline.within_deadline(self._dispatch_llm_call(prompt, request.model, request.tenant))
+
+                # Extract text from response
+                raw_response = self._extract_raw_text(result)
+                usage.calls = 1
+                usage.prompt_tokens, usage.completion_tokens = self._extract_usage(result)
+                logger.debug("Extracted raw LLM response; length=%d", len(raw_response) if raw_response else 0)
+                response = await self._process_llm_output_async(request, raw_response)
+                # Only answers that parsed and validated are worth sharing
+                await result_cache.store(key, raw_response)
+            else:
+                logger.debug("Result cache hit; key=%s", key[:12])
+                response = await self._process_llm_output_async(request, raw_response)
+        finally:
+            if claimed:
+                await result_cache.release(key)
+
+        response.precheck = precheck
+        response.usage = usage
+        return response
+
+    async def _dispatch_llm_call(self, prompt: str, model: str, tenant: Optional[str] = None) -> dict[str, Any]:
+        # Every call queues for a provider slot by priority class and tenant, so /score is not
+        # stuck behind batches and one course's batch cannot monopolize the provider
+        async with get_scheduler(self.provider).slot(tenant=tenant):
+            await acquire_call_slot(self.provider)
+            return await self._call_llm_api(prompt, model)
+
+    def _sampling_settings(self) -> dict[str, Any]:
+        settings = {
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "top_k": self.top_k,
+            "max_output_tokens": self.max_output_tokens,
+        }
+        if self.seed is not None:
+            settings["seed"] = self.seed
+        return settings
+
+    async def iter_batch_responses(
+        self, submissions: list[ScoringRequest]
+    ) -> AsyncIterator[tuple[int, ScoringResponse | Exception]]:
+        """
+        Yield (index, response or exception) for each submission in completion order.
+
+        A fixed pool of `max_concurrency` workers pulls submissions, and the hand-off
+        queue is bounded, so a slow consumer (e.g. a streaming export) holds back
+        scoring instead of letting finished results pile up in memory.
+        """
+        if not submissions:
+            return
+        queue: asyncio.Queue[tuple[int, ScoringResponse | Exception]] = asyncio.Queue(maxsize=self.max_concurrency)
+        pending = iter(enumerate(submissions))
+
+        async def worker() -> None:
+            for index, scoring_request in pending:
+                try:
+                    if deadline.expired():
+                        # Remaining items are reported as errors instead of starting LLM calls nobody waits for
+                        raise deadline.DeadlineExceeded("Request deadline exceeded before this submission was scored")
+                    outcome: ScoringResponse | Exception = await self.generate_response(scoring_request)
+                except deadline.DeadlineExceeded as e:
+                    logger.info("Batch item %d (student_id=%s) cut off by the request deadline", index, scoring_request.student_id)
+                    outcome = e
+                except Exception as e:
+                    # Log error and continue with remaining requests
+                    logger.error("Error processing batch item %d (student_id=%s): %s", index, scoring_request.student_id, e)
+                    outcome = e
+                await queue.put((index, outcome))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.max_concurrency, len(submissions)))]
+        try:
+            for _ in range(len(submissions)):
+                yield await queue.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
 
     def _validate_request(self, request: ScoringRequest) -> None:
         logger.debug("Validating scoring request")
@@ -147,7 +390,7 @@ class LLMBaseService(ABC):
             raise ValueError("Rubric is required")
         logger.debug("Scoring request validation passed")
 
-    def _build_prompt(self, request: ScoringRequest) -> str:
+    def _build_prompt(self, request: ScoringRequest, facts: str | None = None) -> str:
         prompt_template = self._load_prompt_template()
         logger.debug("Building prompt using template=%s", self.prompt_name)
 
@@ -160,9 +403,20 @@ class LLMBaseService(ABC):
             .replace("{student_code}", request.student_code)
             .replace("{language}", request.language)
         )
+        if facts:
+            content = self._insert_facts(content, facts)
         logger.debug("Built prompt; length=%d chars", len(content))
         return content
 
+    def _insert_facts(self, prompt: str, facts: str) -> str:
+        """Add locally verified facts (compile/test results) right before the JSON response section."""
+        section = f"=== Automated Checks (verified locally, treat as facts) ===\n{facts}\n\n"
+        marker = "=== JSON Response ==="
+        index = prompt.find(marker)
+        if index == -1:
+            return prompt + "\n" + section
+        return prompt[:index] + section + prompt[index:]
+
     def _load_prompt_template(self) -> str:
         path = f"app/prompts/{self.prompt_name}"
         logger.debug("Loading prompt template from %s", path)
@@ -278,14 +532,17 @@ class LLMBaseService(ABC):
         logger.debug("Extracting balanced JSON substring; input length=%d", len(obj_text) if obj_text else 0)
         depth = 0
         in_str = False
-        esc = False
         quote = ""
-        for i, ch in enumerate(obj_text):
+        escaped_at = -1
+        # Only visit braces, quotes and backslashes; everything else cannot change state
+        for match in _BALANCE_TOKENS.finditer(obj_text):
+            i = match.start()
+            if i == escaped_at:
+                continue
+            ch = obj_text[i]
             if in_str:
-                if esc:
-                    esc = False
-                elif ch == "\\":
-                    esc = True
+                if ch == "\\":
+                    escaped_at = i + 1
                 elif ch == quote:
                     in_str = False
             else:
@@ -302,10 +559,70 @@ class LLMBaseService(ABC):
                         return result
         return obj_text
 
+    def _process_llm_output(self, request: ScoringRequest, raw_response: str) -> ScoringResponse:
+        """Parse, validate and score raw LLM text. Pure CPU work, safe to run in an executor."""
+        llm_payload = self._parse_llm_response(raw_response)
+        logger.debug(
+            "Parsed LLM payload; categories=%d, penalties=%d",
+            len(llm_payload.category_results or []),
+            len(llm_payload.penalties_applied or []),
+        )
+
+        # Calculate weighted scores and total
+        category_results, total_score = self._score_results(request, llm_payload)
+
+        return self._build_scoring_response(
+            llm_payload=llm_payload,
+            category_results=category_results,
+            total_score=total_score,
+            student_id=request.student_id,
+        )
+
+    async def _build_prompt_async(self, request: ScoringRequest, precheck: PrecheckResult | None = None) -> str:
+        size = len(request.student_code or "") + len(request.problem_description or "")
+        facts = describe_precheck(precheck) if precheck is not None else None
+        return await run_cpu_bound(self._build_prompt, request, facts, size=size)
+
+    async def _process_llm_output_async(self, request: ScoringRequest, raw_response: str) -> ScoringResponse:
+        return await run_cpu_bound(self._process_llm_output, request, raw_response, size=len(raw_response or ""))
+
+    def _is_rule_decided(self, precheck: PrecheckResult) -> bool:
+        if precheck.status == "empty":
+            return True
+        return precheck.status == "compile_error" and self.rule_score_compile_errors
+
+    def _build_rule_based_response(self, request: ScoringRequest, precheck: PrecheckResult) -> ScoringResponse:
+        """Give every category its lowest band without calling the LLM (empty or non-compiling code)."""
+        reason = "Submission is empty." if precheck.status == "empty" else "Submission does not compile."
+        category_results = []
+        for category in request.rubric.categories:
+            band = min(category.bands, key=lambda b: b.min_score) if category.bands else None
+            category_results.append(CategoryResult(
+                category_name=category.name,
+                raw_score=band.min_score if band else 0,
+                weight=category.weight,
+                band_decision=CategoryBandDecision(
+                    min_score=band.min_score if band else 0,
+                    max_score=band.max_score if band else 0,
+                    description=band.description if band else "",
+                    rationale=f"Scored by rule: {reason}",
+                ),
+            ))
+        total_score = sum(c.raw_score * c.weight for c in category_results)
+        feedback = reason if not precheck.compile_output else f"{reason}\n{precheck.compile_output}"
+        return ScoringResponse(
+            category_results=category_results,
+            provider_used=self.provider,
+            feedback=feedback,
+            total_score=self._clamp_score(total_score),
+            student_id=request.student_id,
+            precheck=precheck,
+        )
+
     def _build_headers(self) -> dict[str, str]:
         api_key = self.api_key
-        masked = (f"{api_key[:3]}...{api_key[-3:]}" if api_key and len(api_key) > 6 else "***")
-        logger.debug("Building headers; api_key_present=%s masked=%s", bool(api_key), masked)
+        if debug_enabled(logger):
+            logger.debug("Building headers; api_key_present=%s masked=%s", bool(api_key), mask_secret(api_key))
         return {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}",
@@ -320,27 +637,35 @@ class LLMBaseService(ABC):
     def _extract_raw_text(self, result: dict[str, Any]) -> str:
         raise NotImplementedError("Subclasses must implement this method")
 
+    def _extract_usage(self, result: dict[str, Any]) -> tuple[Optional[int], Optional[int]]:
+        """(prompt, completion) tokens a provider reports, or None where it reports none (e.g. OpenAI-style streams)."""
+        usage = result.get("usage")
+        if isinstance(usage, dict):
+            # OpenAI-compatible APIs and LM Studio
+            return usage.get("prompt_tokens"), usage.get("completion_tokens")
+        metadata = result.get("usageMetadata")
+        if isinstance(metadata, dict):
+            # Gemini
+            return metadata.get("promptTokenCount"), metadata.get("candidatesTokenCount")
+        # Ollama reports counts on its final (or only) message
+        return result.get("prompt_eval_count"), result.get("eval_count")
+
     def _score_results(self, request: ScoringRequest, llm_payload: LLMScoringPayload) -> tuple[list[CategoryResult], float]:
         total_score = 0.0
         category_results: list[CategoryResult] = []
+        weights = {c.name: c.weight for c in request.rubric.categories}
 
         for llm_category in llm_payload.category_results:
-            category_weight = next(
-                (c.weight for c in request.rubric.categories if c.name == llm_category.category_name),
-                1.0,
-            )
+            category_weight = weights.get(llm_category.category_name, 1.0)
             logger.debug("Scoring category '%s': raw=%s, weight=%s", llm_category.category_name, llm_category.raw_score, category_weight)
 
+            # The band decision was validated with the payload and is shared, not copied;
+            # an already-built model passes through the constructor's check untouched
             category = CategoryResult(
                 category_name=llm_category.category_name,
                 raw_score=llm_category.raw_score,
                 weight=category_weight,
-                band_decision=CategoryBandDecision(
-                    min_score=llm_category.band_decision.min_score,
-                    max_score=llm_category.band_decision.max_score,
-                    description=llm_category.band_decision.description,
-                    rationale=llm_category.band_decision.rationale,
-                ),
+                band_decision=llm_category.band_decision,
             )
             category_results.append(category)
             total_score += llm_category.raw_score * category_weight
@@ -352,10 +677,8 @@ class LLMBaseService(ABC):
         return category_results, total_score
 
     def _map_penalties(self, llm_payload: LLMScoringPayload) -> list[PenaltyApplied]:
-        return [
-            PenaltyApplied(code=p.code, points=p.points, reason=getattr(p, "reason", None))
-            for p in (llm_payload.penalties_applied or [])
-        ]
+        # Already PenaltyApplied instances, validated with the payload
+        return list(llm_payload.penalties_applied or [])
 
     def _clamp_score(self, score: float, minimum: float = 0.0, maximum: float = 10.0, precision: int = 2) -> float:
         return round(max(minimum, min(maximum, score)), precision)
@@ -365,6 +688,7 @@ class LLMBaseService(ABC):
         llm_payload: LLMScoringPayload,
         category_results: list[CategoryResult],
         total_score: float,
+        student_id: str | None = None,
     ) -> ScoringResponse:
         logger.debug("Total score before clamp=%s, final=%s", total_score, self._clamp_score(total_score))
         return ScoringResponse(
@@ -373,5 +697,6 @@ class LLMBaseService(ABC):
             provider_used=self.provider,
             feedback=llm_payload.feedback,
             total_score=self._clamp_score(total_score),
+            student_id=student_id,
         )
 
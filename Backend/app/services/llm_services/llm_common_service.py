@@ -1,17 +1,117 @@
+import asyncio
+import logging
+import uuid
+from typing import AsyncIterator, Optional
+
+from app.models.batch_scoring.requests import BatchScoringRequest
+from app.models.batch_scoring.responses import BatchScoringError, BatchScoringResponse
+from app.core.cpu_executor import run_cpu_bound
 from app.models.common.llm_provider import LLMProvider
-from app.services.llm_services.gemini_service import GeminiService
-from app.services.llm_services.llm_base_service import LLMBaseService
-from app.services.llm_services.lmstudio_service import LMStudioService
-from app.services.llm_services.ollama_service import OllamaService
+from app.models.scoring.responses import LLMUsage, ScoringResponse
+from app.services import history
+from app.services.llm_services.llm_base_service import LLMBaseService, batch_error
+from app.services.llm_services.model_warmup import batch_in_progress
+from app.services.llm_services.provider_registry import get_service_class
+from app.services.llm_services.scheduler import current_tenant, priority_scope, tenant_scope
+
+
+logger = logging.getLogger(__name__)
 
 
 class LLMCommonService:
     @staticmethod
     def get_llm_service(provider: LLMProvider) -> LLMBaseService:
-        if provider == LLMProvider.GEMINI:
-            return GeminiService()
-        if provider == LLMProvider.LMSTUDIO:
-            return LMStudioService()
-        if provider == LLMProvider.OLLAMA:
-            return OllamaService()
-        return None
+        service_cls = get_service_class(provider)
+        return service_cls() if service_cls is not None else None
+
+    @staticmethod
+    async def iter_batch(
+        request: BatchScoringRequest, batch_id: Optional[str] = None
+    ) -> AsyncIterator[tuple[int, ScoringResponse | Exception]]:
+        """
+        Split a batch by provider and yield (index, response or exception) as items complete.
+        Results are recorded in the grading history under `batch_id` (a new id if None).
+        """
+        batch_id = batch_id or uuid.uuid4().hex
+        submissions = request.submissions
+        reuse: dict[int, int] = {}
+        if request.dedupe == "reuse":
+            # Imported here: similarity pulls in numpy, which only dedupe batches need
+            from app.services.similarity.dedupe import plan_reuse
+
+            size = sum(len(s.student_code) for s in submissions)
+            reuse = await run_cpu_bound(plan_reuse, request, size=size)
+            logger.info("Batch dedupe: %d of %d submissions reuse a representative result", len(reuse), len(submissions))
+        copies: dict[int, list[int]] = {}
+        for index, representative in reuse.items():
+            copies.setdefault(representative, []).append(index)
+
+        groups: dict[LLMProvider, list[int]] = {}
+        for index, submission in enumerate(submissions):
+            if index not in reuse:
+                groups.setdefault(submission.llm_provider, []).append(index)
+        if not groups:
+            return
+
+        queue: asyncio.Queue[tuple[int, ScoringResponse | Exception]] = asyncio.Queue(maxsize=len(groups))
+
+        async def emit(index: int, outcome: ScoringResponse | Exception) -> None:
+            await queue.put((index, outcome))
+            for copy in copies.get(index, ()):
+                if isinstance(outcome, ScoringResponse):
+                    update = {"student_id": submissions[copy].student_id, "reused_from": outcome.student_id or str(index)}
+                    if outcome.usage is not None:
+                        # The copy itself cost no LLM call
+                        update["usage"] = LLMUsage(model=outcome.usage.model, calls=0, prompt_tokens=0, completion_tokens=0)
+                    copied = outcome.model_copy(update=update)
+                    history.record(submissions[copy], copied, submissions[copy].tenant or current_tenant())
+                    await queue.put((copy, copied))
+                else:
+                    await queue.put((copy, outcome))
+
+        async def pump(provider: LLMProvider, indexes: list[int]) -> None:
+            sent: set[int] = set()
+            try:
+                service = LLMCommonService.get_llm_service(provider)
+                if service is None:
+                    raise ValueError(f"Unsupported provider: {provider.value}")
+                # Set inside the task, so class, tenant and batch id apply to exactly this batch's calls
+                with priority_scope(request.priority), tenant_scope(request.tenant), history.batch_scope(batch_id):
+                    async for pos, outcome in service.iter_batch_responses([submissions[i] for i in indexes]):
+                        sent.add(indexes[pos])
+                        await emit(indexes[pos], outcome)
+            except Exception as e:
+                for i in indexes:
+                    if i not in sent:
+                        await emit(i, e)
+
+        with batch_in_progress():
+            tasks = [asyncio.create_task(pump(p, idx)) for p, idx in groups.items()]
+            try:
+                for _ in range(len(submissions)):
+                    yield await queue.get()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    async def score_batch(request: BatchScoringRequest) -> BatchScoringResponse:
+        """Score a (possibly mixed-provider) batch and return results in submission order."""
+        scored: dict[int, ScoringResponse] = {}
+        errors: list[BatchScoringError] = []
+        batch_id = uuid.uuid4().hex
+        async for index, outcome in LLMCommonService.iter_batch(request, batch_id):
+            if isinstance(outcome, ScoringResponse):
+                scored[index] = outcome
+            else:
+                errors.append(batch_error(index, request.submissions[index], outcome))
+
+        results = [scored[i] for i in sorted(scored)]
+        logger.debug("Batch scoring complete; total_processed=%d, errors=%d", len(results), len(errors))
+        return BatchScoringResponse(
+            results=results,
+            total_processed=len(results),
+            errors=sorted(errors, key=lambda e: e.index),
+            batch_id=batch_id,
+        )
@@ -1,13 +1,12 @@
+import json
 import logging
 import httpx
 from typing import Any
 
-from app.models.batch_scoring.requests import BatchScoringRequest
-from app.models.batch_scoring.responses import BatchScoringResponse
 from app.models.common.llm_provider import LLMProvider
-from app.models.scoring.requests import ScoringRequest
-from app.models.scoring.responses import ScoringResponse
 from app.services.llm_services.llm_base_service import LLMBaseService
+from app.services.llm_services.cassette import llm_http_client
+from app.core.log_utils import Truncated
 
 
 logger = logging.getLogger(__name__)
@@ -32,55 +31,13 @@ class LMStudioService(LLMBaseService):
         logger.debug("Resolved endpoint URL: %s", url)
         return url
 
-    async def generate_response(self, request: ScoringRequest) -> ScoringResponse:
-        logger.debug("generate_response: start for provider=%s", self.provider)
-        self._validate_request(request)
-        logger.debug("Request validation passed")
-
-        prompt = self._build_prompt(request)
-        logger.debug("Built prompt; length=%d chars", len(prompt))
-
-        result = await self._call_llm_api(prompt, request.model)
-
-        # Extract text from response
-        raw_response = self._extract_raw_text(result)
-        logger.debug("Extracted raw LLM response; length=%d", len(raw_response) if raw_response else 0)
-
-        # Parse LLM response to structured payload
-        llm_payload = self._parse_llm_response(raw_response)
-        logger.debug(
-            "Parsed LLM payload; categories=%d, penalties=%d",
-            len(llm_payload.category_results) if hasattr(llm_payload, "category_results") and llm_payload.category_results is not None else 0,
-            len(llm_payload.penalties_applied) if hasattr(llm_payload, "penalties_applied") and llm_payload.penalties_applied is not None else 0,
-        )
-
-        # Calculate weighted scores and total
-        category_results, total_score = self._score_results(request, llm_payload)
-
-        return self._build_scoring_response(
-            llm_payload=llm_payload,
-            category_results=category_results,
-            total_score=total_score,
-        )
-
-    async def generate_batch_response(self, request: BatchScoringRequest) -> BatchScoringResponse:
-        logger.debug("generate_batch_response: start; request_count=%d", len(request.requests) if hasattr(request, "requests") and request.requests is not None else 0)
-        results = []
-        for scoring_request in request.requests:
-            try:
-                result = await self.generate_response(scoring_request)
-                results.append(result)
-                logger.debug("Processed one request successfully; running_total=%d", len(results))
-            except Exception as e:
-                # Log error and continue with remaining requests
-                logger.error("Error processing request: %s", e)
-                logger.exception("Error processing request")
-
-        logger.debug("Batch processing complete; total_processed=%d", len(results))
-        return BatchScoringResponse(
-            results=results,
-            total_processed=len(results),
-        )
+    @property
+    def api_root(self) -> str:
+        url = self.endpoint_url
+        for marker in ("/api/v0/", "/v1/"):
+            if marker in url:
+                return url.split(marker, 1)[0]
+        return url
 
     def _build_headers(self) -> dict[str, str]:
         # LM Studio local server typically does not require Authorization
@@ -97,10 +54,13 @@ class LMStudioService(LLMBaseService):
             ],
             "temperature": self.temperature,
             "max_tokens": self.max_output_tokens,
-            "stream": False,
+            "stream": self.stream_responses,
         }
-
-        logger.info("Built payload; payload=%s", payload)
+        if payload["stream"]:
+            # Token counts come as a last chunk only when asked for
+            payload["stream_options"] = {"include_usage": True}
+        if self.seed is not None:
+            payload["seed"] = self.seed
         return payload
 
     def _extract_raw_text(self, result: dict[str, Any]) -> str:
@@ -114,7 +74,7 @@ class LMStudioService(LLMBaseService):
         except Exception:
             pass
 
-        logger.exception("Unexpected API response format for LM Studio: %s", result)
+        logger.exception("Unexpected API response format for LM Studio: %s", Truncated(result))
         raise ValueError("Unexpected API response format for LM Studio")
 
     async def _call_llm_api(self, prompt: str, model: str) -> dict[str, Any]:
@@ -124,14 +84,60 @@ class LMStudioService(LLMBaseService):
         
         logger.info("Calling LM Studio API at %s", url)
         logger.debug("Request headers: %s", headers)
-        logger.debug("Request payload: %s", payload)
+        logger.debug("Request payload: %s", Truncated(payload))
         
-        async with httpx.AsyncClient(timeout=self.api_timeout) as client:
-            response = await client.post(url, headers=headers, json=payload)
+        async with llm_http_client(self.api_timeout) as client:
+            if payload["stream"]:
+                result = await self._read_stream(client, url, headers, payload)
+            else:
+                response = await client.post(url, headers=headers, json=payload)
+                response.raise_for_status()
+                result = response.json()
+
+        logger.debug("Received response from LM Studio API")
+        return result
+
+    async def _read_stream(self, client: httpx.AsyncClient, url: str, headers: dict[str, str], payload: dict[str, Any]) -> dict[str, Any]:
+        # Server-sent events; LM Studio aborts the prediction when the stream's connection closes
+        parts: list[str] = []
+        finish_reason = None
+        usage = None
+        async with client.stream("POST", url, headers=headers, json=payload) as response:
             response.raise_for_status()
-            result = response.json()
-            
-        logger.debug("Received response from LM Studio API; status=%d", response.status_code)
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("error"):
+                    raise ValueError(f"LM Studio error: {chunk['error']}")
+                choices = chunk.get("choices") or []
+                if choices:
+                    parts.append((choices[0].get("delta") or {}).get("content") or "")
+                    finish_reason = choices[0].get("finish_reason") or finish_reason
+                usage = chunk.get("usage") or usage
+        # Same shape as a non-streamed reply
+        result = {"choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(parts)}, "finish_reason": finish_reason}]}
+        if usage:
+            result["usage"] = usage
         return result
 
+    async def warm_up(self, model: str) -> None:
+        # LM Studio loads the model on first use (JIT); a one-token completion forces it
+        payload = self._build_payload("ping", model)
+        payload["max_tokens"] = 1
+        payload["stream"] = False
+        async with httpx.AsyncClient(timeout=self.api_timeout) as client:
+            response = await client.post(self.endpoint_url, headers=self._build_headers(), json=payload)
+            response.raise_for_status()
+        logger.debug("LM Studio warm-up done; model=%s", model)
 
+    async def is_resident(self, model: str) -> bool:
+        # The REST API reports state "loaded" / "not-loaded" per model
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.get(self.api_root + "/api/v0/models")
+            response.raise_for_status()
+            models = response.json().get("data") or []
+        return any(m.get("id") == model and m.get("state") == "loaded" for m in models)
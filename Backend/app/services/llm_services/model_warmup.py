@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from os import environ
+from typing import Iterator, Optional
+
+from app.models.common.llm_provider import LLMProvider
+from app.services.llm_services.llm_base_service import LLMBaseService
+from app.services.llm_services.provider_registry import get_service_class
+
+
+logger = logging.getLogger(__name__)
+
+# Local providers whose first request would otherwise pay the model-load time
+_WARMUP_PROVIDERS = (LLMProvider.OLLAMA, LLMProvider.LMSTUDIO)
+
+_status: dict[str, str] = {}
+_targets: list[tuple[LLMBaseService, str]] = []
+_warmed = asyncio.Event()
+_tasks: list[asyncio.Task] = []
+_rewarm: Optional[asyncio.Task] = None
+_active_batches = 0
+
+
+def get_env_warmup_enabled() -> bool:
+    return environ.get("MODEL_WARMUP", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def get_env_keep_warm_interval() -> float:
+    """Seconds between keep-warm pings while batches are running (0 disables pings)."""
+    try:
+        return max(0.0, float(environ.get("MODEL_KEEP_WARM_INTERVAL", 240)))
+    except ValueError:
+        return 240.0
+
+
+def _label(service: LLMBaseService, model: str) -> str:
+    return f"{service.provider.value}:{model}"
+
+
+def _configured_targets() -> list[tuple[LLMBaseService, str]]:
+    """(service, model) pairs for every local provider with a model set in the environment."""
+    targets = []
+    for provider in _WARMUP_PROVIDERS:
+        service = get_service_class(provider)()
+        if service.model:
+            targets.append((service, service.model))
+    return targets
+
+
+async def _warm(service: LLMBaseService, model: str) -> None:
+    label = _label(service, model)
+    _status[label] = "loading"
+    try:
+        await service.warm_up(model)
+        _status[label] = "resident"
+        logger.info("Model warmed up: %s", label)
+    except Exception as err:
+        _status[label] = "failed"
+        logger.warning("Model warm-up failed for %s: %s", label, err)
+
+
+async def _warm_many(targets: list[tuple[LLMBaseService, str]]) -> None:
+    await asyncio.gather(*(_warm(service, model) for service, model in targets))
+
+
+async def _warm_all() -> None:
+    started = asyncio.get_running_loop().time()
+    await _warm_many(_targets)
+    _warmed.set()
+    logger.info("Model warm-up finished in %.1fs; status=%s", asyncio.get_running_loop().time() - started, _status)
+
+
+async def _keep_warm_loop(interval: float) -> None:
+    """Ping local models while batches are queued so Ollama/LM Studio do not unload them mid-batch."""
+    while True:
+        await asyncio.sleep(interval)
+        if _active_batches > 0:
+            logger.debug("Keep-warm ping; active_batches=%d", _active_batches)
+            await _warm_many(_targets)
+
+
+def start_model_warmup() -> None:
+    """Start warming the configured local models in the background (call from the app lifespan)."""
+    global _targets
+    if not get_env_warmup_enabled():
+        logger.info("Model warm-up disabled (MODEL_WARMUP=false)")
+        _targets = []
+        _warmed.set()
+        return
+    _targets = _configured_targets()
+    if not _targets:
+        _warmed.set()
+        return
+    _warmed.clear()
+    _tasks.append(asyncio.create_task(_warm_all()))
+    interval = get_env_keep_warm_interval()
+    if interval > 0:
+        _tasks.append(asyncio.create_task(_keep_warm_loop(interval)))
+
+
+async def stop_model_warmup() -> None:
+    global _rewarm
+    tasks = _tasks + ([_rewarm] if _rewarm else [])
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _tasks.clear()
+    _rewarm = None
+
+
+@contextmanager
+def batch_in_progress() -> Iterator[None]:
+    """Mark a batch as queued/running so the keep-warm loop pings the local models."""
+    global _active_batches
+    _active_batches += 1
+    try:
+        yield
+    finally:
+        _active_batches -= 1
+
+
+async def readiness() -> tuple[bool, dict[str, str]]:
+    """
+    (ready, per-model state). Ready once the warm-up has finished and every
+    configured local model is loaded; an evicted model triggers a background re-warm.
+    """
+    global _rewarm
+    if not _warmed.is_set():
+        return False, dict(_status)
+
+    async def check(service: LLMBaseService, model: str) -> tuple[LLMBaseService, str, str]:
+        try:
+            state = "resident" if await service.is_resident(model) else "not_loaded"
+        except Exception as err:
+            logger.debug("Residency check failed for %s: %s", _label(service, model), err)
+            state = "unreachable"
+        return service, model, state
+
+    results = await asyncio.gather(*(check(service, model) for service, model in _targets))
+    states = {_label(service, model): state for service, model, state in results}
+    missing = [(service, model) for service, model, state in results if state == "not_loaded"]
+    if missing and (_rewarm is None or _rewarm.done()):
+        logger.info("Models no longer resident, warming again: %s", [_label(s, m) for s, m in missing])
+        _rewarm = asyncio.create_task(_warm_many(missing))
+    return all(state == "resident" for state in states.values()), states
@@ -1,13 +1,13 @@
+import json
 import logging
 import httpx
+from os import environ
 from typing import Any
 
-from app.models.batch_scoring.requests import BatchScoringRequest
-from app.models.batch_scoring.responses import BatchScoringResponse
 from app.models.common.llm_provider import LLMProvider
-from app.models.scoring.requests import ScoringRequest
-from app.models.scoring.responses import ScoringResponse
 from app.services.llm_services.llm_base_service import LLMBaseService
+from app.services.llm_services.cassette import llm_http_client
+from app.core.log_utils import Truncated
 
 
 logger = logging.getLogger(__name__)
@@ -32,55 +32,14 @@ class OllamaService(LLMBaseService):
         logger.debug("Resolved endpoint URL: %s", url)
         return url
 
-    async def generate_response(self, request: ScoringRequest) -> ScoringResponse:
-        logger.debug("generate_response: start for provider=%s", self.provider)
-        self._validate_request(request)
-        logger.debug("Request validation passed")
-
-        prompt = self._build_prompt(request)
-        logger.debug("Built prompt; length=%d chars", len(prompt))
-
-        result = await self._call_llm_api(prompt, request.model)
-
-        # Extract text from response
-        raw_response = self._extract_raw_text(result)
-        logger.debug("Extracted raw LLM response; length=%d", len(raw_response) if raw_response else 0)
-
-        # Parse LLM response to structured payload
-        llm_payload = self._parse_llm_response(raw_response)
-        logger.debug(
-            "Parsed LLM payload; categories=%d, penalties=%d",
-            len(llm_payload.category_results) if hasattr(llm_payload, "category_results") and llm_payload.category_results is not None else 0,
-            len(llm_payload.penalties_applied) if hasattr(llm_payload, "penalties_applied") and llm_payload.penalties_applied is not None else 0,
-        )
-
-        # Calculate weighted scores and total
-        category_results, total_score = self._score_results(request, llm_payload)
-
-        return self._build_scoring_response(
-            llm_payload=llm_payload,
-            category_results=category_results,
-            total_score=total_score,
-        )
-
-    async def generate_batch_response(self, request: BatchScoringRequest) -> BatchScoringResponse:
-        logger.debug("generate_batch_response: start; request_count=%d", len(request.requests) if hasattr(request, "requests") and request.requests is not None else 0)
-        results = []
-        for scoring_request in request.requests:
-            try:
-                result = await self.generate_response(scoring_request)
-                results.append(result)
-                logger.debug("Processed one request successfully; running_total=%d", len(results))
-            except Exception as e:
-                # Log error and continue with remaining requests
-                logger.error("Error processing request: %s", e)
-                logger.exception("Error processing request")
-
-        logger.debug("Batch processing complete; total_processed=%d", len(results))
-        return BatchScoringResponse(
-            results=results,
-            total_processed=len(results),
-        )
+    @property
+    def api_root(self) -> str:
+        return self.endpoint_url.rsplit("/api/", 1)[0]
+
+    @property
+    def keep_alive(self) -> str:
+        # How long Ollama keeps the model loaded after a request (e.g. "30m", "-1" = forever)
+        return environ.get("OLLAMA_KEEP_ALIVE", "30m")
 
     def _build_headers(self) -> dict[str, str]:
         # Ollama local server typically does not require Authorization
@@ -98,7 +57,8 @@ class OllamaService(LLMBaseService):
             "messages": [
                 {"role": "user", "content": prompt}
             ],
-            "stream": False,
+            "stream": self.stream_responses,
+            "keep_alive": self.keep_alive,
             "options": {
                 "temperature": self.temperature,
                 "num_predict": self.max_output_tokens,
@@ -106,8 +66,8 @@ class OllamaService(LLMBaseService):
                 "top_k": self.top_k,
             }
         }
-
-        logger.debug("Built payload; payload=%s", payload)
+        if self.seed is not None:
+            payload["options"]["seed"] = self.seed
         return payload
 
     def _extract_raw_text(self, result: dict[str, Any]) -> str:
@@ -128,7 +88,7 @@ class OllamaService(LLMBaseService):
         except Exception:
             pass
 
-        logger.exception("Unexpected API response format for Ollama: %s", result)
+        logger.exception("Unexpected API response format for Ollama: %s", Truncated(result))
         raise ValueError("Unexpected API response format for Ollama")
 
     async def _call_llm_api(self, prompt: str, model: str) -> dict[str, Any]:
@@ -138,13 +98,56 @@ class OllamaService(LLMBaseService):
         
         logger.info("Calling Ollama API at %s", url)
         logger.debug("Request headers: %s", headers)
-        logger.debug("Request payload: %s", payload)
+        logger.debug("Request payload: %s", Truncated(payload))
         
+        async with llm_http_client(self.api_timeout) as client:
+            if payload["stream"]:
+                result = await self._read_stream(client, url, headers, payload)
+            else:
+                response = await client.post(url, headers=headers, json=payload)
+                response.raise_for_status()
+                result = response.json()
+
+        logger.debug("Received response from Ollama API; done_reason=%s", result.get("done_reason"))
+        return result
+
+    async def _read_stream(self, client: httpx.AsyncClient, url: str, headers: dict[str, str], payload: dict[str, Any]) -> dict[str, Any]:
+        # NDJSON chunks; Ollama stops generating as soon as it cannot write the next one,
+        # so a cancelled call frees the model instead of finishing an unwanted answer
+        parts: list[str] = []
+        last: dict[str, Any] = {}
+        async with client.stream("POST", url, headers=headers, json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise ValueError(f"Ollama error: {chunk['error']}")
+                parts.append((chunk.get("message") or {}).get("content") or "")
+                last = chunk
+        # Same shape as a non-streamed reply
+        return {**last, "message": {"role": "assistant", "content": "".join(parts)}}
+
+    async def warm_up(self, model: str) -> None:
+        # One-token generation: loads the weights and refreshes the keep_alive timer
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": "ping"}],
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {"num_predict": 1},
+        }
         async with httpx.AsyncClient(timeout=self.api_timeout) as client:
-            response = await client.post(url, headers=headers, json=payload)
+            response = await client.post(self.endpoint_url, headers=self._build_headers(), json=payload)
             response.raise_for_status()
-            result = response.json()
-            
-        logger.debug("Received response from Ollama API; status=%d", response.status_code)
-        return result
+        logger.debug("Ollama warm-up done; model=%s", model)
 
+    async def is_resident(self, model: str) -> bool:
+        # /api/ps lists the models currently loaded in memory
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.get(self.api_root + "/api/ps")
+            response.raise_for_status()
+            loaded = response.json().get("models") or []
+        wanted = model if ":" in model else model + ":latest"
+        return any(m.get("name") in (model, wanted) or m.get("model") in (model, wanted) for m in loaded)
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from os import environ
+from typing import Any, Optional
+
+import httpx
+from pydantic import BaseModel, ValidationError
+
+from app.models.batch_scoring.requests import BatchScoringRequest
+from app.models.batch_scoring.responses import BatchScoringError, BatchScoringResponse, BulkJobStatus
+from app.models.common.llm_provider import LLMProvider
+from app.models.scoring.requests import ScoringRequest
+from app.models.scoring.responses import LLMUsage, ScoringResponse
+from app.services import history
+from app.services.llm_services.llm_base_service import LLMBaseService, batch_error
+from app.services.llm_services.scheduler import DEFAULT_TENANT
+from app.services.llm_services.cassette import llm_http_client
+from app.core.log_utils import Truncated
+from app.core.shared_state import get_shared_state
+from app.services.rescoring import payload_store
+
+
+logger = logging.getLogger(__name__)
+
+
+# Provider batch statuses after which no more polling is needed
+BULK_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Submissions of bulk jobs are kept in the shared state store under bulk:<batch id>, so any
+# worker can map results back (rubric weights, student ids) when the batch completes.
+BULK_JOB_TTL = 7 * 24 * 3600
+
+
+class _StoredBulkJob(BaseModel):
+    request: BatchScoringRequest
+    finished: Optional[BulkJobStatus] = None  # kept once the batch is done, so later polls do not score it again
+
+
+async def _load_bulk_job(job_id: str) -> _StoredBulkJob:
+    stored = await get_shared_state().get(f"bulk:{job_id}")
+    if stored is None:
+        raise KeyError(job_id)
+    try:
+        return _StoredBulkJob.model_validate_json(stored)
+    except ValidationError:
+        # Jobs created before the finished status was kept hold the bare request
+        return _StoredBulkJob(request=BatchScoringRequest.model_validate_json(stored))
+
+
+class OpenAICompatibleService(LLMBaseService):
+    """
+    Chat Completions provider (OpenAI, DeepSeek, Grok and compatible servers).
+
+    Besides interactive scoring it supports bulk mode: a whole BatchScoringRequest is
+    uploaded as one JSONL file to the `/v1/files` + `/v1/batches` API, polled, and the
+    output file is mapped back to submissions by `custom_id`.
+    """
+
+    @property
+    def endpoint_url(self) -> str:
+        base = (self.base_url or "").rstrip("/")
+        url = base if base.endswith("/chat/completions") else base + "/chat/completions"
+        logger.debug("Resolved endpoint URL: %s", url)
+        return url
+
+    @property
+    def api_root(self) -> str:
+        """The `/v1` root that the files and batches endpoints hang off."""
+        return self.endpoint_url.rsplit("/chat/completions", 1)[0]
+
+    @property
+    def bulk_completion_window(self) -> str:
+        return environ.get("BULK_COMPLETION_WINDOW", "24h")
+
+    @property
+    def bulk_poll_interval(self) -> float:
+        return float(environ.get("BULK_POLL_INTERVAL", 30))
+
+    def _build_payload(self, prompt: str, model: str) -> dict[str, Any]:
+        payload = {
+            "model": model or self.model or "",
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "max_tokens": self.max_output_tokens,
+            "stream": False,
+        }
+        if self.seed is not None:
+            payload["seed"] = self.seed
+        return payload
+
+    def _extract_raw_text(self, result: dict[str, Any]) -> str:
+        try:
+            content = result["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
+            logger.error("Unexpected API response format for %s: %s", self.provider.value, Truncated(result))
+            raise ValueError(f"Unexpected API response format: {e}")
+        if not isinstance(content, str):
+            raise ValueError("Unexpected API response format: message content is not text")
+        return content
+
+    async def _call_llm_api(self, prompt: str, model: str) -> dict[str, Any]:
+        url = self.endpoint_url
+        headers = self._build_headers()
+        payload = self._build_payload(prompt, model)
+
+        logger.info("Calling %s API at %s", self.provider.value, url)
+        logger.debug("Request payload: %s", Truncated(payload))
+
+        async with llm_http_client(self.api_timeout) as client:
+            response = await client.post(url, headers=headers, json=payload)
+            response.raise_for_status()
+            result = response.json()
+
+        logger.debug("Received response from %s API; status=%d", self.provider.value, response.status_code)
+        return result
+
+    # ---- Bulk mode (/v1/batches) ----
+
+    async def submit_bulk_job(self, request: BatchScoringRequest) -> BulkJobStatus:
+        """Upload every submission as one JSONL batch file and create a provider batch."""
+        if not request.submissions:
+            raise ValueError("At least one submission is required")
+        for index, submission in enumerate(request.submissions):
+            if submission.llm_provider != self.provider:
+                raise ValueError(f"Bulk jobs need a single provider; got {submission.llm_provider.value} in a {self.provider.value} job")
+            # One prompt per submission goes into the file: nothing runs before or after it
+            unsupported = [name for name, used in (
+                ("precheck", submission.precheck),
+                ("escalation", bool(submission.escalation)),
+                ("ensemble", submission.ensemble is not None),
+                ("regrade_from", submission.regrade_from is not None),
+            ) if used]
+            if unsupported:
+                raise ValueError(f"Bulk jobs do not support {', '.join(unsupported)} (submission {index})")
+            self._validate_request(submission)
+
+        auth = {"Authorization": self._build_headers()["Authorization"]}
+        # Spill to disk for large classes instead of holding every prompt in memory
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as jsonl:
+            for index, submission in enumerate(request.submissions):
+                line = {
+                    "custom_id": str(index),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._build_payload(await self._build_prompt_async(submission), submission.model),
+                }
+                jsonl.write(json.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n")
+            size = jsonl.tell()
+            jsonl.seek(0)
+
+            logger.info("Uploading bulk input for %s; submissions=%d, bytes=%d", self.provider.value, len(request.submissions), size)
+            async with httpx.AsyncClient(timeout=self.api_timeout) as client:
+                upload = await client.post(
+                    f"{self.api_root}/files",
+                    headers=auth,
+                    data={"purpose": "batch"},
+                    files={"file": ("scoring.jsonl", jsonl, "application/jsonl")},
+                )
+                upload.raise_for_status()
+                created = await client.post(
+                    f"{self.api_root}/batches",
+                    headers=auth,
+                    json={
+                        "input_file_id": upload.json()["id"],
+                        "endpoint": "/v1/chat/completions",
+                        "completion_window": self.bulk_completion_window,
+                    },
+                )
+                created.raise_for_status()
+                batch = created.json()
+
+        job = _StoredBulkJob(request=request)
+        await get_shared_state().set(f"bulk:{batch['id']}", job.model_dump_json().encode("utf-8"), ttl=BULK_JOB_TTL)
+        logger.info("Created bulk job %s for %s", batch["id"], self.provider.value)
+        return self._bulk_status(batch)
+
+    async def get_bulk_job(self, job_id: str) -> BulkJobStatus:
+        """Poll a bulk job once; when it has completed, download and score its output once."""
+        job = await _load_bulk_job(job_id)
+        if job.finished is not None:
+            return job.finished
+        request = job.request
+
+        auth = {"Authorization": self._build_headers()["Authorization"]}
+        async with httpx.AsyncClient(timeout=self.api_timeout) as client:
+            polled = await client.get(f"{self.api_root}/batches/{job_id}", headers=auth)
+            polled.raise_for_status()
+            batch = polled.json()
+            status = self._bulk_status(batch)
+            if status.status not in BULK_TERMINAL_STATUSES:
+                return status
+
+            # Expired or cancelled batches may still carry partial output
+            outcomes: dict[int, ScoringResponse | Exception] = {}
+            for file_key in ("output_file_id", "error_file_id"):
+                if batch.get(file_key):
+                    await self._read_bulk_output(client, auth, batch[file_key], request, outcomes)
+
+        for index, outcome in outcomes.items():
+            if isinstance(outcome, ScoringResponse):
+                outcome.payload_id = await payload_store.save(
+                    request.submissions[index], outcome, payload_id=f"{job_id}:{index}"
+                )
+        status.results = self._bulk_results(request, outcomes)
+        # Polls that race for a just-finished batch all score it; only the first records it in the history
+        if await get_shared_state().add(f"bulk:{job_id}:recorded", b"1", ttl=BULK_JOB_TTL):
+            with history.batch_scope(job_id):
+                for index, outcome in outcomes.items():
+                    if isinstance(outcome, ScoringResponse):
+                        submission = request.submissions[index]
+                        history.record(submission, outcome, submission.tenant or request.tenant or DEFAULT_TENANT)
+        job.finished = status
+        await get_shared_state().set(f"bulk:{job_id}", job.model_dump_json().encode("utf-8"), ttl=BULK_JOB_TTL)
+        return status
+
+    async def wait_bulk_job(self, job_id: str, timeout: Optional[float] = None) -> BulkJobStatus:
+        """Poll every BULK_POLL_INTERVAL seconds until the job reaches a terminal status."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = await self.get_bulk_job(job_id)
+            if status.status in BULK_TERMINAL_STATUSES:
+                return status
+            if deadline is not None and time.monotonic() >= deadline:
+                return status
+            await asyncio.sleep(self.bulk_poll_interval)
+
+    async def _read_bulk_output(
+        self,
+        client: httpx.AsyncClient,
+        auth: dict[str, str],
+        file_id: str,
+        request: BatchScoringRequest,
+        outcomes: dict[int, ScoringResponse | Exception],
+    ) -> None:
+        # Stream the output file line by line; each line is scored as it arrives
+        async with client.stream("GET", f"{self.api_root}/files/{file_id}/content", headers=auth) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                try:
+                    index = int(record["custom_id"])
+                    submission = request.submissions[index]
+                except (KeyError, ValueError, IndexError):
+                    logger.warning("Ignoring bulk output line with unknown custom_id: %s", Truncated(line, 200))
+                    continue
+                outcomes[index] = await self._score_bulk_record(submission, record)
+
+    async def _score_bulk_record(self, submission: ScoringRequest, record: dict[str, Any]) -> ScoringResponse | Exception:
+        error = record.get("error")
+        response = record.get("response") or {}
+        if error or response.get("status_code", 200) != 200:
+            detail = (error or {}).get("message") or (response.get("body") or {}).get("error", {}).get("message")
+            return ValueError(detail or f"Provider returned status {response.get('status_code')}")
+        body = response.get("body") or {}
+        try:
+            raw_response = self._extract_raw_text(body)
+            scored = await self._process_llm_output_async(submission, raw_response)
+        except Exception as e:
+            return e
+        prompt_tokens, completion_tokens = self._extract_usage(body)
+        scored.usage = LLMUsage(model=submission.model or self.model, calls=1,
+                                prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return scored
+
+    def _bulk_results(self, request: BatchScoringRequest, outcomes: dict[int, ScoringResponse | Exception]) -> BatchScoringResponse:
+        results: list[ScoringResponse] = []
+        errors: list[BatchScoringError] = []
+        for index, submission in enumerate(request.submissions):
+            outcome = outcomes.get(index, ValueError("No result returned for this submission"))
+            if isinstance(outcome, ScoringResponse):
+                results.append(outcome)
+            else:
+                errors.append(batch_error(index, submission, outcome))
+        return BatchScoringResponse(results=results, total_processed=len(results), errors=errors)
+
+    def _bulk_status(self, batch: dict[str, Any]) -> BulkJobStatus:
+        counts = batch.get("request_counts") or {}
+        return BulkJobStatus(
+            job_id=batch["id"],
+            provider=self.provider,
+            status=batch.get("status", "unknown"),
+            total=counts.get("total", 0),
+            completed=counts.get("completed", 0),
+            failed=counts.get("failed", 0),
+        )
+
+
+class OpenAIService(OpenAICompatibleService):
+    @property
+    def provider(self) -> LLMProvider:
+        logger.debug("Provider requested: OPENAI")
+        return LLMProvider.OPENAI
+
+
+class DeepSeekService(OpenAICompatibleService):
+    @property
+    def provider(self) -> LLMProvider:
+        logger.debug("Provider requested: DEEPSEEK")
+        return LLMProvider.DEEPSEEK
+
+
+class GrokService(OpenAICompatibleService):
+    @property
+    def provider(self) -> LLMProvider:
+        logger.debug("Provider requested: GROK")
+        return LLMProvider.GROK
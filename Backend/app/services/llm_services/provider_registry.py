@@ -0,0 +1,26 @@
+import importlib
+from functools import lru_cache
+from typing import Optional
+
+from app.models.common.llm_provider import LLMProvider
+from app.services.llm_services.llm_base_service import LLMBaseService
+
+
+# Provider modules (and their HTTP client imports) are loaded on first use, not at startup
+PROVIDER_SERVICES: dict[LLMProvider, tuple[str, str]] = {
+    LLMProvider.GEMINI:   ("app.services.llm_services.gemini_service", "GeminiService"),
+    LLMProvider.LMSTUDIO: ("app.services.llm_services.lmstudio_service", "LMStudioService"),
+    LLMProvider.OLLAMA:   ("app.services.llm_services.ollama_service", "OllamaService"),
+    LLMProvider.OPENAI:   ("app.services.llm_services.openai_compatible_service", "OpenAIService"),
+    LLMProvider.DEEPSEEK: ("app.services.llm_services.openai_compatible_service", "DeepSeekService"),
+    LLMProvider.GROK:     ("app.services.llm_services.openai_compatible_service", "GrokService"),
+}
+
+
+@lru_cache(maxsize=None)
+def get_service_class(provider: LLMProvider) -> Optional[type[LLMBaseService]]:
+    try:
+        module_name, class_name = PROVIDER_SERVICES[provider]
+    except KeyError:
+        return None
+    return getattr(importlib.import_module(module_name), class_name)
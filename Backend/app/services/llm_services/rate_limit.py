@@ -0,0 +1,49 @@
+import asyncio
+import logging
+import random
+import time
+from os import environ
+
+from app.core.shared_state import get_shared_state
+from app.models.common.llm_provider import LLMProvider
+
+
+logger = logging.getLogger(__name__)
+
+_WINDOW_SECONDS = 60
+
+
+def get_env_calls_per_minute(provider: LLMProvider) -> int:
+    """<PROVIDER>_CALLS_PER_MINUTE, else LLM_CALLS_PER_MINUTE; 0 (default) means unlimited."""
+    value = environ.get(f"{provider.name}_CALLS_PER_MINUTE") or environ.get("LLM_CALLS_PER_MINUTE", "0")
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 0
+
+
+async def acquire_call_slot(provider: LLMProvider) -> None:
+    """
+    Wait for a slot in the provider's per-minute quota.
+
+    The counter lives in the shared state store, so the limit holds for all
+    workers together rather than once per worker.
+    """
+    limit = get_env_calls_per_minute(provider)
+    if limit <= 0:
+        return
+    state = get_shared_state()
+    while True:
+        now = time.time()
+        window = int(now // _WINDOW_SECONDS)
+        try:
+            count = await state.incr(f"rate:{provider.value}:{window}", ttl=_WINDOW_SECONDS * 2)
+        except Exception as err:
+            logger.warning("Rate limit store unavailable, not limiting: %s", err)
+            return
+        if count <= limit:
+            return
+        # Spread waiters over the first second of the next window
+        wait = (window + 1) * _WINDOW_SECONDS - now + random.uniform(0, 1)
+        logger.info("Provider %s at %d calls/min; waiting %.1fs", provider.value, limit, wait)
+        await asyncio.sleep(wait)
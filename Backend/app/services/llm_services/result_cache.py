@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from os import environ
+from typing import Optional
+
+from app.core.shared_state import get_shared_state
+
+
+logger = logging.getLogger(__name__)
+
+_OWNER = str(os.getpid()).encode()
+
+
+def get_env_result_cache_ttl() -> float:
+    """RESULT_CACHE_TTL seconds (default one day); 0 disables the cache."""
+    try:
+        return max(0.0, float(environ.get("RESULT_CACHE_TTL", 86400)))
+    except ValueError:
+        return 86400.0
+
+
+def cache_key(provider: str, model: str, prompt: str, sampling: dict) -> str:
+    """Identical prompt, model and sampling settings give the same LLM answer key."""
+    material = json.dumps([provider, model, sampling, prompt], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+async def lookup(key: str, wait: float) -> tuple[Optional[str], bool]:
+    """
+    (cached raw LLM text, claimed). On a miss the caller is given the key, so other
+    workers scoring the same prompt wait up to `wait` seconds for its result instead
+    of paying for a second LLM call. `claimed` means the caller must `release` the key.
+    """
+    if get_env_result_cache_ttl() <= 0:
+        return None, False
+    state = get_shared_state()
+    deadline = time.monotonic() + wait
+    delay = 0.05
+    try:
+        while True:
+            cached = await state.get(f"result:{key}")
+            if cached is not None:
+                return cached.decode("utf-8"), False
+            if await state.add(f"inflight:{key}", _OWNER, ttl=wait):
+                return None, True
+            if time.monotonic() >= deadline:
+                logger.warning("Gave up waiting for in-flight result %s; calling the LLM", key[:12])
+                return None, False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+    except Exception as err:
+        logger.warning("Result cache unavailable, scoring without it: %s", err)
+        return None, False
+
+
+async def store(key: str, raw_text: str) -> None:
+    ttl = get_env_result_cache_ttl()
+    if ttl <= 0:
+        return
+    try:
+        await get_shared_state().set(f"result:{key}", raw_text.encode("utf-8"), ttl=ttl)
+    except Exception as err:
+        logger.warning("Could not store result %s: %s", key[:12], err)
+
+
+async def release(key: str) -> None:
+    try:
+        await get_shared_state().delete(f"inflight:{key}")
+    except Exception as err:
+        logger.warning("Could not release in-flight key %s: %s", key[:12], err)
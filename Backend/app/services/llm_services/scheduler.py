@@ -0,0 +1,381 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from os import environ
+from typing import Any, AsyncIterator, Callable, Iterator, Literal, Optional
+
+from app.models.common.llm_provider import LLMProvider
+
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first
+PriorityClass = Literal["interactive", "batch", "backfill"]
+PRIORITY_CLASSES: tuple[PriorityClass, ...] = ("interactive", "batch", "backfill")
+
+# Requests without a tenant (course) id share this one
+DEFAULT_TENANT = "default"
+
+# Tenants whose dispatch stats are kept; tenant ids come from clients, so idle ones are forgotten past this
+_MAX_TENANT_STATS = 1024
+
+# Class and tenant of the LLM calls made by the current request; tasks spawned for it inherit them
+_priority: ContextVar[PriorityClass] = ContextVar("llm_priority", default="interactive")
+_tenant: ContextVar[Optional[str]] = ContextVar("llm_tenant", default=None)
+
+_schedulers: dict[LLMProvider, "DispatchScheduler"] = {}
+
+
+def get_env_max_inflight(provider: LLMProvider) -> int:
+    """<PROVIDER>_MAX_INFLIGHT, else LLM_MAX_INFLIGHT (default 8): LLM calls in flight per provider and worker."""
+    value = environ.get(f"{provider.name}_MAX_INFLIGHT") or environ.get("LLM_MAX_INFLIGHT", "8")
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return 8
+
+
+def get_env_interactive_share() -> float:
+    """SCHEDULER_INTERACTIVE_SHARE (default 0.25): share of the slots batch and backfill calls may never take."""
+    try:
+        return min(0.9, max(0.0, float(environ.get("SCHEDULER_INTERACTIVE_SHARE", 0.25))))
+    except ValueError:
+        return 0.25
+
+
+def get_env_aging_seconds() -> float:
+    """SCHEDULER_AGING_SECONDS (default 30): each such wait moves a queued call up one class; 0 disables aging."""
+    try:
+        return max(0.0, float(environ.get("SCHEDULER_AGING_SECONDS", 30)))
+    except ValueError:
+        return 30.0
+
+
+def _parse_tenant_map(name: str) -> dict[str, float]:
+    """Parse "cs101=2,cs102=0.5" style settings; malformed entries are skipped."""
+    values: dict[str, float] = {}
+    for item in environ.get(name, "").split(","):
+        tenant, sep, value = item.partition("=")
+        try:
+            if sep and tenant.strip():
+                values[tenant.strip()] = float(value)
+        except ValueError:
+            logger.warning("Ignoring malformed %s entry: %s", name, item)
+    return values
+
+
+def get_env_tenant_weights() -> dict[str, float]:
+    """TENANT_WEIGHTS, e.g. "cs101=2,cs102=1": share of dispatch per tenant within a class (default weight 1)."""
+    return {tenant: max(0.01, weight) for tenant, weight in _parse_tenant_map("TENANT_WEIGHTS").items()}
+
+
+def get_env_tenant_max_inflight() -> int:
+    """TENANT_MAX_INFLIGHT (default 0 = no cap): LLM calls in flight per tenant and provider."""
+    try:
+        return max(0, int(environ.get("TENANT_MAX_INFLIGHT", 0)))
+    except ValueError:
+        return 0
+
+
+def get_env_tenant_caps() -> dict[str, int]:
+    """TENANT_CAPS, e.g. "cs101=2": per-tenant overrides of TENANT_MAX_INFLIGHT."""
+    return {tenant: max(0, int(cap)) for tenant, cap in _parse_tenant_map("TENANT_CAPS").items()}
+
+
+@contextmanager
+def priority_scope(priority: PriorityClass) -> Iterator[None]:
+    """Run the LLM calls made inside the block (and by tasks created in it) at `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> PriorityClass:
+    return _priority.get()
+
+
+@contextmanager
+def tenant_scope(tenant: Optional[str]) -> Iterator[None]:
+    """Attribute the LLM calls made inside the block to `tenant`, unless a request names its own."""
+    token = _tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def current_tenant() -> str:
+    return _tenant.get() or DEFAULT_TENANT
+
+
+@dataclass
+class _Waiter:
+    priority: PriorityClass
+    tenant: str
+    seq: int
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+@dataclass
+class _Stats:
+    inflight: int = 0
+    dispatched: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def record_dispatch(self, waited: float) -> None:
+        self.inflight += 1
+        self.dispatched += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "inflight": self.inflight,
+            "dispatched": self.dispatched,
+            "wait_avg_ms": round(self.wait_total / self.dispatched * 1000, 1) if self.dispatched else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 1),
+        }
+
+
+class _ClassQueue:
+    """
+    Waiters of one priority class, served deficit round robin across tenants.
+
+    Each call costs one unit. A tenant at the head of the rotation is
+    dispatched while its deficit covers that cost; then it moves to the back
+    and is recharged by its weight. So one tenant's 400-item batch only gets
+    its weighted turn, whatever the queue lengths.
+    """
+
+    def __init__(self) -> None:
+        self.tenants: dict[str, deque[_Waiter]] = {}
+        self.order: deque[str] = deque()
+        self.deficit: dict[str, float] = {}
+
+    def push(self, waiter: _Waiter, weight: float) -> None:
+        queue = self.tenants.get(waiter.tenant)
+        if queue is None:
+            queue = self.tenants[waiter.tenant] = deque()
+            self.order.append(waiter.tenant)
+            self.deficit[waiter.tenant] = weight
+        queue.append(waiter)
+
+    def _drop(self, tenant: str) -> None:
+        del self.tenants[tenant]
+        del self.deficit[tenant]
+        self.order.remove(tenant)
+
+    def peek(self, eligible: Callable[[str], bool], weight: Callable[[str], float]) -> Optional[_Waiter]:
+        """Next waiter in DRR order among tenants that `eligible` allows; the tenant is left at the head."""
+        skipped = 0
+        while self.order and skipped < len(self.order):
+            tenant = self.order[0]
+            queue = self.tenants[tenant]
+            while queue and queue[0].future.done():
+                queue.popleft()  # cancelled while waiting
+            if not queue:
+                self._drop(tenant)
+                continue
+            if not eligible(tenant):
+                self.order.rotate(-1)
+                skipped += 1
+                continue
+            if self.deficit[tenant] < 1:
+                # Turn used up: recharge and move to the back
+                self.deficit[tenant] += weight(tenant)
+                self.order.rotate(-1)
+                skipped = 0
+                continue
+            return queue[0]
+        return None
+
+    def pop(self, waiter: _Waiter) -> None:
+        """Remove `waiter`, just returned by peek, and charge its tenant."""
+        tenant = waiter.tenant
+        queue = self.tenants[tenant]
+        queue.popleft()
+        self.deficit[tenant] -= 1
+        if not queue:
+            self._drop(tenant)
+        elif self.deficit[tenant] < 1:
+            # Recharged on its next visit
+            self.order.rotate(-1)
+
+    def queued(self, tenant: Optional[str] = None) -> int:
+        queues = self.tenants.values() if tenant is None else [self.tenants.get(tenant, ())]
+        return sum(1 for queue in queues for w in queue if not w.future.done())
+
+
+class DispatchScheduler:
+    """
+    Admission to a provider's LLM calls by priority class and tenant.
+
+    At most `capacity` calls run at once. `reserved` of those slots are kept
+    for interactive calls, so a single /score never queues behind a saturating
+    batch. Among queued calls the highest class goes first; a call that has
+    waited `aging` seconds is treated as one class higher, so batch work keeps
+    moving under a steady stream of interactive requests. Within a class,
+    tenants (courses) take turns by weight, and a tenant never has more than
+    its cap in flight.
+    """
+
+    def __init__(self, capacity: int, reserved: int = 0, aging: float = 0.0,
+                 tenant_weights: Optional[dict[str, float]] = None,
+                 tenant_max_inflight: int = 0, tenant_caps: Optional[dict[str, int]] = None) -> None:
+        self.capacity = capacity
+        self.reserved = min(reserved, capacity - 1)
+        self.aging = aging
+        self.tenant_weights = tenant_weights or {}
+        self.tenant_max_inflight = tenant_max_inflight
+        self.tenant_caps = tenant_caps or {}
+        self._queues: dict[PriorityClass, _ClassQueue] = {p: _ClassQueue() for p in PRIORITY_CLASSES}
+        self._stats: dict[PriorityClass, _Stats] = {p: _Stats() for p in PRIORITY_CLASSES}
+        self._tenant_stats: dict[str, _Stats] = {}
+        self._seq = itertools.count()
+        self._completed: deque[float] = deque(maxlen=256)  # release times, for the drain rate
+
+    @property
+    def inflight(self) -> int:
+        return sum(s.inflight for s in self._stats.values())
+
+    def _weight(self, tenant: str) -> float:
+        return self.tenant_weights.get(tenant, 1.0)
+
+    def _cap(self, tenant: str) -> int:
+        return self.tenant_caps.get(tenant, self.tenant_max_inflight)
+
+    def _below_cap(self, tenant: str) -> bool:
+        cap = self._cap(tenant)
+        return not cap or self._tenant_stats[tenant].inflight < cap
+
+    def _touch_tenant(self, tenant: str) -> None:
+        """Keep `tenant`'s stats, most recently used last; forget the least recent idle tenants past the limit."""
+        stats = self._tenant_stats.pop(tenant, None) or _Stats()
+        if len(self._tenant_stats) >= _MAX_TENANT_STATS:
+            for idle in [t for t, s in self._tenant_stats.items() if not s.inflight and not self._is_queued(t)]:
+                del self._tenant_stats[idle]
+                if len(self._tenant_stats) < _MAX_TENANT_STATS:
+                    break
+        self._tenant_stats[tenant] = stats
+
+    def _is_queued(self, tenant: str) -> bool:
+        return any(tenant in queue.tenants for queue in self._queues.values())
+
+    def _rank(self, waiter: _Waiter, now: float) -> tuple[int, int]:
+        rank = PRIORITY_CLASSES.index(waiter.priority)
+        if self.aging:
+            rank = max(0, rank - int((now - waiter.enqueued_at) // self.aging))
+        return rank, waiter.seq
+
+    def _next_waiter(self, now: float) -> Optional[_Waiter]:
+        background_limit = self.capacity - self.reserved
+        background_inflight = self.inflight - self._stats["interactive"].inflight
+        candidates = []
+        for priority, queue in self._queues.items():
+            if priority != "interactive" and background_inflight >= background_limit:
+                continue
+            waiter = queue.peek(self._below_cap, self._weight)
+            if waiter is not None:
+                candidates.append(waiter)
+        return min(candidates, key=lambda w: self._rank(w, now), default=None)
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self.inflight < self.capacity:
+            waiter = self._next_waiter(now)
+            if waiter is None:
+                return
+            self._queues[waiter.priority].pop(waiter)
+            waited = now - waiter.enqueued_at
+            self._stats[waiter.priority].record_dispatch(waited)
+            self._tenant_stats[waiter.tenant].record_dispatch(waited)
+            waiter.future.set_result(None)
+
+    def _release(self, waiter: _Waiter) -> None:
+        self._stats[waiter.priority].inflight -= 1
+        self._tenant_stats[waiter.tenant].inflight -= 1
+        self._completed.append(time.monotonic())
+        self._dispatch()
+
+    def drain_rate(self, window: float = 60.0) -> Optional[float]:
+        """Calls finished per second over the last `window` seconds; None when none finished in it."""
+        now = time.monotonic()
+        recent = [t for t in self._completed if now - t <= window]
+        if not recent:
+            return None
+        # Measured up to now, so a provider that stopped answering shows a falling rate
+        return len(recent) / max(now - recent[0], 1.0)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[PriorityClass] = None, tenant: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold one of the provider's call slots for the duration of the block."""
+        waiter = _Waiter(
+            priority or current_priority(), tenant or current_tenant(), next(self._seq), time.monotonic(),
+            asyncio.get_running_loop().create_future(),
+        )
+        self._touch_tenant(waiter.tenant)
+        self._queues[waiter.priority].push(waiter, self._weight(waiter.tenant))
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller was cancelled: hand the slot on
+                self._release(waiter)
+            raise
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Queue depth, calls in flight, calls dispatched and queueing delay per class and per tenant."""
+        classes = {
+            priority: {"queued": self._queues[priority].queued(), **self._stats[priority].as_dict()}
+            for priority in PRIORITY_CLASSES
+        }
+        tenants = {
+            tenant: {
+                "queued": sum(queue.queued(tenant) for queue in self._queues.values()),
+                **stats.as_dict(),
+                "weight": self._weight(tenant),
+                "max_inflight": self._cap(tenant) or None,
+            }
+            for tenant, stats in self._tenant_stats.items()
+        }
+        rate = self.drain_rate()
+        return {
+            "capacity": self.capacity,
+            "reserved_interactive": self.reserved,
+            "drain_per_s": round(rate, 2) if rate is not None else None,
+            "classes": classes,
+            "tenants": tenants,
+        }
+
+
+def get_scheduler(provider: LLMProvider) -> DispatchScheduler:
+    """The process-wide scheduler for `provider`, created on first use."""
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        capacity = get_env_max_inflight(provider)
+        share = get_env_interactive_share()
+        reserved = max(1, round(capacity * share)) if share > 0 and capacity > 1 else 0
+        scheduler = _schedulers[provider] = DispatchScheduler(
+            capacity, reserved, get_env_aging_seconds(),
+            get_env_tenant_weights(), get_env_tenant_max_inflight(), get_env_tenant_caps(),
+        )
+        logger.info("LLM scheduler for %s: capacity=%d, reserved_interactive=%d", provider.value, capacity, reserved)
+    return scheduler
+
+
+def scheduler_snapshot() -> dict[str, Any]:
+    return {provider.value: scheduler.snapshot() for provider, scheduler in _schedulers.items()}
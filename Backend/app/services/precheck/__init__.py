@@ -0,0 +1,9 @@
+from .sandbox import (
+    precheck_submission, describe_precheck, run_precheck,
+    shutdown_pool, SUPPORTED_LANGUAGES,
+)
+
+__all__ = [
+    "precheck_submission", "describe_precheck", "run_precheck",
+    "shutdown_pool", "SUPPORTED_LANGUAGES",
+]
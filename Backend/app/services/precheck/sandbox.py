@@ -0,0 +1,348 @@
+import asyncio
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from app.models.scoring.requests import ScoringRequest, TestCase
+from app.models.scoring.responses import PrecheckResult, TestCaseResult
+
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_LANGUAGES = {"cpp", "python"}
+
+SANDBOX_MODES = {"auto", "bwrap", "setpriv", "none"}
+
+# Compilers find their assemblers and linkers on PATH; submitted programs get no environment at all
+COMPILE_ENV = {"PATH": "/usr/local/bin:/usr/bin:/bin", "LANG": "C.UTF-8"}
+
+OUTPUT_CHUNK_BYTES = 16 * 1024
+
+# Largest file a compiler may write (object files, binaries, .pyc)
+COMPILE_MAX_FILE_BYTES = 64 * 1024 * 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def get_env_limits() -> dict[str, int]:
+    """Sandbox limits (RORO): compile/run timeouts in seconds, memory in MB, captured output in bytes."""
+    return {
+        "compile_timeout": _env_int("PRECHECK_COMPILE_TIMEOUT", 15),
+        "run_timeout": _env_int("PRECHECK_RUN_TIMEOUT", 2),
+        "memory_mb": _env_int("PRECHECK_MEMORY_MB", 256),
+        "max_output_bytes": _env_int("PRECHECK_MAX_OUTPUT_BYTES", 64 * 1024),
+    }
+
+
+def get_env_sandbox() -> str:
+    """
+    PRECHECK_SANDBOX (auto|bwrap|setpriv|none, default auto): how submitted code is isolated.
+
+    bwrap: bubblewrap namespaces; no network, read-only system directories, only
+    the work directory writable, nothing else of the host filesystem visible.
+    setpriv: as root, `unshare` (no network, own PID/IPC/mount namespaces) and
+    `setpriv` to PRECHECK_UID/PRECHECK_GID. auto picks bwrap, then setpriv, and
+    refuses to run code when neither is available. none runs code as the server
+    user with only resource limits; for development machines only.
+    """
+    mode = os.environ.get("PRECHECK_SANDBOX", "auto").strip().lower()
+    return mode if mode in SANDBOX_MODES else "auto"
+
+
+def get_env_sandbox_ids() -> tuple[int, int]:
+    """PRECHECK_UID / PRECHECK_GID: unprivileged user and group code runs as (default 65534, nobody)."""
+    return _env_int("PRECHECK_UID", 65534), _env_int("PRECHECK_GID", 65534)
+
+
+def get_env_python() -> str:
+    """PRECHECK_PYTHON: interpreter for Python submissions; must be readable by the sandbox user."""
+    return os.environ.get("PRECHECK_PYTHON") or sys.executable
+
+
+def _resolve_sandbox() -> Optional[str]:
+    """The isolation mode to use here, or None when the configured one is unavailable."""
+    mode = get_env_sandbox()
+    can_bwrap = os.name == "posix" and shutil.which("bwrap") is not None
+    can_setpriv = (
+        os.name == "posix" and os.geteuid() == 0
+        and shutil.which("unshare") is not None and shutil.which("setpriv") is not None
+    )
+    if mode == "auto":
+        return "bwrap" if can_bwrap else "setpriv" if can_setpriv else None
+    if mode == "bwrap":
+        return mode if can_bwrap else None
+    if mode == "setpriv":
+        return mode if can_setpriv else None
+    return "none"
+
+
+def _isolation_prefix(sandbox: str, workdir: str) -> list[str]:
+    """Command prefix that runs the rest of the command line isolated from the host."""
+    if sandbox == "bwrap":
+        uid, gid = get_env_sandbox_ids()
+        prefix = ["bwrap", "--unshare-all", "--die-with-parent", "--new-session",
+                  "--uid", str(uid), "--gid", str(gid), "--ro-bind", "/usr", "/usr"]
+        python_root = os.path.dirname(os.path.dirname(os.path.realpath(get_env_python())))
+        for path in ("/bin", "/lib", "/lib64", "/etc/alternatives", "/etc/ld.so.cache", python_root):
+            prefix += ["--ro-bind-try", path, path]
+        return prefix + ["--proc", "/proc", "--dev", "/dev", "--tmpfs", "/tmp",
+                         "--bind", workdir, workdir, "--chdir", workdir, "--"]
+    if sandbox == "setpriv":
+        uid, gid = get_env_sandbox_ids()
+        return ["unshare", "--net", "--ipc", "--pid", "--fork", "--kill-child", "--mount", "--mount-proc", "--",
+                "setpriv", f"--reuid={uid}", f"--regid={gid}", "--clear-groups", "--inh-caps=-all", "--"]
+    return []
+
+
+def _prepare_workdir(sandbox: str, workdir: str) -> None:
+    """Hand the work directory to the sandbox user, who must write binaries and caches there."""
+    if sandbox == "setpriv":
+        uid, gid = get_env_sandbox_ids()
+        os.chown(workdir, uid, gid)
+
+
+def _limit_resources(cpu_seconds: int, memory_mb: int, max_file_bytes: int) -> None:
+    """preexec_fn for child processes: cap CPU time, address space and file size; no core dumps."""
+    import resource
+
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_mb * 1024 * 1024,) * 2)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (max_file_bytes,) * 2)
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    os.setsid()
+
+
+@dataclass
+class _Completed:
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    overflowed: bool  # output passed max_output_bytes and the process was killed
+
+
+def _kill(process: subprocess.Popen) -> None:
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)  # the whole session started by setsid()
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _run(
+    cmd: list[str], workdir: str, sandbox: str, stdin: str, timeout: int, memory_mb: int, max_file_bytes: int,
+    max_output_bytes: int, env: dict[str, str],
+) -> _Completed:
+    """
+    Run `cmd` isolated by `sandbox` in `workdir` with only `env` in its environment.
+
+    stdout and stderr are read in chunks as they come; once either passes
+    max_output_bytes the process is killed, so a print loop cannot fill the
+    worker's memory (RLIMIT_FSIZE does not apply to pipes). Raises
+    subprocess.TimeoutExpired after killing a process still running at `timeout`.
+    """
+    process = subprocess.Popen(
+        _isolation_prefix(sandbox, workdir) + cmd,
+        cwd=workdir,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        preexec_fn=(lambda: _limit_resources(timeout, memory_mb, max_file_bytes)) if os.name == "posix" else None,
+        env=env,
+    )
+    output: dict[int, bytearray] = {1: bytearray(), 2: bytearray()}
+    overflowed = threading.Event()
+
+    def drain(stream: BinaryIO, buffer: bytearray) -> None:
+        with stream:
+            while chunk := stream.read1(OUTPUT_CHUNK_BYTES):
+                if len(buffer) + len(chunk) > max_output_bytes:
+                    buffer += chunk[: max_output_bytes - len(buffer)]
+                    overflowed.set()
+                    _kill(process)
+                    return
+                buffer += chunk
+
+    def feed() -> None:
+        try:
+            with process.stdin:
+                process.stdin.write(stdin.encode("utf-8"))
+        except (BrokenPipeError, OSError):
+            pass  # the program exited without reading all of its input
+
+    threads = [
+        threading.Thread(target=drain, args=(process.stdout, output[1]), daemon=True),
+        threading.Thread(target=drain, args=(process.stderr, output[2]), daemon=True),
+        threading.Thread(target=feed, daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        _kill(process)
+        process.wait()
+        raise
+    finally:
+        for thread in threads:
+            thread.join(1)
+    return _Completed(process.returncode, bytes(output[1]), bytes(output[2]), overflowed.is_set())
+
+
+def _excerpt(data: bytes, limit: int = 500) -> str:
+    text = data.decode("utf-8", errors="replace")
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _normalize(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+
+def _compile(
+    language: str, code: str, workdir: str, sandbox: str, limits: dict[str, int],
+) -> tuple[Optional[list[str]], Optional[str], str]:
+    """Return (run command, compile output, status) for the submission."""
+    if language == "cpp":
+        compiler = shutil.which(os.environ.get("PRECHECK_CXX", "g++"))
+        if compiler is None:
+            return None, f"Compiler not found: {os.environ.get('PRECHECK_CXX', 'g++')}", "unavailable"
+        source = Path(workdir) / "main.cpp"
+        source.write_text(code, encoding="utf-8")
+        # Compilers need more address space than the programs they build; they run isolated too,
+        # since #include can read any file the compiler can
+        result = _run([compiler, "-std=c++17", "-O2", "-o", "main", str(source)], workdir, sandbox, "",
+                      limits["compile_timeout"], max(limits["memory_mb"], 1024), COMPILE_MAX_FILE_BYTES,
+                      limits["max_output_bytes"], COMPILE_ENV)
+        if result.returncode != 0:
+            return None, _excerpt(result.stderr, 2000).replace(workdir + os.sep, ""), "compile_error"
+        return [str(Path(workdir) / "main")], None, "ok"
+
+    if language == "python":
+        python = get_env_python()
+        source = Path(workdir) / "main.py"
+        source.write_text(code, encoding="utf-8")
+        result = _run([python, "-m", "py_compile", str(source)], workdir, sandbox, "",
+                      limits["compile_timeout"], max(limits["memory_mb"], 512), COMPILE_MAX_FILE_BYTES,
+                      limits["max_output_bytes"], COMPILE_ENV)
+        if result.returncode != 0:
+            return None, _excerpt(result.stderr, 2000).replace(workdir + os.sep, ""), "compile_error"
+        return [python, "-I", str(source)], None, "ok"
+
+    return None, None, "unsupported"
+
+
+def _run_test(
+    command: list[str], workdir: str, sandbox: str, index: int, case: TestCase, limits: dict[str, int],
+) -> TestCaseResult:
+    name = case.name or f"test_{index + 1}"
+    try:
+        result = _run(command, workdir, sandbox, case.input, limits["run_timeout"], limits["memory_mb"],
+                      limits["max_output_bytes"], limits["max_output_bytes"], {})
+    except subprocess.TimeoutExpired:
+        return TestCaseResult(name=name, status="timeout", detail=f"No result within {limits['run_timeout']}s")
+    if result.overflowed:
+        return TestCaseResult(name=name, status="failed",
+                              detail=f"stopped after more than {limits['max_output_bytes']} bytes of output")
+    if result.returncode != 0:
+        return TestCaseResult(name=name, status="runtime_error",
+                              detail=f"exit code {result.returncode}: {_excerpt(result.stderr, 200)}")
+    actual = result.stdout.decode("utf-8", errors="replace")
+    if _normalize(actual) == _normalize(case.expected_output):
+        return TestCaseResult(name=name, status="passed")
+    return TestCaseResult(name=name, status="failed", detail=f"got: {_excerpt(result.stdout, 200)}")
+
+
+def run_precheck(language: str, code: str, test_cases: list[TestCase], limits: dict[str, int]) -> PrecheckResult:
+    """Compile the submission and run it against test_cases. Blocking; runs in a pool worker."""
+    if not code or not code.strip():
+        return PrecheckResult(status="empty")
+    if language not in SUPPORTED_LANGUAGES:
+        return PrecheckResult(status="unsupported")
+    sandbox = _resolve_sandbox()
+    if sandbox is None:
+        return PrecheckResult(
+            status="unavailable",
+            compile_output=f"No sandbox available for PRECHECK_SANDBOX={get_env_sandbox()}; submitted code was not run",
+        )
+
+    with tempfile.TemporaryDirectory(prefix="precheck-") as workdir:
+        _prepare_workdir(sandbox, workdir)
+        try:
+            command, compile_output, status = _compile(language, code, workdir, sandbox, limits)
+        except subprocess.TimeoutExpired:
+            # A slow or overloaded compiler says nothing about the code, so the LLM still grades it
+            return PrecheckResult(status="unavailable", compile_output=f"Compilation exceeded {limits['compile_timeout']}s")
+        if command is None:
+            return PrecheckResult(status=status, compile_output=compile_output)
+        tests = [_run_test(command, workdir, sandbox, i, case, limits) for i, case in enumerate(test_cases)]
+    return PrecheckResult(status="ok", tests=tests)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        workers = max(1, _env_int("PRECHECK_WORKERS", 2))
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        sandbox = _resolve_sandbox()
+        if sandbox is None:
+            logger.warning("Precheck: no sandbox for PRECHECK_SANDBOX=%s (needs bwrap, or root with unshare and "
+                           "setpriv); submissions will not be compiled or run", get_env_sandbox())
+        elif sandbox == "none":
+            logger.warning("Precheck: PRECHECK_SANDBOX=none; submitted code runs as the server user with network "
+                           "and filesystem access")
+        logger.info("Precheck pool started: workers=%d, sandbox=%s", workers, sandbox)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def precheck_submission(request: ScoringRequest) -> PrecheckResult:
+    """Run the compile-and-test stage for one request on the precheck process pool."""
+    if not request.student_code or not request.student_code.strip():
+        return PrecheckResult(status="empty")
+    if request.programming_language not in SUPPORTED_LANGUAGES:
+        return PrecheckResult(status="unsupported")
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        get_pool(), run_precheck,
+        request.programming_language, request.student_code, list(request.test_cases), get_env_limits(),
+    )
+    logger.debug("Precheck finished; status=%s, passed=%d/%d", result.status, result.passed, len(result.tests))
+    return result
+
+
+def describe_precheck(result: PrecheckResult) -> str:
+    """Render precheck results as plain facts for the prompt."""
+    if result.status == "compile_error":
+        return f"- The code does NOT compile. Compiler output:\n{result.compile_output or ''}"
+    if result.status != "ok":
+        return ""
+    lines = ["- The code compiles successfully."]
+    if result.tests:
+        lines.append(f"- Sample tests passed: {result.passed}/{len(result.tests)}.")
+        for test in result.tests:
+            if test.status != "passed":
+                lines.append(f"  - {test.name}: {test.status}" + (f" ({test.detail})" if test.detail else ""))
+    return "\n".join(lines)
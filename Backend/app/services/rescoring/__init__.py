@@ -0,0 +1,25 @@
+import importlib
+
+from .payload_store import (
+    StoredPayload, rubric_hash, category_hash, penalty_hash, rubric_hashes, submission_hash, payload_of, encode_record,
+    save, load, load_many, mismatch,
+)
+from .regrade import changed_rubric, merge_payloads
+
+
+# rescore pulls in numpy, which nothing on the scoring path needs
+_LAZY_EXPORTS = {"rescore_payloads": ".rescore"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "StoredPayload", "rubric_hash", "category_hash", "penalty_hash", "rubric_hashes", "payload_of", "encode_record",
+    "submission_hash", "save", "load", "load_many", "mismatch",
+    "changed_rubric", "merge_payloads",
+    "rescore_payloads",
+]
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+import uuid
+from functools import lru_cache
+from os import environ
+from typing import Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+from app.core.shared_state import get_shared_state
+from app.models.common.llm_provider import LLMProvider
+from app.models.scoring.requests import ScoringRequest
+from app.models.scoring.responses import LLMCategoryResult, LLMScoringPayload, ScoringResponse
+from app.models.scoring.rubric import PenaltyRule, Rubric, RubricCategory
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_env_payload_store_ttl() -> float:
+    """PAYLOAD_STORE_TTL seconds (default 180 days); 0 stops keeping payloads for re-scoring."""
+    try:
+        return max(0.0, float(environ.get("PAYLOAD_STORE_TTL", 180 * 86400)))
+    except ValueError:
+        return 180 * 86400.0
+
+
+class StoredPayload(BaseModel):
+    rubric_hash: str
+    # Per category name / penalty code, so a regrade can tell which parts of a rubric changed
+    category_hashes: dict[str, str] = Field(default_factory=dict)
+    penalty_hashes: dict[str, str] = Field(default_factory=dict)
+    provider_used: LLMProvider
+    student_id: Optional[str] = None
+    # What was graded: a regrade only reuses scores of the same code for the same problem
+    submission_hash: Optional[str] = None
+    payload: LLMScoringPayload
+
+
+def _digest(material: object) -> str:
+    return hashlib.sha256(json.dumps(material, ensure_ascii=False, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def submission_hash(request: ScoringRequest) -> str:
+    return _digest([request.programming_language, request.problem_description, request.student_code])
+
+
+def category_hash(category: RubricCategory) -> str:
+    return _digest([category.name, [[b.min_score, b.max_score, b.description] for b in category.bands]])
+
+
+def penalty_hash(rule: PenaltyRule) -> str:
+    return _digest([rule.code, rule.description])
+
+
+def rubric_hash(rubric: Rubric) -> str:
+    """
+    Hash of the parts of a rubric the LLM grades against: category names and
+    bands, penalty codes and descriptions. Weights and penalty points are left
+    out, so changing them keeps stored payloads usable.
+    """
+    return _digest([
+        [[c.name, [[b.min_score, b.max_score, b.description] for b in c.bands]] for c in rubric.categories],
+        [[p.code, p.description] for p in rubric.penalties],
+    ])
+
+
+@lru_cache(maxsize=256)
+def _hashes(categories: tuple, penalties: tuple) -> tuple[str, dict[str, str], dict[str, str]]:
+    category_material = [[name, [list(band) for band in bands]] for name, bands in categories]
+    penalty_material = [list(penalty) for penalty in penalties]
+    return (
+        _digest([category_material, penalty_material]),
+        {material[0]: _digest(material) for material in category_material},
+        {material[0]: _digest(material) for material in penalty_material},
+    )
+
+
+def rubric_hashes(rubric: Rubric) -> tuple[str, dict[str, str], dict[str, str]]:
+    """
+    rubric_hash, category_hash by name and penalty_hash by code, cached by
+    content: every submission of a batch carries its own copy of one rubric.
+    Treat the returned dicts as read-only.
+    """
+    return _hashes(
+        tuple((c.name, tuple((b.min_score, b.max_score, b.description) for b in c.bands)) for c in rubric.categories),
+        tuple((p.code, p.description) for p in rubric.penalties),
+    )
+
+
+def payload_of(response: ScoringResponse) -> LLMScoringPayload:
+    """The validated LLM payload behind a response (for cascades and ensembles, the aggregated one)."""
+    # Band decisions and penalties are the same model types on both sides, so they are shared, not copied
+    return LLMScoringPayload(
+        category_results=[
+            LLMCategoryResult(category_name=c.category_name, raw_score=c.raw_score, band_decision=c.band_decision)
+            for c in response.category_results
+        ],
+        penalties_applied=response.penalties_applied,
+        feedback=response.feedback,
+    )
+
+
+def encode_record(request: ScoringRequest, response: ScoringResponse) -> bytes:
+    """The stored form of a response's payload: JSON of a StoredPayload."""
+    graded, categories, penalties = rubric_hashes(request.rubric)
+    record = StoredPayload(
+        rubric_hash=graded,
+        category_hashes=categories,
+        penalty_hashes=penalties,
+        provider_used=response.provider_used,
+        student_id=response.student_id,
+        submission_hash=submission_hash(request),
+        payload=payload_of(response),
+    )
+    return record.model_dump_json().encode("utf-8")
+
+
+async def save(request: ScoringRequest, response: ScoringResponse, payload_id: Optional[str] = None) -> Optional[str]:
+    """
+    Keep the response's payload with the rubric hash; returns its payload_id,
+    or None when disabled or failing. Pass a stable `payload_id` where the same
+    result may be saved again (bulk jobs are re-read on every poll).
+    """
+    ttl = get_env_payload_store_ttl()
+    if ttl <= 0:
+        return None
+    payload_id = payload_id or uuid.uuid4().hex
+    try:
+        await get_shared_state().set(f"payload:{payload_id}", encode_record(request, response), ttl=ttl)
+    except Exception as err:
+        logger.warning("Could not store payload for student_id=%s: %s", response.student_id, err)
+        return None
+    return payload_id
+
+
+async def load_many(payload_ids: list[str]) -> list[Optional[StoredPayload]]:
+    """Stored payloads in order; None for unknown, expired or unreadable ids."""
+    values = await get_shared_state().get_many([f"payload:{payload_id}" for payload_id in payload_ids])
+    records: list[Optional[StoredPayload]] = []
+    for payload_id, value in zip(payload_ids, values):
+        if value is None:
+            records.append(None)
+            continue
+        try:
+            records.append(StoredPayload.model_validate_json(value))
+        except ValidationError as err:
+            logger.warning("Unreadable stored payload %s: %s", payload_id, err)
+            records.append(None)
+    return records
+
+
+async def load(payload_id: str) -> Optional[StoredPayload]:
+    return (await load_many([payload_id]))[0]
+
+
+def mismatch(record: StoredPayload, request: ScoringRequest) -> Optional[str]:
+    """Why `record` was not graded from `request`'s submission; None when it was."""
+    if record.submission_hash != submission_hash(request):
+        return "code, problem or language differ from the stored submission"
+    if record.student_id is not None and request.student_id is not None and record.student_id != request.student_id:
+        return f"stored for student_id {record.student_id}"
+    return None
@@ -0,0 +1,49 @@
+from app.models.scoring.responses import LLMScoringPayload
+from app.models.scoring.rubric import Rubric
+from app.services.rescoring.payload_store import StoredPayload, rubric_hashes
+
+
+def changed_rubric(rubric: Rubric, record: StoredPayload) -> Rubric:
+    """
+    The part of `rubric` that `record` was not graded against: categories that
+    are new or whose bands changed, and penalty rules that are new or
+    reworded. Weights and penalty points do not count as changes.
+    """
+    _, categories, penalties = rubric_hashes(rubric)
+    return Rubric(
+        categories=[c for c in rubric.categories if record.category_hashes.get(c.name) != categories[c.name]],
+        penalties=[p for p in rubric.penalties if record.penalty_hashes.get(p.code) != penalties[p.code]],
+    )
+
+
+def merge_payloads(rubric: Rubric, changed: Rubric, stored: LLMScoringPayload, fresh: LLMScoringPayload) -> LLMScoringPayload:
+    """
+    One payload for the whole of `rubric`: `fresh` answers for the changed
+    categories and penalties, `stored` ones for the rest, in rubric order.
+    Categories and penalties the rubric no longer has are dropped, as is
+    anything `fresh` says about parts that did not change. Stored penalties
+    take the rubric's current points, as in a re-score. The stored feedback
+    is kept, since it covers the whole submission.
+    """
+    changed_categories = {c.name for c in changed.categories}
+    changed_penalties = {p.code for p in changed.penalties}
+    stored_by_name = {c.category_name: c for c in stored.category_results}
+    fresh_by_name = {c.category_name: c for c in fresh.category_results}
+
+    category_results = []
+    for category in rubric.categories:
+        source = fresh_by_name if category.name in changed_categories else stored_by_name
+        if category.name in source:
+            category_results.append(source[category.name])
+
+    points = {p.code: p.points for p in rubric.penalties}
+    penalties = [
+        p.model_copy(update={"points": points[p.code]})
+        for p in stored.penalties_applied if p.code in points and p.code not in changed_penalties
+    ]
+    penalties += [p for p in fresh.penalties_applied if p.code in changed_penalties]
+    return LLMScoringPayload(
+        category_results=category_results,
+        penalties_applied=penalties,
+        feedback=stored.feedback or fresh.feedback,
+    )
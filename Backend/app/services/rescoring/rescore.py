@@ -0,0 +1,78 @@
+import logging
+from typing import Optional
+
+import numpy as np
+
+from app.models.batch_scoring.responses import BatchScoringError, BatchScoringResponse
+from app.models.scoring.responses import CategoryResult, ScoringResponse
+from app.models.scoring.rubric import Rubric
+from app.services.rescoring.payload_store import StoredPayload, rubric_hash
+
+
+logger = logging.getLogger(__name__)
+
+
+def rescore_payloads(rubric: Rubric, payload_ids: list[str], records: list[Optional[StoredPayload]]) -> BatchScoringResponse:
+    """
+    Recompute category weights, penalty points and total_score for stored
+    payloads under `rubric`, without calling any LLM. Payloads graded against
+    other bands or penalty rules (a different rubric hash) are reported as
+    errors: they need a regrade, not a re-weighting.
+    """
+    expected = rubric_hash(rubric)
+    errors: list[BatchScoringError] = []
+    usable: list[tuple[int, StoredPayload]] = []
+    for index, record in enumerate(records):
+        if record is None:
+            errors.append(BatchScoringError(index=index, detail=f"No stored payload for payload_id {payload_ids[index]}"))
+        elif record.rubric_hash != expected:
+            errors.append(BatchScoringError(
+                index=index, student_id=record.student_id,
+                detail="Rubric bands or penalty rules changed since scoring; regrade needed",
+            ))
+        else:
+            usable.append((index, record))
+
+    categories = {c.name: i for i, c in enumerate(rubric.categories)}
+    weights = np.array([c.weight for c in rubric.categories], dtype=np.float64)
+    points = {p.code: p.points for p in rubric.penalties}
+
+    # One row per payload: raw scores by rubric category, plus what falls outside the matrix
+    scores = np.zeros((len(usable), len(categories)), dtype=np.float64)
+    extra = np.zeros(len(usable), dtype=np.float64)
+    for row, (_, record) in enumerate(usable):
+        for result in record.payload.category_results:
+            column = categories.get(result.category_name)
+            if column is None:
+                extra[row] += result.raw_score  # unknown categories weigh 1.0, as in single scoring
+            else:
+                scores[row, column] = result.raw_score
+        extra[row] += sum(points.get(p.code, p.points) for p in record.payload.penalties_applied)
+    totals = np.round(np.clip(scores @ weights + extra, 0.0, 10.0), 2)
+
+    category_weights = {c.name: c.weight for c in rubric.categories}
+    results: list[ScoringResponse] = []
+    for row, (index, record) in enumerate(usable):
+        payload = record.payload
+        results.append(ScoringResponse(
+            category_results=[
+                CategoryResult(
+                    category_name=c.category_name,
+                    raw_score=c.raw_score,
+                    weight=category_weights.get(c.category_name, 1.0),
+                    band_decision=c.band_decision,
+                )
+                for c in payload.category_results
+            ],
+            penalties_applied=[
+                p if points.get(p.code, p.points) == p.points else p.model_copy(update={"points": points[p.code]})
+                for p in payload.penalties_applied
+            ],
+            provider_used=record.provider_used,
+            feedback=payload.feedback,
+            total_score=float(totals[row]),
+            student_id=record.student_id,
+            payload_id=payload_ids[index],
+        ))
+    logger.info("Re-scored %d stored payloads; %d not usable", len(results), len(errors))
+    return BatchScoringResponse(results=results, total_processed=len(results), errors=errors)
@@ -0,0 +1,7 @@
+from .minhash import tokenize, minhash_signatures, near_duplicate_pairs, cluster_near_duplicates
+from .dedupe import build_similarity_report, plan_reuse
+
+__all__ = [
+    "tokenize", "minhash_signatures", "near_duplicate_pairs", "cluster_near_duplicates",
+    "build_similarity_report", "plan_reuse",
+]
@@ -0,0 +1,97 @@
+import hashlib
+from typing import Sequence
+
+from app.models.batch_scoring.requests import BatchScoringRequest
+from app.models.batch_scoring.responses import SimilarityCluster, SimilarityMember, SimilarityReport
+from app.models.scoring.requests import ScoringRequest
+from app.services.similarity.minhash import cluster_near_duplicates
+
+
+def _scoring_key(submission: ScoringRequest) -> tuple:
+    """Submissions may only share a result when everything but the code is identical."""
+    return (
+        submission.llm_provider,
+        submission.model,
+        submission.programming_language,
+        submission.problem_description,
+        submission.rubric.model_dump_json(),
+        submission.precheck,
+        tuple(t.model_dump_json() for t in submission.test_cases),
+        tuple(t.model_dump_json() for t in submission.escalation),
+        submission.ensemble.model_dump_json() if submission.ensemble else None,
+        submission.regrade_from,
+    )
+
+
+def _problem_key(submission: ScoringRequest) -> tuple:
+    return (submission.programming_language, submission.problem_description)
+
+
+def _cluster_groups(
+    submissions: Sequence[ScoringRequest], threshold: float, key
+) -> list[list[tuple[int, float]]]:
+    """Cluster near-duplicates separately inside each group of comparable submissions."""
+    groups: dict[tuple, list[int]] = {}
+    for index, submission in enumerate(submissions):
+        groups.setdefault(key(submission), []).append(index)
+
+    clusters: list[list[tuple[int, float]]] = []
+    for indexes in groups.values():
+        if len(indexes) < 2:
+            continue
+        codes = [submissions[i].student_code for i in indexes]
+        languages = [submissions[i].programming_language for i in indexes]
+        for cluster in cluster_near_duplicates(codes, threshold=threshold, languages=languages):
+            clusters.append([(indexes[pos], sim) for pos, sim in cluster])
+    clusters.sort(key=lambda c: c[0][0])
+    return clusters
+
+
+def build_similarity_report(request: BatchScoringRequest) -> SimilarityReport:
+    """Near-duplicate clusters among submissions to the same problem, regardless of rubric or model."""
+    submissions = request.submissions
+
+    def member(index: int, similarity: float) -> SimilarityMember:
+        return SimilarityMember(index=index, student_id=submissions[index].student_id, similarity=round(similarity, 4))
+
+    clusters = [
+        SimilarityCluster(
+            representative=member(*cluster[0]),
+            members=[member(i, sim) for i, sim in cluster[1:]],
+        )
+        for cluster in _cluster_groups(submissions, request.similarity_threshold, _problem_key)
+    ]
+    return SimilarityReport(
+        total_submissions=len(submissions),
+        threshold=request.similarity_threshold,
+        duplicates=sum(len(c.members) for c in clusters),
+        clusters=clusters,
+    )
+
+
+def _spot_checked(index: int, rate: float) -> bool:
+    """Deterministic sample: the same submission is always (or never) spot-checked at a given rate."""
+    if rate <= 0:
+        return False
+    digest = hashlib.blake2b(str(index).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 < rate
+
+
+def plan_reuse(request: BatchScoringRequest) -> dict[int, int]:
+    """
+    Map each submission whose result can be copied to its cluster representative.
+
+    Only submissions with identical provider, model, rubric, problem and checks are
+    clustered together; a share of duplicates (spot_check_rate) is still scored.
+    Clusters are chained (A~B and B~C puts C with A), so a member only reuses the
+    representative's result when its own similarity to it reaches the threshold.
+    """
+    reuse: dict[int, int] = {}
+    for cluster in _cluster_groups(request.submissions, request.similarity_threshold, _scoring_key):
+        representative = cluster[0][0]
+        for index, similarity in cluster[1:]:
+            if similarity < request.similarity_threshold:
+                continue
+            if not _spot_checked(index, request.spot_check_rate):
+                reuse[index] = representative
+    return reuse
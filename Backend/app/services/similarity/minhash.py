@@ -0,0 +1,180 @@
+import itertools
+import re
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+# Identifiers, numbers, or any single non-space character
+_TOKEN = re.compile(r"[A-Za-z_]\w*|\d+|\S")
+_C_COMMENTS = re.compile(r"//[^\n]*|/\*[\s\S]*?\*/")
+_HASH_COMMENTS = re.compile(r"#[^\n]*")
+
+_SHINGLE_BASE = np.uint64(1_000_003)
+_BAND_BASE = np.uint64(0x9E3779B97F4A7C15)
+
+# Upper bound on (shingles x permutations) cells hashed at once, to cap memory
+_CHUNK_CELLS = 8_000_000
+
+
+def tokenize(code: str, programming_language: str = "cpp") -> list[str]:
+    """Split source into tokens with comments removed; whitespace and layout are ignored."""
+    pattern = _HASH_COMMENTS if programming_language == "python" else _C_COMMENTS
+    return _TOKEN.findall(pattern.sub(" ", code or ""))
+
+
+def _shingle_hashes(docs: Sequence[list[str]], k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return (hashes of all k-token shingles concatenated, start offset of each document)."""
+    lengths = np.fromiter(map(len, docs), dtype=np.int64, count=len(docs))
+    # str hashes are stable within one process, which is all a single signature run needs
+    ids = np.fromiter(map(hash, itertools.chain.from_iterable(docs)), dtype=np.int64, count=int(lengths.sum())).view(np.uint64)
+
+    # Rolling polynomial hash over every window of k tokens in the concatenated stream
+    n = len(ids)
+    window = min(k, max(1, n))
+    rolled = np.zeros(max(0, n - window + 1), dtype=np.uint64)
+    for j in range(window):
+        rolled = rolled * _SHINGLE_BASE + ids[j:n - window + 1 + j]
+
+    # Keep windows that lie inside one document; short documents hash as a single shingle
+    doc_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    shingles: list[np.ndarray] = []
+    counts = np.zeros(len(docs), dtype=np.int64)
+    for i, (start, length) in enumerate(zip(doc_starts, lengths)):
+        if length >= k:
+            part = rolled[start:start + length - k + 1]
+        elif length > 0:
+            part = np.array([hash(tuple(ids[start:start + length].tolist()))], dtype=np.int64).view(np.uint64)
+        else:
+            part = np.zeros(1, dtype=np.uint64)
+        shingles.append(part)
+        counts[i] = len(part)
+
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return np.concatenate(shingles) if shingles else np.zeros(0, dtype=np.uint64), offsets
+
+
+def minhash_signatures(docs: Sequence[list[str]], num_perm: int = 128, k: int = 5, seed: int = 1) -> np.ndarray:
+    """
+    MinHash signatures (len(docs) x num_perm, uint32) of token k-shingle sets.
+
+    All shingles of all documents are hashed with num_perm universal hash functions
+    in large vectorized chunks (one row per permutation, so reductions run over
+    contiguous memory) and reduced per document with np.minimum.reduceat.
+    """
+    if not docs:
+        return np.zeros((0, num_perm), dtype=np.uint32)
+    hashes64, offsets = _shingle_hashes(docs, k)
+    # Fold to 32 bits; x -> a*x + b (mod 2^32) with odd a is a permutation of the 32-bit universe
+    hashes = ((hashes64 >> np.uint64(32)) ^ hashes64).astype(np.uint32)
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64).astype(np.uint32) | np.uint32(1)
+    b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64).astype(np.uint32)
+
+    signatures = np.empty((num_perm, len(docs)), dtype=np.uint32)
+    ends = np.append(offsets[1:], len(hashes))
+    per_chunk = max(1, _CHUNK_CELLS // num_perm)
+    doc = 0
+    while doc < len(docs):
+        # Take whole documents until the chunk is full
+        last = int(np.searchsorted(ends, offsets[doc] + per_chunk, side="right"))
+        last = max(last, doc + 1)
+        lo, hi = offsets[doc], ends[last - 1]
+        permuted = a[:, None] * hashes[None, lo:hi] + b[:, None]
+        signatures[:, doc:last] = np.minimum.reduceat(permuted, offsets[doc:last] - lo, axis=1)
+        doc = last
+    return np.ascontiguousarray(signatures.T)
+
+
+def lsh_params(num_perm: int, threshold: float) -> tuple[int, int]:
+    """Pick (bands, rows) with bands * rows == num_perm whose S-curve midpoint is closest to threshold."""
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+def near_duplicate_pairs(signatures: np.ndarray, threshold: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Candidate pairs from LSH banding, verified by estimated Jaccard similarity.
+
+    Returns (left indexes, right indexes, similarities) for pairs at or above threshold.
+    """
+    n, num_perm = signatures.shape
+    if n < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    bands, rows = lsh_params(num_perm, threshold)
+    sig64 = signatures.astype(np.uint64)
+
+    lefts: list[np.ndarray] = []
+    rights: list[np.ndarray] = []
+    for band in range(bands):
+        block = sig64[:, band * rows:(band + 1) * rows]
+        keys = np.zeros(n, dtype=np.uint64)
+        for col in range(rows):
+            keys = keys * _BAND_BASE + block[:, col]
+        order = np.argsort(keys, kind="stable")
+        same = keys[order[1:]] == keys[order[:-1]]
+        # Chain neighbours inside each bucket; union-find makes the bucket one component
+        lefts.append(order[:-1][same])
+        rights.append(order[1:][same])
+
+    left = np.concatenate(lefts)
+    right = np.concatenate(rights)
+    if len(left) == 0:
+        return left, right, np.zeros(0)
+    pairs = np.unique(np.stack([np.minimum(left, right), np.maximum(left, right)], axis=1), axis=0)
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    keep = similarity >= threshold
+    return pairs[keep, 0], pairs[keep, 1], similarity[keep]
+
+
+def cluster_near_duplicates(
+    codes: Sequence[str],
+    threshold: float = 0.85,
+    languages: Optional[Sequence[str]] = None,
+    num_perm: int = 128,
+    k: int = 5,
+) -> list[list[tuple[int, float]]]:
+    """
+    Group indexes of near-duplicate submissions (estimated Jaccard >= threshold).
+
+    Returns clusters with at least two members as (index, similarity to medoid)
+    lists; the first entry is the medoid, the most central member of the cluster.
+    """
+    docs = [tokenize(code, languages[i] if languages else "cpp") for i, code in enumerate(codes)]
+    signatures = minhash_signatures(docs, num_perm=num_perm, k=k)
+    left, right, _ = near_duplicate_pairs(signatures, threshold)
+
+    parent = list(range(len(docs)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for l, r in zip(left.tolist(), right.tolist()):
+        root_l, root_r = find(l), find(r)
+        if root_l != root_r:
+            parent[max(root_l, root_r)] = min(root_l, root_r)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(docs)):
+        groups.setdefault(find(i), []).append(i)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        block = signatures[members]
+        # Medoid: the member agreeing with the most others, counted per permutation column
+        agreement = np.zeros(len(members))
+        for column in block.T:
+            _, inverse, counts = np.unique(column, return_inverse=True, return_counts=True)
+            agreement += counts[inverse]
+        medoid_pos = int(np.argmax(agreement))
+        similarity = (block == block[medoid_pos]).mean(axis=1)
+        medoid = members[medoid_pos]
+        clusters.append([(medoid, 1.0)] + [(m, float(similarity[i])) for i, m in enumerate(members) if m != medoid])
+    clusters.sort(key=lambda c: c[0][0])
+    return clusters
@@ -0,0 +1,63 @@
+"""
+Round-trip a class through bulk mode (/v1/batches) against the mock LLM server.
+
+Run from Backend/:
+    python -m benchmarks.bulk_roundtrip --submissions 500 --batch-delay-ms 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.load_test import PROVIDER_URL_ENV, mock_server
+from benchmarks.mock_llm_server import add_mock_arguments
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", choices=["openai", "deepseek", "grok"], default="openai")
+    parser.add_argument("--submissions", type=int, default=500)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    with mock_server(args.port, args) as base:
+        url_env, model_env, template = PROVIDER_URL_ENV[args.provider]
+        os.environ[url_env] = template.format(base=base)
+        os.environ[model_env] = "bench-model"
+        os.environ.setdefault(f"{args.provider.upper()}_API_KEY", "mock-key")
+
+        from app.main import create_app
+
+        codes = sample_codes()
+        body = {"submissions": [build_request_body(args.provider, codes[i % len(codes)], f"s{i}")
+                                for i in range(args.submissions)]}
+
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            started = time.perf_counter()
+            created = (await client.post("/batch-score/bulk", json=body)).raise_for_status().json()
+            submitted = time.perf_counter() - started
+            polls = 0
+            while True:
+                polls += 1
+                status = (await client.get(f"/batch-score/bulk/{args.provider}/{created['job_id']}")).raise_for_status().json()
+                if status["results"] is not None:
+                    break
+                await asyncio.sleep(args.poll_interval)
+            elapsed = time.perf_counter() - started
+
+    results = status["results"]
+    print(f"provider={args.provider} job={created['job_id']} status={status['status']} submissions={args.submissions}")
+    print(f"submit_s={submitted:.3f} total_s={elapsed:.3f} polls={polls} "
+          f"scored={results['total_processed']} errors={len(results['errors'])}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
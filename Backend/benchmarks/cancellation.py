@@ -0,0 +1,125 @@
+"""
+Does cancellation reach the LLM server?
+
+Starts the mock LLM server and the real app (uvicorn, so client disconnects
+are real), then runs three scenarios against Ollama-shaped /score and
+/batch-score calls, each with distinct prompts so nothing is served from the
+result cache:
+
+- abort:    the client gives up after --client-timeout-s (closed tab, aborted fetch)
+- deadline: the client sends X-Request-Timeout and waits for the answer
+- batch:    one /batch-score with X-Request-Timeout; late items become errors
+
+For each it reports what the client saw and the generations the mock server
+finished versus aborted. With streaming on (LLM_STREAM, default) abandoned
+calls show up as aborted; with --no-stream they run to completion, which is
+what a local runtime spends GPU time on for nobody.
+
+Run from Backend/:
+    python -m benchmarks.cancellation --requests 8 --latency-ms 3000
+    python -m benchmarks.cancellation --requests 8 --latency-ms 3000 --no-stream
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.load_test import mock_server
+from benchmarks.mock_llm_server import add_mock_arguments
+from benchmarks.multi_worker import start_app
+
+
+def distinct_bodies(count: int, tag: str) -> list[dict]:
+    codes = sample_codes()
+    return [build_request_body("ollama", codes[i % len(codes)] + f"\n// {tag} {i} {time.time_ns()}\n",
+                               student_id=f"{tag}-{i}") for i in range(count)]
+
+
+async def abort_scenario(app_url: str, bodies: list[dict], client_timeout: float) -> str:
+    async def call(client: httpx.AsyncClient, body: dict) -> bool:
+        try:
+            await client.post("/score", json=body)
+            return False
+        except httpx.TimeoutException:
+            return True
+
+    async with httpx.AsyncClient(base_url=app_url, timeout=client_timeout) as client:
+        gave_up = await asyncio.gather(*(call(client, body) for body in bodies))
+    return f"client gave up on {sum(gave_up)}/{len(bodies)}"
+
+
+async def deadline_scenario(app_url: str, bodies: list[dict], timeout: float) -> str:
+    headers = {"X-Request-Timeout": str(timeout)}
+    async with httpx.AsyncClient(base_url=app_url, timeout=None) as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/score", json=body, headers=headers) for body in bodies))
+        elapsed = time.perf_counter() - started
+    codes = sorted({r.status_code for r in responses})
+    return f"status {codes} after {elapsed:.2f}s"
+
+
+async def batch_scenario(app_url: str, bodies: list[dict], timeout: float) -> str:
+    headers = {"X-Request-Timeout": str(timeout)}
+    async with httpx.AsyncClient(base_url=app_url, timeout=None) as client:
+        started = time.perf_counter()
+        response = await client.post("/batch-score", json={"submissions": bodies}, headers=headers)
+        elapsed = time.perf_counter() - started
+    data = response.json()
+    return f"status {response.status_code}, {data['total_processed']} scored, {len(data['errors'])} cut off after {elapsed:.2f}s"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--client-timeout-s", type=float, default=0.5)
+    parser.add_argument("--deadline-s", type=float, default=1.0, help="X-Request-Timeout sent by the client")
+    parser.add_argument("--no-stream", action="store_true", help="LLM_STREAM=false: plain request/response calls")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--app-port", type=int, default=8100)
+    add_mock_arguments(parser)
+    parser.set_defaults(latency_ms=3000, jitter_ms=0)
+    args = parser.parse_args()
+
+    with mock_server(args.port, args) as base:
+        env = {
+            **os.environ,
+            "OLLAMA_URL": base,
+            "OLLAMA_MODEL": "bench-model",
+            "LLM_STREAM": "false" if args.no_stream else "true",
+            "MAX_CONCURRENCY": str(max(2, args.requests // 2)),
+            "MODEL_WARMUP": "false",
+            "SHARED_STATE_BACKEND": "sqlite",
+            "SHARED_STATE_PATH": os.path.join(tempfile.mkdtemp(), "state.db"),
+            "LOG_LEVEL": "WARNING",
+        }
+        app = start_app(1, args.app_port, env)
+        app_url = f"http://127.0.0.1:{args.app_port}"
+        scenarios = {
+            "abort": lambda: abort_scenario(app_url, distinct_bodies(args.requests, "abort"), args.client_timeout_s),
+            "deadline": lambda: deadline_scenario(app_url, distinct_bodies(args.requests, "deadline"), args.deadline_s),
+            "batch": lambda: batch_scenario(app_url, distinct_bodies(args.requests * 2, "batch"), args.deadline_s),
+        }
+        try:
+            # First call pays for lazy imports and the state store; keep it out of the scenarios
+            httpx.post(f"{app_url}/score", json=distinct_bodies(1, "warm-up")[0], timeout=None).raise_for_status()
+            print(f"stream={not args.no_stream} latency_ms={args.latency_ms} requests={args.requests}")
+            print(f"{'scenario':<9} {'started':>8} {'completed':>9} {'aborted':>8}  client")
+            for name, run in scenarios.items():
+                before = httpx.get(f"{base}/health").json()
+                seen = asyncio.run(run())
+                # Let any generation nobody cancelled run to its end before counting
+                time.sleep(args.latency_ms / 1000 + 0.5)
+                after = httpx.get(f"{base}/health").json()
+                print(f"{name:<9} {after['requests'] - before['requests']:>8} {after['completed'] - before['completed']:>9} "
+                      f"{after['aborted'] - before['aborted']:>8}  {seen}")
+        finally:
+            app.terminate()
+            app.wait(timeout=20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Model cascade: a cheap model first, the expensive one only when in doubt.
+
+Starts the mock LLM server with a fast "small" model that gives a share of
+sloppy answers (a raw_score outside the band it picked) and a slow, careful
+"large" model, then scores the same submissions twice:
+
+- large:   every submission goes to the large model
+- cascade: the small model scores first and escalates to the large one
+           when its result fails the uncertainty checks
+
+It reports mean and p90 latency per submission, the share escalated, and the
+mock's total generation time per model, which stands in for GPU time / cost.
+
+Run from Backend/:
+    python -m benchmarks.cascade --submissions 40 --model-latency small=150,large=1500 --model-sloppy small=0.2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.load_test import mock_server
+from benchmarks.loop_lag import percentile
+from benchmarks.mock_llm_server import add_mock_arguments
+
+
+async def run_mode(mode: str, base: str, submissions: int, concurrency: int) -> dict:
+    # Imported late so the settings in main() are in place
+    from app.models.scoring.requests import ScoringRequest
+    from app.services.llm_services.llm_common_service import LLMCommonService
+
+    codes = sample_codes()
+    tag = f"{mode}-{time.time_ns()}"
+    requests = []
+    for i in range(submissions):
+        body = build_request_body("ollama", codes[i % len(codes)] + f"\n// {tag} {i}\n", f"s{i}",
+                                  model="large" if mode == "large" else "small")
+        if mode == "cascade":
+            body["escalation"] = [{"llm_provider": "ollama", "model": "large"}]
+        requests.append(ScoringRequest.model_validate(body))
+    service = LLMCommonService.get_llm_service(requests[0].llm_provider)
+
+    before = httpx.get(f"{base}/health").json()["generation_ms"]
+    latencies: list[float] = []
+    escalated = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def score(request: ScoringRequest) -> None:
+        nonlocal escalated
+        async with gate:
+            started = time.perf_counter()
+            response = await service.generate_response(request)
+            latencies.append(time.perf_counter() - started)
+        if response.cascade is not None and response.cascade.tier > 0:
+            escalated += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(score(r) for r in requests))
+    wall = time.perf_counter() - started
+    after = httpx.get(f"{base}/health").json()["generation_ms"]
+    spent = {model: after.get(model, 0.0) - before.get(model, 0.0) for model in ("small", "large")}
+    return {
+        "mode": mode,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "escalated_pct": escalated / submissions * 100,
+        "small_gen_s": spent["small"] / 1000,
+        "large_gen_s": spent["large"] / 1000,
+        "wall_s": wall,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--margin", type=float, default=0, help="CASCADE_BOUNDARY_MARGIN")
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    parser.set_defaults(jitter_ms=0, model_latency="small=150,large=1500", model_sloppy="small=0.2")
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    with mock_server(args.port, args) as base:
+        os.environ.update({
+            "OLLAMA_URL": base,
+            "LLM_MAX_INFLIGHT": str(args.concurrency),
+            "CASCADE_BOUNDARY_MARGIN": str(args.margin),
+            "RESULT_CACHE_TTL": "0",
+            "SHARED_STATE_BACKEND": "memory",
+        })
+        rows = [await run_mode(mode, base, args.submissions, args.concurrency) for mode in ("large", "cascade")]
+
+    print(f"submissions={args.submissions} concurrency={args.concurrency} latency={args.model_latency} "
+          f"sloppy={args.model_sloppy} margin={args.margin:g}")
+    columns = ["mode", "mean_ms", "p90_ms", "escalated_pct", "small_gen_s", "large_gen_s", "wall_s"]
+    print(" ".join(f"{c:>13}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>13.1f}" if isinstance(row[c], float) else f"{row[c]:>13}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
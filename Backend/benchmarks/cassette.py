@@ -0,0 +1,116 @@
+"""
+Recording LLM calls once and replaying them offline.
+
+Scores --submissions against the mock LLM server with LLM_CASSETTE=record,
+stops the server, then scores the same submissions again from the cassette:
+
+- live:    against the mock, recording every call
+- replay:  strict replay, no server running, answers at once
+- paced:   strict replay with LLM_CASSETTE_LATENCY=recorded
+- fuzzy:   fuzzy replay of slightly edited submissions (a comment added)
+- strict:  the same edited submissions with strict matching; each one misses
+
+It reports wall time, how many submissions scored or failed, and whether the
+replayed results match the live ones exactly.
+
+Run from Backend/:
+    python -m benchmarks.cassette --submissions 20 --latency-ms 800
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.load_test import mock_server
+from benchmarks.mock_llm_server import add_mock_arguments
+
+
+def _fingerprint(response) -> str:
+    return response.model_dump_json(include={"category_results", "penalties_applied", "feedback", "total_score"})
+
+
+async def run_mode(mode: str, bodies: list[dict], inflight: int, reference: list) -> tuple[dict, list]:
+    # Imported late so the settings in main() are in place
+    from app.models.scoring.requests import ScoringRequest
+    from app.services.llm_services.llm_common_service import LLMCommonService
+
+    service = LLMCommonService.get_llm_service(ScoringRequest.model_validate(bodies[0]).llm_provider)
+    gate = asyncio.Semaphore(inflight)
+
+    async def score(body: dict):
+        async with gate:
+            try:
+                return await service.generate_response(ScoringRequest.model_validate(body))
+            except Exception as err:
+                return err
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(score(b) for b in bodies))
+    wall = time.perf_counter() - started
+    scored = [o for o in outcomes if not isinstance(o, Exception)]
+    same = "-"
+    if reference and len(scored) == len(outcomes):
+        same = "yes" if [_fingerprint(o) for o in outcomes] == [_fingerprint(r) for r in reference] else "no"
+    return {
+        "mode": mode,
+        "wall_s": wall,
+        "scored": len(scored),
+        "failed": len(outcomes) - len(scored),
+        "identical": same,
+    }, outcomes
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=20)
+    parser.add_argument("--inflight", type=int, default=8, help="LLM_MAX_INFLIGHT")
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    parser.set_defaults(latency_ms=800, jitter_ms=200)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    codes = sample_codes()
+    bodies = [build_request_body("ollama", codes[i % len(codes)] + f"\n// {i}\n", f"s{i}") for i in range(args.submissions)]
+    edited = [build_request_body("ollama", codes[i % len(codes)] + f"\n// {i}\n// edited\n", f"s{i}") for i in range(args.submissions)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "LLM_MAX_INFLIGHT": str(args.inflight),
+            "RESULT_CACHE_TTL": "0",
+            "SHARED_STATE_BACKEND": "memory",
+            "LLM_CASSETTE_DIR": tmp,
+        })
+        rows = []
+        with mock_server(args.port, args) as base:
+            os.environ.update({"OLLAMA_URL": base, "LLM_CASSETTE": "record"})
+            row, live = await run_mode("live", bodies, args.inflight, [])
+            rows.append(row)
+
+        # The mock is gone: anything not answered from the cassette fails to connect
+        os.environ["LLM_CASSETTE"] = "replay"
+        for mode, settings, batch in (
+            ("replay", {"LLM_CASSETTE_MATCH": "strict", "LLM_CASSETTE_LATENCY": "none"}, bodies),
+            ("paced", {"LLM_CASSETTE_MATCH": "strict", "LLM_CASSETTE_LATENCY": "recorded"}, bodies),
+            ("fuzzy", {"LLM_CASSETTE_MATCH": "fuzzy", "LLM_CASSETTE_LATENCY": "none"}, edited),
+            ("strict", {"LLM_CASSETTE_MATCH": "strict", "LLM_CASSETTE_LATENCY": "none"}, edited),
+        ):
+            os.environ.update(settings)
+            row, _ = await run_mode(mode, batch, args.inflight, live)
+            rows.append(row)
+        entries = len(list(Path(tmp).glob("*/*.json.gz")))
+
+    print(f"submissions={args.submissions} latency_ms={args.latency_ms} jitter_ms={args.jitter_ms} "
+          f"inflight={args.inflight} recorded={entries}")
+    columns = ["mode", "wall_s", "scored", "failed", "identical"]
+    print(" ".join(f"{c:>10}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>10.2f}" if isinstance(row[c], float) else f"{row[c]:>10}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+Self-consistency ensembles: k samples per submission, one after another vs
+concurrently, with and without early stopping.
+
+Starts the mock LLM server with latency jitter and a --consistency share of
+answers that agree on the prompt's bands, then scores the same submissions
+in each mode:
+
+- single:     one sample (the floor)
+- sequential: k samples awaited one after another, then aggregated
+- parallel:   k concurrent samples, all awaited (quorum = k)
+- early:      k concurrent samples, the rest cancelled once a majority agrees
+
+It reports latency per submission, LLM generations completed and aborted on
+the mock, and the mean spread of total_score between samples.
+
+Run from Backend/:
+    python -m benchmarks.ensemble --submissions 5 --samples 5 --latency-ms 1000 --jitter-ms 600 --consistency 0.8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.load_test import mock_server
+from benchmarks.loop_lag import percentile
+from benchmarks.mock_llm_server import add_mock_arguments
+
+
+async def run_mode(mode: str, base: str, submissions: int, samples: int) -> dict:
+    # Imported late so the settings in main() are in place
+    from app.models.scoring.requests import ScoringRequest
+    from app.services.llm_services.ensemble import aggregate
+    from app.services.llm_services.llm_base_service import sampling_scope
+    from app.services.llm_services.llm_common_service import LLMCommonService
+
+    codes = sample_codes()
+    tag = f"{mode}-{time.time_ns()}"
+    requests = []
+    for i in range(submissions):
+        body = build_request_body("ollama", codes[i % len(codes)] + f"\n// {tag} {i}\n", f"s{i}")
+        if mode in ("parallel", "early"):
+            body["ensemble"] = {"samples": samples, "quorum": samples if mode == "parallel" else None}
+        requests.append(ScoringRequest.model_validate(body))
+    service = LLMCommonService.get_llm_service(requests[0].llm_provider)
+
+    async def score(request: ScoringRequest) -> float:
+        """Score one submission; returns the spread of total_score between its samples."""
+        if mode == "sequential":
+            results = []
+            for i in range(samples):
+                with sampling_scope(0.7, seed=i):
+                    results.append(await service.generate_from_llm(request))
+            aggregate(results)
+            return max(r.total_score for r in results) - min(r.total_score for r in results)
+        response = await service.generate_response(request)
+        report = response.ensemble
+        return report.total_score_max - report.total_score_min if report is not None else 0.0
+
+    before = httpx.get(f"{base}/health").json()
+    latencies: list[float] = []
+    spreads: list[float] = []
+
+    async def timed(request: ScoringRequest) -> None:
+        started = time.perf_counter()
+        spreads.append(await score(request))
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(timed(r) for r in requests))
+    await asyncio.sleep(0.2)  # let the mock count the generations it saw cancelled
+    after = httpx.get(f"{base}/health").json()
+    return {
+        "mode": mode,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "completed": after["completed"] - before["completed"],
+        "aborted": after["aborted"] - before["aborted"],
+        "spread": sum(spreads) / len(spreads),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=5)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--modes", default="single,sequential,parallel,early")
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    parser.set_defaults(latency_ms=1000, jitter_ms=600, consistency=0.8)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    with mock_server(args.port, args) as base:
+        os.environ.update({
+            "OLLAMA_URL": base,
+            "LLM_MAX_INFLIGHT": str(args.submissions * args.samples),
+            "RESULT_CACHE_TTL": "0",
+            "SHARED_STATE_BACKEND": "memory",
+        })
+        rows = [await run_mode(mode, base, args.submissions, args.samples) for mode in args.modes.split(",")]
+
+    print(f"submissions={args.submissions} samples={args.samples} latency_ms={args.latency_ms} "
+          f"jitter_ms={args.jitter_ms} consistency={args.consistency}")
+    columns = ["mode", "mean_ms", "p90_ms", "completed", "aborted", "spread"]
+    print(" ".join(f"{c:>11}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>11.1f}" if isinstance(row[c], float) else f"{row[c]:>11}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
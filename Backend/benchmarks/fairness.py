@@ -0,0 +1,99 @@
+"""
+Fair sharing of one provider between tenants (courses).
+
+Starts the mock LLM server; a "big" tenant submits --big-batches batches of
+--big-size at once (e.g. every section of a course), and --small-delay-ms
+later a "small" tenant submits one --small-size batch. Each batch keeps at
+most MAX_CONCURRENCY calls queued, so it is several concurrent batches from
+one course that crowd everyone else out of a FIFO queue. All batches
+run at the same priority class. The scenario runs twice: without tenant ids
+(everyone in the default tenant, one FIFO queue) and with them (deficit
+round robin between tenants, optionally weighted with --weights, e.g.
+"small=2").
+
+It reports each batch's wall time and the total throughput, which fair
+queuing should not change.
+
+Run from Backend/:
+    python -m benchmarks.fairness --big-batches 4 --big-size 50 --small-size 10 --inflight 4 --latency-ms 300
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.load_test import mock_server
+from benchmarks.mock_llm_server import add_mock_arguments
+
+
+async def run_mode(tenants: bool, big_batches: int, big_size: int, small_size: int, small_delay: float) -> dict:
+    # Imported late so the settings in main() are in place
+    from app.models.batch_scoring.requests import BatchScoringRequest
+    from app.services.llm_services import scheduler
+    from app.services.llm_services.llm_common_service import LLMCommonService
+
+    scheduler._schedulers.clear()  # fresh counters and settings per mode
+    codes = sample_codes()
+
+    def batch(name: str, size: int, part: int = 0) -> BatchScoringRequest:
+        tag = f"{name}-{part}-{tenants}-{time.time_ns()}"
+        return BatchScoringRequest.model_validate({
+            "submissions": [build_request_body("ollama", codes[i % len(codes)] + f"\n// {tag} {i}\n", f"{name}{i}")
+                            for i in range(size)],
+            "tenant": name if tenants else None,
+        })
+
+    async def timed(requests: list[BatchScoringRequest], delay: float) -> float:
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(LLMCommonService.score_batch(r) for r in requests))
+        assert not any(r.errors for r in results), "mock errors; use --error-rate 0"
+        return time.perf_counter() - started
+
+    big = [batch("big", big_size, part) for part in range(big_batches)]
+    started = time.perf_counter()
+    big_s, small_s = await asyncio.gather(timed(big, 0), timed([batch("small", small_size)], small_delay))
+    total = time.perf_counter() - started
+    return {"tenants": "on" if tenants else "off", "big_s": big_s, "small_s": small_s,
+            "total_s": total, "items_per_s": (big_batches * big_size + small_size) / total}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--big-batches", type=int, default=4)
+    parser.add_argument("--big-size", type=int, default=50)
+    parser.add_argument("--small-size", type=int, default=10)
+    parser.add_argument("--small-delay-ms", type=float, default=1000)
+    parser.add_argument("--inflight", type=int, default=4, help="LLM_MAX_INFLIGHT")
+    parser.add_argument("--weights", default="", help="TENANT_WEIGHTS, e.g. small=2")
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    parser.set_defaults(latency_ms=300, jitter_ms=0)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    with mock_server(args.port, args) as base:
+        os.environ.update({
+            "OLLAMA_URL": base,
+            "OLLAMA_MODEL": "bench-model",
+            "LLM_MAX_INFLIGHT": str(args.inflight),
+            "MAX_CONCURRENCY": str(args.inflight * 4),
+            "TENANT_WEIGHTS": args.weights,
+            "RESULT_CACHE_TTL": "0",
+            "SHARED_STATE_BACKEND": "memory",
+        })
+        rows = [await run_mode(tenants, args.big_batches, args.big_size, args.small_size, args.small_delay_ms / 1000)
+                for tenants in (False, True)]
+
+    print(f"big={args.big_batches}x{args.big_size} small={args.small_size} inflight={args.inflight} latency_ms={args.latency_ms} "
+          f"weights={args.weights or '-'}")
+    columns = ["tenants", "big_s", "small_s", "total_s", "items_per_s"]
+    print(" ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>12.2f}" if isinstance(row[c], float) else f"{row[c]:>12}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""Shared request/response fixtures for the benchmarks."""
+import json
+from pathlib import Path
+
+from app.models.scoring.requests import ScoringRequest
+
+
+SAMPLES_DIR = Path(__file__).resolve().parents[2] / "Samples"
+
+CATEGORIES = ["correctness", "readability", "efficiency", "structure", "style", "testing"]
+
+PROBLEM_DESCRIPTION = (
+    "Đọc một ngày theo định dạng YYYY-MM-DD và in ra thứ tự của ngày đó trong năm. "
+    "Chú ý năm nhuận."
+)
+
+FALLBACK_CODE = "int gcd(int a,int b){while(b){int t=a%b;a=b;b=t;}return a;}"
+
+
+def sample_codes() -> list[str]:
+    """Return the student submissions from Samples/, or a tiny fallback if the folder is missing."""
+    codes = [p.read_text(encoding="utf-8") for p in sorted(SAMPLES_DIR.glob("*.txt"))]
+    return codes or [FALLBACK_CODE]
+
+
+def build_rubric(categories: list[str] = CATEGORIES) -> dict:
+    return {
+        "categories": [
+            {"name": name, "weight": round(1 / len(categories), 4),
+             "bands": [{"min_score": 0, "max_score": 4, "description": "Weak"},
+                       {"min_score": 5, "max_score": 8, "description": "Adequate"},
+                       {"min_score": 9, "max_score": 10, "description": "Strong"}]}
+            for name in categories
+        ],
+        "penalties": [{"code": "io_handling", "description": "Missing input validation", "points": -1}],
+    }
+
+
+def build_request_body(provider: str = "ollama", code: str = FALLBACK_CODE, student_id: str | None = None,
+                       model: str = "bench-model") -> dict:
+    body = {
+        "llm_provider": provider,
+        "problem_description": PROBLEM_DESCRIPTION,
+        "student_code": code,
+        "programming_language": "cpp",
+        "rubric": build_rubric(),
+        "language": "Vietnamese",
+        "model": model,
+    }
+    if student_id is not None:
+        body["student_id"] = student_id
+    return body
+
+
+def build_request(provider: str = "ollama", code: str = FALLBACK_CODE) -> ScoringRequest:
+    return ScoringRequest.model_validate(build_request_body(provider, code))
+
+
+def build_raw_response(rationale_chars: int = 400, categories: list[str] = CATEGORIES) -> str:
+    """A model-style answer: prose, a fenced JSON block, Vietnamese rationales."""
+    rationale = ("Mã nguồn xử lý đúng các trường hợp {\"a\": 1} cơ bản. " * (rationale_chars // 50 + 1))[:rationale_chars]
+    payload = {
+        "category_results": [
+            {"category_name": name, "raw_score": 7.5,
+             "band_decision": {"min_score": 5, "max_score": 8, "description": "Adequate", "rationale": rationale}}
+            for name in categories
+        ],
+        "penalties_applied": [{"code": "io_handling", "points": -1, "reason": "No validation"}],
+        "feedback": rationale,
+    }
+    return "Here is the result:\n```json\n" + json.dumps(payload, ensure_ascii=False, indent=2) + "\n```"
@@ -0,0 +1,207 @@
+"""
+Grading-history store: write cost and query latency at course-archive scale.
+
+Fills a fresh history database with --results synthetic results (--courses
+courses, --problems problems, --students students, spread over --days days,
+six categories each), written the way the recorder writes them: encoded in a
+worker thread, 64 per transaction. It reports what recording costs the
+event loop per result, the encode and insert cost per result, and the file
+size.
+
+Then it times the queries behind GET /history/results, /aggregates,
+/problems and /batches (median of --repeat runs, decoding included), on the
+indexed database and on a copy with the indexes dropped:
+
+- course:           one course's newest page
+- course_deep:      the same course, page --deep-page through the cursor
+- problem_range:    one problem within a score range
+- student:          one student's results across courses
+- date_range:       one course within a 7-day window
+- agg_course:       per-category aggregates of one course
+- agg_problem:      per-category aggregates of one problem in one course
+- problems:         problem list of one course
+- batches:          batch list of one course
+
+Run from Backend/:
+    python -m benchmarks.history --results 100000 --repeat 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from app.models.history.requests import HistoryFilter
+from app.models.scoring.requests import ScoringRequest
+from app.models.scoring.responses import CategoryBandDecision, CategoryResult, LLMUsage, PenaltyApplied, ScoringResponse
+from app.services.history import recorder
+from app.services.history.store import HistoryStore
+from benchmarks.fixtures import CATEGORIES, build_request_body, sample_codes
+
+
+BANDS = [(0, 4, "Weak"), (5, 8, "Adequate"), (9, 10, "Strong")]
+RATIONALE = "Bài làm đọc đúng dữ liệu đầu vào nhưng chưa xử lý trường hợp biên. " * 5
+
+
+def build_pending(args: argparse.Namespace) -> list:
+    rnd = random.Random(7)
+    codes = sample_codes()
+    requests = []
+    for problem in range(args.problems):
+        body = build_request_body("ollama", codes[problem % len(codes)])
+        body["problem_description"] = f"Bài {problem}: tính tổng các chữ số\n" + body["problem_description"]
+        requests.append(ScoringRequest.model_validate(body))
+    now = time.time()
+    pending = []
+    for i in range(args.results):
+        course = f"course-{rnd.randrange(args.courses)}"
+        problem = rnd.randrange(args.problems)
+        categories = []
+        for name in CATEGORIES:
+            low, high, text = rnd.choice(BANDS)
+            categories.append(CategoryResult(
+                category_name=name, raw_score=round(rnd.uniform(low, high), 1), weight=round(1 / len(CATEGORIES), 4),
+                band_decision=CategoryBandDecision(min_score=low, max_score=high, description=text, rationale=RATIONALE),
+            ))
+        response = ScoringResponse(
+            category_results=categories,
+            penalties_applied=[PenaltyApplied(code="io_handling", points=-1, reason="No validation")],
+            provider_used=requests[problem].llm_provider,
+            feedback=RATIONALE,
+            total_score=round(sum(c.raw_score * c.weight for c in categories) - 1, 2),
+            student_id=f"s{rnd.randrange(args.students)}",
+            usage=LLMUsage(model="bench-model", calls=1, prompt_tokens=rnd.randint(900, 1500), completion_tokens=rnd.randint(300, 700)),
+        )
+        pending.append(recorder._Pending(
+            request=requests[problem],
+            response=response,
+            created_at=now - rnd.uniform(0, args.days * 86400),
+            course=course,
+            # Batches of about 40 submissions per course and problem
+            batch_id=f"{course}-{problem}-{i // 4000}",
+            latency_ms=rnd.uniform(800, 4000),
+        ))
+    # Written in the order they were scored
+    pending.sort(key=lambda p: p.created_at)
+    return pending
+
+
+async def loop_cost(pending: list) -> float:
+    """Microseconds record() holds the event loop per result (the write itself happens off the loop)."""
+    sample = pending[:5000]
+    started = time.perf_counter()
+    for p in sample:
+        recorder.record(p.request, p.response, p.course, p.latency_ms / 1000)
+    cost = (time.perf_counter() - started) / len(sample) * 1e6
+    await recorder.close_history()
+    return cost
+
+
+def fill(store: HistoryStore, pending: list) -> tuple[float, float]:
+    """(encode, insert) microseconds per result, written 64 per transaction."""
+    encode = insert = 0.0
+    for start in range(0, len(pending), recorder._FLUSH_ROWS):
+        chunk = pending[start:start + recorder._FLUSH_ROWS]
+        t0 = time.perf_counter()
+        rows = [recorder._encode(p) for p in chunk]
+        t1 = time.perf_counter()
+        store.insert_many(rows)
+        encode += t1 - t0
+        insert += time.perf_counter() - t1
+    return encode / len(pending) * 1e6, insert / len(pending) * 1e6
+
+
+def queries(store: HistoryStore, pending: list, args: argparse.Namespace) -> dict:
+    probe = pending[len(pending) // 2]
+    course, problem = probe.course, recorder.problem_hash(probe.request.problem_description)
+    until = max(p.created_at for p in pending)
+
+    def deep() -> None:
+        cursor = None
+        for _ in range(args.deep_page):
+            cursor = store.page(HistoryFilter(course=course), args.page_size, cursor).next_cursor
+
+    week_end = datetime.fromtimestamp(until - 30 * 86400, tz=timezone.utc)
+    week_start = datetime.fromtimestamp(until - 37 * 86400, tz=timezone.utc)
+    return {
+        "course": lambda: store.page(HistoryFilter(course=course), args.page_size),
+        "course_deep": deep,
+        "problem_range": lambda: store.page(HistoryFilter(problem=problem, min_score=4, max_score=6), args.page_size),
+        "student": lambda: store.page(HistoryFilter(student_id=probe.response.student_id), args.page_size),
+        "date_range": lambda: store.page(HistoryFilter(course=course, since=week_start, until=week_end), args.page_size),
+        "agg_course": lambda: store.aggregates(HistoryFilter(course=course)),
+        "agg_problem": lambda: store.aggregates(HistoryFilter(course=course, problem=problem)),
+        "problems": lambda: store.problems(HistoryFilter(course=course)),
+        "batches": lambda: store.batches(HistoryFilter(course=course)),
+    }
+
+
+def time_queries(store: HistoryStore, pending: list, args: argparse.Namespace) -> dict[str, float]:
+    timings = {}
+    for name, query in queries(store, pending, args).items():
+        runs = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            query()
+            runs.append(time.perf_counter() - started)
+        timings[name] = statistics.median(runs) * 1000
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=100_000)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--problems", type=int, default=50)
+    parser.add_argument("--students", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--deep-page", type=int, default=20, help="page reached through the cursor in course_deep")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    pending = build_pending(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["GRADING_HISTORY_PATH"] = os.path.join(tmp, "loop.db")
+        record_us = asyncio.run(loop_cost(pending))
+
+        indexed_path = os.path.join(tmp, "history.db")
+        store = HistoryStore(indexed_path)
+        started = time.perf_counter()
+        encode_us, insert_us = fill(store, pending)
+        fill_s = time.perf_counter() - started
+        store.close()
+        size_mb = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp) if f.startswith("history.db")) / 2**20
+
+        plain_path = os.path.join(tmp, "plain.db")
+        shutil.copy(indexed_path, plain_path)
+        indexed = HistoryStore(indexed_path)
+        plain = HistoryStore(plain_path)
+        # Dropped after opening, which would create them again; the copy keeps only the primary keys
+        indexes = plain._select("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'results_%'", [])
+        for (index,) in indexes:
+            plain._conn.execute(f"DROP INDEX {index}")
+        with_index = time_queries(indexed, pending, args)
+        without_index = time_queries(plain, pending, args)
+        indexed.close()
+        plain.close()
+
+    print(f"results={args.results} courses={args.courses} problems={args.problems} students={args.students} "
+          f"categories={len(CATEGORIES)} page_size={args.page_size}")
+    print(f"record on loop: {record_us:.1f} us/result   encode: {encode_us:.1f} us/result   "
+          f"insert: {insert_us:.1f} us/result   fill: {fill_s:.1f} s   file: {size_mb:.1f} MiB")
+    columns = ["query", "indexed_ms", "no_index_ms", "speedup"]
+    print(" ".join(f"{c:>14}" for c in columns))
+    for name in with_index:
+        speedup = without_index[name] / with_index[name] if with_index[name] else 0.0
+        print(f"{name:>14} {with_index[name]:>14.2f} {without_index[name]:>14.2f} {speedup:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cold-start import budget for the API process.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and
+reports the median total import time, the slowest top-level packages and any
+modules that must stay off the startup path (provider HTTP clients, numpy).
+Exits with status 1 when the median exceeds --budget-ms or a deferred module
+is imported, so it can gate CI.
+
+Run from Backend/:
+    python -m benchmarks.import_time --runs 5 --budget-ms 900
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+# Loaded on first use only; importing app.main must not pull these in
+DEFERRED_MODULES = (
+    "httpx",
+    "numpy",
+    "app.services.llm_services.gemini_service",
+    "app.services.llm_services.lmstudio_service",
+    "app.services.llm_services.ollama_service",
+    "app.services.llm_services.openai_compatible_service",
+    "app.services.similarity",
+)
+
+
+def measure(target: str) -> tuple[float, Counter, set[str]]:
+    """(total ms, self ms per top-level package, imported module names) for one cold import."""
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=backend, capture_output=True, text=True, check=True,
+    )
+    packages: Counter = Counter()
+    modules: set[str] = set()
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, name = int(match[1]), match[4]
+        modules.add(name)
+        packages[name.split(".")[0]] += self_us / 1000
+    return sum(packages.values()), packages, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=900)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    totals, modules = [], set()
+    packages: Counter = Counter()
+    for _ in range(args.runs):
+        total, per_package, imported = measure(args.target)
+        totals.append(total)
+        packages.update(per_package)
+        modules |= imported
+
+    median = statistics.median(totals)
+    print(f"import {args.target}: median={median:.1f}ms min={min(totals):.1f}ms max={max(totals):.1f}ms runs={args.runs}")
+    for name, ms in packages.most_common(args.top):
+        print(f"  {ms / args.runs:8.1f} ms  {name}")
+
+    leaked = [m for m in DEFERRED_MODULES if m in modules]
+    if leaked:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(leaked)}")
+    if median > args.budget_ms:
+        print(f"FAIL: median import time {median:.1f}ms exceeds budget {args.budget_ms:.0f}ms")
+    sys.exit(1 if leaked or median > args.budget_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
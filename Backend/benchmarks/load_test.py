@@ -0,0 +1,183 @@
+"""
+Load test /score and /batch-score against the mock LLM server.
+
+Starts benchmarks.mock_llm_server in a subprocess, points the provider URL at
+it and drives the FastAPI app in-process (httpx ASGI transport), so event-loop
+lag and memory are measured for the app alone.
+
+Run from Backend/:
+    python -m benchmarks.load_test --provider ollama --concurrency 1,8,32 --requests 200
+    python -m benchmarks.load_test --batch-size 50 --concurrency 1,4 --requests 8
+    python -m benchmarks.load_test --concurrency 8 --requests 64 --load-ms 5000 [--warm-up]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import httpx
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.loop_lag import LoopLagMonitor, percentile
+from benchmarks.mock_llm_server import add_mock_arguments, mock_cli_args
+
+
+PROVIDER_URL_ENV = {
+    "ollama": ("OLLAMA_URL", "OLLAMA_MODEL", "{base}"),
+    "lmstudio": ("LMSTUDIO_URL", "LMSTUDIO_MODEL", "{base}"),
+    "gemini": ("GEMINI_URL", "GEMINI_MODEL", "{base}/v1beta"),
+    "openai": ("OPENAI_URL", "OPENAI_MODEL", "{base}/v1/chat/completions"),
+    "deepseek": ("DEEPSEEK_URL", "DEEPSEEK_MODEL", "{base}/v1/chat/completions"),
+    "grok": ("GROK_URL", "GROK_MODEL", "{base}/v1/chat/completions"),
+}
+
+
+def max_rss_mb() -> float:
+    """Peak resident set size of this process in MB (0.0 where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+@contextmanager
+def mock_server(port: int, args: argparse.Namespace) -> Iterator[str]:
+    base = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_llm_server", "--port", str(port), *mock_cli_args(args)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                httpx.get(f"{base}/health", timeout=0.5).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("Mock LLM server did not start")
+                time.sleep(0.1)
+        yield base
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def run_level(client: httpx.AsyncClient, path: str, bodies: list[dict], concurrency: int) -> dict[str, float]:
+    latencies: list[float] = []
+    failures = 0
+    items = 0
+    queue = iter(bodies)
+
+    async def worker() -> None:
+        nonlocal failures, items
+        for body in queue:
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                ok = response.status_code == 200
+                if ok and path == "/batch-score":
+                    data = response.json()
+                    items += data["total_processed"]
+                    failures += len(data["errors"])
+                elif ok:
+                    items += 1
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                failures += 1
+
+    async with LoopLagMonitor() as monitor:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(bodies),
+        "items": items,
+        "failed": failures,
+        "req_per_s": len(bodies) / elapsed,
+        "items_per_s": items / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        **monitor.summary(),
+        "max_rss_mb": max_rss_mb(),
+    }
+
+
+def print_table(rows: list[dict[str, float]]) -> None:
+    columns = ["concurrency", "requests", "items", "failed", "req_per_s", "items_per_s",
+               "p50_ms", "p95_ms", "p99_ms", "lag_p99_ms", "lag_max_ms", "max_rss_mb"]
+    print(" ".join(f"{c:>11}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>11.1f}" if isinstance(row[c], float) else f"{row[c]:>11}" for c in columns))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", choices=sorted(PROVIDER_URL_ENV), default="ollama")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated client concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="HTTP requests per level")
+    parser.add_argument("--batch-size", type=int, default=0, help="submissions per /batch-score request; 0 drives /score")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--verbose", action="store_true", help="show app error logs (injected failures log tracebacks)")
+    parser.add_argument("--warm-up", action="store_true", help="run the startup model warm-up and wait for /health/ready")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    with mock_server(args.port, args) as base:
+        url_env, model_env, template = PROVIDER_URL_ENV[args.provider]
+        os.environ[url_env] = template.format(base=base)
+        os.environ[model_env] = "bench-model"
+
+        # Imported late so the provider settings above are in place
+        from app.core.cpu_executor import shutdown_executor
+        from app.main import create_app
+        from app.services.llm_services.model_warmup import start_model_warmup, stop_model_warmup
+
+        codes = sample_codes()
+        if args.batch_size:
+            path = "/batch-score"
+            bodies = [
+                {"submissions": [build_request_body(args.provider, codes[(r + i) % len(codes)], f"s{r}-{i}")
+                                 for i in range(args.batch_size)]}
+                for r in range(args.requests)
+            ]
+        else:
+            path = "/score"
+            bodies = [build_request_body(args.provider, codes[r % len(codes)]) for r in range(args.requests)]
+
+        transport = httpx.ASGITransport(app=create_app())
+        rows = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            if args.warm_up:
+                # The ASGI transport does not run the lifespan hook, so start the warm-up here
+                started = time.perf_counter()
+                start_model_warmup()
+                while (await client.get("/health/ready")).status_code != 200:
+                    await asyncio.sleep(0.1)
+                print(f"ready after {time.perf_counter() - started:.2f}s")
+            for level in (int(c) for c in args.concurrency.split(",")):
+                rows.append(await run_level(client, path, bodies, level))
+        await stop_model_warmup()
+        shutdown_executor()
+
+    print(f"provider={args.provider} path={path} latency_ms={args.latency_ms} jitter_ms={args.jitter_ms} "
+          f"error_rate={args.error_rate} malformed_rate={args.malformed_rate} load_ms={args.load_ms} warm_up={args.warm_up}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import asyncio
+import math
+import time
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; returns 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LoopLagMonitor:
+    """
+    Measure event-loop lag by scheduling a periodic sleep and recording how late it wakes up.
+
+    Usage:
+        async with LoopLagMonitor() as monitor:
+            ...
+        monitor.summary()
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.create_task(self._run())
+        await asyncio.sleep(0)  # let the first tick get scheduled
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._task is not None:
+            # Let a tick that was starved by the workload record its lag
+            await asyncio.sleep(self.interval * 2)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def summary(self) -> dict[str, float]:
+        """Return lag statistics in milliseconds."""
+        return {
+            "lag_p50_ms": percentile(self.samples, 50) * 1000,
+            "lag_p99_ms": percentile(self.samples, 99) * 1000,
+            "lag_max_ms": max(self.samples, default=0.0) * 1000,
+        }
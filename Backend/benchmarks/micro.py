@@ -0,0 +1,43 @@
+"""
+Micro-benchmarks for the CPU-bound scoring stages.
+
+Run from Backend/:
+    python -m benchmarks.micro --number 2000
+"""
+import argparse
+import logging
+import timeit
+
+from app.services.llm_services.ollama_service import OllamaService
+from benchmarks.fixtures import build_raw_response, build_request, sample_codes
+
+
+def bench(label: str, func, number: int, repeat: int) -> None:
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f"{label:<40} {best * 1e6:>10.1f} us/call")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rationale-chars", type=int, default=400)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    service = OllamaService()
+    request = build_request(code=max(sample_codes(), key=len))
+    raw_small = build_raw_response(args.rationale_chars)
+    raw_large = build_raw_response(args.rationale_chars * 10)
+    payload = service._parse_llm_response(raw_small)
+
+    print(f"prompt_chars={len(service._build_prompt(request))} response_chars={len(raw_small)}/{len(raw_large)}")
+    bench("_build_prompt", lambda: service._build_prompt(request), args.number, args.repeat)
+    bench("_parse_llm_response (small)", lambda: service._parse_llm_response(raw_small), args.number, args.repeat)
+    bench("_parse_llm_response (large)", lambda: service._parse_llm_response(raw_large), max(1, args.number // 10), args.repeat)
+    bench("_score_results", lambda: service._score_results(request, payload), args.number, args.repeat)
+    bench("_process_llm_output (parse+score+build)", lambda: service._process_llm_output(request, raw_small), args.number, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Local stand-in for LLM providers, for offline benchmarks.
+
+Speaks the response shapes the services expect:
+- Ollama       POST /api/chat
+- LM Studio    POST /api/v0/chat/completions and /v1/chat/completions
+- Gemini       POST /v1beta/models/{model}:generateContent
+- OpenAI-compatible chat completions (POST /v1/chat/completions) and bulk mode:
+  POST /v1/files, POST /v1/batches, GET /v1/batches/{id}, GET /v1/files/{id}/content
+- Loaded models: Ollama GET /api/ps, LM Studio GET /api/v0/models
+
+Chat requests with "stream": true get NDJSON (Ollama) or server-sent events
+(LM Studio / OpenAI) spread over the latency. A stream whose client goes away
+stops early and is counted as aborted in GET /health, next to the completed
+generations, so benchmarks can see whether cancellation reaches the server.
+
+--model-latency and --model-sloppy give individual models their own latency
+and a share of sloppy answers (a raw_score outside the chosen band), so a
+cheap fast model and an expensive careful one can be told apart; GET /health
+also reports the total generation time spent per model. With --consistency,
+that share of answers picks the same bands for the same prompt (its "true"
+grade), as repeated samples of a fairly sure model would. --category-ms adds
+latency per rubric category in the prompt, since output length (and so
+generation time) grows with the number of categories to grade.
+
+With --load-ms, the first request for a model (and the first after it has been
+idle for --idle-unload-s) pays a model-load delay, like a local runtime.
+
+Answers are built from the rubric embedded in the prompt, so they validate
+against the caller's categories. Latency, jitter, HTTP error rate and
+malformed-JSON rate are configurable.
+
+Run from Backend/:
+    python -m benchmarks.mock_llm_server --port 9100 --latency-ms 500 --jitter-ms 100
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+
+# The template may put the first category on the same line as its heading
+CATEGORY_LINE = re.compile(r'(?:^|\s)- category: "(?P<name>[^"]*)"', re.MULTILINE)
+BAND_LINE = re.compile(r"^  - band: \[(?P<min>\d+)-(?P<max>\d+)\] (?P<desc>.*)$", re.MULTILINE)
+STREAM_CHUNK_CHARS = 64
+
+
+class MockSettings:
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 50, error_rate: float = 0.0,
+                 malformed_rate: float = 0.0, rationale_chars: int = 300, seed: int | None = None,
+                 batch_delay_ms: float = 2000, load_ms: float = 0, idle_unload_s: float = 0,
+                 model_latency_ms: dict[str, float] | None = None, model_sloppy: dict[str, float] | None = None,
+                 consistency: float = 0.0, category_ms: float = 0.0) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.rationale_chars = rationale_chars
+        self.batch_delay_ms = batch_delay_ms
+        self.load_ms = load_ms
+        self.idle_unload_s = idle_unload_s
+        self.model_latency_ms = model_latency_ms or {}
+        self.model_sloppy = model_sloppy or {}
+        self.consistency = consistency
+        self.category_ms = category_ms
+        self.random = random.Random(seed)
+
+
+def parse_model_map(value: str) -> dict[str, float]:
+    """'small=150,large=1500' -> {'small': 150.0, 'large': 1500.0}"""
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {name.strip(): float(number) for name, number in pairs}
+
+
+def parse_rubric(prompt: str) -> list[tuple[str, list[tuple[int, int, str]]]]:
+    """Recover (category, bands) from the rubric section rendered by _build_rubric_prompt."""
+    categories: list[tuple[str, list[tuple[int, int, str]]]] = []
+    matches = list(CATEGORY_LINE.finditer(prompt))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(prompt)
+        bands = [(int(b["min"]), int(b["max"]), b["desc"]) for b in BAND_LINE.finditer(prompt, match.end(), end)]
+        categories.append((match["name"], bands or [(0, 10, "Any")]))
+    return categories or [("correctness", [(0, 10, "Any")])]
+
+
+def build_answer(prompt: str, settings: MockSettings, model: str = "mock") -> str:
+    rnd = settings.random
+    if rnd.random() < settings.malformed_rate:
+        # Truncated output, as from a model that hit its token limit
+        return '```json\n{"category_results": [{"category_name": "correctness", "raw_score": 7,'
+
+    rationale = ("Bài làm đọc đúng dữ liệu đầu vào và xử lý các trường hợp cơ bản. " * 20)[:settings.rationale_chars]
+    sloppy = rnd.random() < settings.model_sloppy.get(model, 0.0)
+    # A consistent answer draws its bands from a generator seeded by the prompt
+    consistent = rnd.random() < settings.consistency
+    band_rnd = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest()) if consistent else rnd
+    results = []
+    for name, bands in parse_rubric(prompt):
+        low, high, desc = band_rnd.choice(bands)
+        # A sloppy answer's score disagrees with the band it picked
+        raw_score = high + 1 if sloppy else round(rnd.uniform(low, high), 1)
+        results.append({
+            "category_name": name,
+            "raw_score": raw_score,
+            "band_decision": {"min_score": low, "max_score": high, "description": desc, "rationale": rationale},
+        })
+    payload = {"category_results": results, "penalties_applied": [], "feedback": rationale}
+    return "```json\n" + json.dumps(payload, ensure_ascii=False) + "\n```"
+
+
+def create_mock_app(settings: MockSettings) -> FastAPI:
+    app = FastAPI()
+    app.state.settings = settings
+    app.state.requests = 0
+    app.state.completed = 0
+    app.state.aborted = 0
+    app.state.generation_ms = {}  # model -> total time spent generating
+    loaded: dict[str, float] = {}  # model -> monotonic time of last use
+    loading: dict[str, asyncio.Task] = {}
+
+    def resident(model: str) -> bool:
+        last = loaded.get(model)
+        if last is None:
+            return False
+        if settings.idle_unload_s and time.monotonic() - last > settings.idle_unload_s:
+            del loaded[model]
+            return False
+        return True
+
+    async def ensure_loaded(model: str) -> None:
+        if not settings.load_ms or resident(model):
+            loaded[model] = time.monotonic()
+            return
+        if model not in loading:
+            loading[model] = asyncio.create_task(asyncio.sleep(settings.load_ms / 1000))
+        await asyncio.shield(loading[model])
+        loading.pop(model, None)
+        loaded[model] = time.monotonic()
+
+    async def respond(prompt: str, shape: str, model: str = "mock", stream: bool = False, stream_usage: bool = False) -> Any:
+        app.state.requests += 1
+        await ensure_loaded(model)
+        latency = settings.model_latency_ms.get(model, settings.latency_ms)
+        if settings.category_ms:
+            latency += settings.category_ms * len(CATEGORY_LINE.findall(prompt))
+        delay = max(0.0, latency + settings.random.uniform(-settings.jitter_ms, settings.jitter_ms)) / 1000
+        app.state.generation_ms[model] = app.state.generation_ms.get(model, 0.0) + delay * 1000
+        if stream:
+            if settings.random.random() < settings.error_rate:
+                return JSONResponse(status_code=503, content={"error": "mock overloaded"})
+            media_type = "application/x-ndjson" if shape == "ollama" else "text/event-stream"
+            text = build_answer(prompt, settings, model)
+            return StreamingResponse(stream_answer(text, shape, model, delay, len(prompt) // 4, stream_usage), media_type=media_type)
+
+        await asyncio.sleep(delay)
+        if settings.random.random() < settings.error_rate:
+            return JSONResponse(status_code=503, content={"error": "mock overloaded"})
+
+        text = build_answer(prompt, settings, model)
+        app.state.completed += 1
+        # Token counts at roughly four characters per token, in each provider's usage fields
+        tokens_in, tokens_out = len(prompt) // 4, len(text) // 4
+        if shape == "ollama":
+            return {"model": "mock", "message": {"role": "assistant", "content": text}, "done": True,
+                    "prompt_eval_count": tokens_in, "eval_count": tokens_out}
+        if shape == "gemini":
+            return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}],
+                    "usageMetadata": {"promptTokenCount": tokens_in, "candidatesTokenCount": tokens_out}}
+        return {"choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": tokens_in, "completion_tokens": tokens_out}}
+
+    def stream_chunk(shape: str, model: str, content: str, done: bool, tokens: tuple[int, int] = (0, 0)) -> str:
+        if shape == "ollama":
+            chunk: dict[str, Any] = {"model": model, "message": {"role": "assistant", "content": content}, "done": done}
+            if done:
+                chunk["done_reason"] = "stop"
+                # Ollama reports token counts on the final chunk
+                chunk["prompt_eval_count"], chunk["eval_count"] = tokens
+            return json.dumps(chunk, ensure_ascii=False) + "\n"
+        choice = {"index": 0, "delta": {"content": content} if content else {}, "finish_reason": "stop" if done else None}
+        return "data: " + json.dumps({"choices": [choice]}, ensure_ascii=False) + "\n\n"
+
+    async def stream_answer(
+        text: str, shape: str, model: str, delay: float, prompt_tokens: int, stream_usage: bool = False,
+    ) -> AsyncIterator[str]:
+        pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+        finished = False
+        try:
+            for piece in pieces:
+                await asyncio.sleep(delay / len(pieces))
+                yield stream_chunk(shape, model, piece, False)
+            yield stream_chunk(shape, model, "", True, (prompt_tokens, len(text) // 4))
+            if shape != "ollama" and stream_usage:
+                # stream_options.include_usage: a last chunk with no choices carries the token counts
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 4}
+                yield "data: " + json.dumps({"choices": [], "usage": usage}) + "\n\n"
+            if shape != "ollama":
+                yield "data: [DONE]\n\n"
+            finished = True
+        finally:
+            # Cancelled by Starlette when the client disconnects mid-stream
+            if finished:
+                app.state.completed += 1
+            else:
+                app.state.aborted += 1
+
+    def chat_prompt(body: dict[str, Any]) -> str:
+        return "\n".join(m.get("content", "") for m in body.get("messages", []))
+
+    @app.post("/api/chat")
+    async def ollama_chat(request: Request) -> Any:
+        body = await request.json()
+        return await respond(chat_prompt(body), "ollama", body.get("model") or "mock", bool(body.get("stream")))
+
+    @app.post("/api/v0/chat/completions")
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Any:
+        body = await request.json()
+        stream_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return await respond(chat_prompt(body), "openai", body.get("model") or "mock", bool(body.get("stream")), stream_usage)
+
+    @app.get("/api/ps")
+    async def ollama_loaded_models() -> dict[str, Any]:
+        return {"models": [{"name": m, "model": m} for m in list(loaded) if resident(m)]}
+
+    @app.get("/api/v0/models")
+    async def lmstudio_models() -> dict[str, Any]:
+        return {"object": "list", "data": [
+            {"id": m, "object": "model", "state": "loaded" if resident(m) else "not-loaded"} for m in list(loaded)
+        ]}
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def gemini_generate(model: str, request: Request) -> Any:
+        body = await request.json()
+        prompt = "\n".join(p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []))
+        return await respond(prompt, "gemini", model)
+
+    # ---- OpenAI-compatible bulk mode ----
+    files: dict[str, bytes] = {}
+    batches: dict[str, dict[str, Any]] = {}
+    ids = itertools.count(1)
+
+    def completion_body(prompt: str, text: str) -> dict[str, Any]:
+        return {"object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4}}
+
+    async def run_batch(batch: dict[str, Any], lines: list[dict[str, Any]]) -> None:
+        batch["status"] = "in_progress"
+        await asyncio.sleep(settings.batch_delay_ms / 1000)
+        output, errors = [], []
+        for line in lines:
+            prompt = chat_prompt(line.get("body") or {})
+            if settings.random.random() < settings.error_rate:
+                errors.append({"id": f"req_{next(ids)}", "custom_id": line["custom_id"], "response": None,
+                               "error": {"code": "server_error", "message": "mock failure"}})
+                continue
+            output.append({"id": f"req_{next(ids)}", "custom_id": line["custom_id"], "error": None,
+                           "response": {"status_code": 200, "body": completion_body(prompt, build_answer(prompt, settings, (line.get("body") or {}).get("model") or "mock"))}})
+        for key, records in (("output_file_id", output), ("error_file_id", errors)):
+            if records:
+                file_id = f"file-{next(ids)}"
+                files[file_id] = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+                batch[key] = file_id
+        batch["request_counts"] = {"total": len(lines), "completed": len(output), "failed": len(errors)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+    @app.post("/v1/files")
+    async def upload_file(file: UploadFile = File(...), purpose: str = Form(...)) -> dict[str, Any]:
+        file_id = f"file-{next(ids)}"
+        files[file_id] = await file.read()
+        return {"id": file_id, "object": "file", "purpose": purpose, "bytes": len(files[file_id]), "filename": file.filename}
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str) -> PlainTextResponse:
+        if file_id not in files:
+            raise HTTPException(status_code=404, detail="No such file")
+        return PlainTextResponse(files[file_id].decode("utf-8"), media_type="application/jsonl")
+
+    @app.post("/v1/batches")
+    async def create_batch(request: Request) -> dict[str, Any]:
+        body = await request.json()
+        content = files.get(body.get("input_file_id"))
+        if content is None:
+            raise HTTPException(status_code=400, detail="Unknown input_file_id")
+        lines = [json.loads(line) for line in content.decode("utf-8").splitlines() if line.strip()]
+        batch = {"id": f"batch_{next(ids)}", "object": "batch", "endpoint": body.get("endpoint"),
+                 "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window"),
+                 "status": "validating", "created_at": int(time.time()),
+                 "request_counts": {"total": len(lines), "completed": 0, "failed": 0}}
+        batches[batch["id"]] = batch
+        app.state.requests += len(lines)
+        asyncio.create_task(run_batch(batch, lines))
+        return batch
+
+    @app.get("/v1/batches/{batch_id}")
+    async def get_batch(batch_id: str) -> dict[str, Any]:
+        if batch_id not in batches:
+            raise HTTPException(status_code=404, detail="No such batch")
+        return batches[batch_id]
+
+    @app.get("/health")
+    async def health() -> dict[str, Any]:
+        return {"status": "ok", "requests": app.state.requests,
+                "completed": app.state.completed, "aborted": app.state.aborted,
+                "generation_ms": app.state.generation_ms}
+
+    return app
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--rationale-chars", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--batch-delay-ms", type=float, default=2000, help="time for a /v1/batches job to complete")
+    parser.add_argument("--load-ms", type=float, default=0, help="model-load delay on a cold model")
+    parser.add_argument("--idle-unload-s", type=float, default=0, help="unload a model after this idle time (0 = never)")
+    parser.add_argument("--model-latency", default="", help="per-model latency in ms, e.g. small=150,large=1500")
+    parser.add_argument("--model-sloppy", default="", help="per-model share of out-of-band scores, e.g. small=0.2")
+    parser.add_argument("--consistency", type=float, default=0.0, help="share of answers that repeat the prompt's bands")
+    parser.add_argument("--category-ms", type=float, default=0.0, help="extra latency per rubric category in the prompt")
+
+
+def mock_cli_args(args: argparse.Namespace) -> list[str]:
+    """Re-serialize mock options for launching the server in a subprocess."""
+    return [
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate), "--malformed-rate", str(args.malformed_rate),
+        "--rationale-chars", str(args.rationale_chars), "--seed", str(args.seed),
+        "--batch-delay-ms", str(args.batch_delay_ms),
+        "--load-ms", str(args.load_ms), "--idle-unload-s", str(args.idle_unload_s),
+        "--model-latency", args.model_latency, "--model-sloppy", args.model_sloppy,
+        "--consistency", str(args.consistency), "--category-ms", str(args.category_ms),
+    ]
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    settings = MockSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.malformed_rate,
+                            args.rationale_chars, args.seed, args.batch_delay_ms, args.load_ms, args.idle_unload_s,
+                            parse_model_map(args.model_latency), parse_model_map(args.model_sloppy),
+                            args.consistency, args.category_ms)
+    uvicorn.run(create_mock_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Throughput and LLM spend with `uvicorn --workers N`.
+
+Starts the mock LLM server and the real app with N worker processes, then
+sends --requests /score calls built from --distinct different submissions, so
+most requests repeat a prompt already sent by some worker. The mock server
+counts the LLM calls that actually reached it. With a shared state backend
+(sqlite or redis) that count stays at --distinct regardless of N. With the
+per-process memory backend, each worker pays for its own copy.
+
+Run from Backend/:
+    python -m benchmarks.multi_worker --workers 1,2,4 --requests 200 --distinct 20 --backend sqlite
+    python -m benchmarks.multi_worker --workers 4 --backend memory
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.load_test import mock_server
+from benchmarks.mock_llm_server import add_mock_arguments
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_app(workers: int, port: int, env: dict[str, str]) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health/live", timeout=0.5).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.terminate()
+                raise RuntimeError("App did not start")
+            time.sleep(0.2)
+
+
+async def drive(port: int, bodies: list[dict], concurrency: int) -> tuple[float, int]:
+    queue = iter(bodies)
+    failures = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal failures
+        for body in queue:
+            response = await client.post("/score", json=body)
+            failures += response.status_code != 200
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return time.perf_counter() - started, failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=20, help="different submissions among the requests")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--backend", choices=["sqlite", "redis", "memory"], default="sqlite")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--app-port", type=int, default=8100)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    codes = sample_codes()
+    variants = [codes[i % len(codes)] + f"\n// variant {i}\n" for i in range(args.distinct)]
+    bodies = [build_request_body("ollama", variants[r % args.distinct]) for r in range(args.requests)]
+
+    rows = []
+    with mock_server(args.port, args) as base:
+        for workers in (int(w) for w in args.workers.split(",")):
+            env = {
+                **os.environ,
+                "OLLAMA_URL": base,
+                "OLLAMA_MODEL": "bench-model",
+                "MODEL_WARMUP": "false",
+                "SHARED_STATE_BACKEND": args.backend,
+                "SHARED_STATE_PATH": os.path.join(tempfile.mkdtemp(), "state.db"),
+                "LOG_LEVEL": "WARNING",
+            }
+            calls_before = httpx.get(f"{base}/health").json()["requests"]
+            app = start_app(workers, args.app_port, env)
+            try:
+                elapsed, failures = asyncio.run(drive(args.app_port, bodies, args.concurrency))
+            finally:
+                app.terminate()
+                app.wait(timeout=20)
+            calls = httpx.get(f"{base}/health").json()["requests"] - calls_before
+            rows.append((workers, elapsed, failures, calls))
+
+    print(f"backend={args.backend} requests={args.requests} distinct={args.distinct} latency_ms={args.latency_ms}")
+    print(f"{'workers':>7} {'req/s':>8} {'failed':>7} {'llm_calls':>10}")
+    for workers, elapsed, failures, calls in rows:
+        print(f"{workers:>7} {args.requests / elapsed:>8.1f} {failures:>7} {calls:>10}")
+
+
+if __name__ == "__main__":
+    main()
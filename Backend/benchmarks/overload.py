@@ -0,0 +1,172 @@
+"""
+/score and /batch-score under more load than the provider can serve.
+
+Starts the mock LLM server, then drives the app in-process (httpx ASGI
+transport) with an open-loop stream of /score requests at --rate per second
+for --duration seconds, each with an X-Request-Timeout of --timeout. The
+provider serves about LLM_MAX_INFLIGHT / latency requests per second.
+
+- unbounded: LLM_MAX_QUEUED=-1, every request is admitted and waits
+- bounded:   LLM_MAX_QUEUED=--max-queued, the rest get 503 + Retry-After
+
+It reports requests answered, shed (503) and timed out (504), latency of the
+answered ones, how fast a 503 comes back, the Retry-After given, the peak of
+admitted requests (what the worker holds in memory) and goodput.
+
+Then it sends --batches concurrent /batch-score requests of --batch-size
+under BATCH_MEMORY_BUDGET_MB=--budget-mb and reports how many were admitted.
+
+Run from Backend/:
+    python -m benchmarks.overload --rate 24 --duration 10 --inflight 4 --latency-ms 500 --max-queued 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.load_test import mock_server
+from benchmarks.loop_lag import percentile
+from benchmarks.mock_llm_server import add_mock_arguments
+
+
+def _reset() -> None:
+    """Fresh scheduler and admission counters, read from the current settings."""
+    from app.services.llm_services import admission, scheduler
+
+    scheduler._schedulers.clear()
+    admission._controller = None
+
+
+async def run_scores(mode: str, client: httpx.AsyncClient, args: argparse.Namespace) -> dict:
+    from app.services.llm_services.admission import get_admission
+
+    os.environ["LLM_MAX_QUEUED"] = "-1" if mode == "unbounded" else str(args.max_queued)
+    _reset()
+    codes = sample_codes()
+    tag = f"{mode}-{time.time_ns()}"
+    outcomes: list[tuple[int, float, str]] = []
+    peak = 0
+
+    async def send(i: int) -> None:
+        body = build_request_body("ollama", codes[i % len(codes)] + f"\n// {tag} {i}\n", f"s{i}")
+        started = time.perf_counter()
+        response = await client.post("/score?verbosity=scores", json=body,
+                                     headers={"X-Request-Timeout": str(args.timeout)})
+        outcomes.append((response.status_code, time.perf_counter() - started, response.headers.get("retry-after", "")))
+
+    async def watch() -> None:
+        nonlocal peak
+        while True:
+            counts = get_admission().snapshot()["requests"].get("ollama", {})
+            peak = max(peak, counts.get("pending", 0))
+            await asyncio.sleep(0.05)
+
+    watcher = asyncio.create_task(watch())
+    started = time.perf_counter()
+    tasks = []
+    for i in range(int(args.rate * args.duration)):
+        tasks.append(asyncio.create_task(send(i)))
+        await asyncio.sleep(max(0.0, started + (i + 1) / args.rate - time.perf_counter()))
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - started
+    watcher.cancel()
+
+    ok = [t for status, t, _ in outcomes if status == 200]
+    shed = [(t, r) for status, t, r in outcomes if status == 503]
+    return {
+        "mode": mode,
+        "sent": len(outcomes),
+        "ok": len(ok),
+        "shed": len(shed),
+        "timeout": sum(1 for status, _, _ in outcomes if status == 504),
+        "ok_p50_ms": percentile(ok, 50) * 1000 if ok else 0.0,
+        "ok_p99_ms": percentile(ok, 99) * 1000 if ok else 0.0,
+        "shed_ms": sum(t for t, _ in shed) / len(shed) * 1000 if shed else 0.0,
+        "retry_s": sum(int(r) for _, r in shed if r) / len(shed) if shed else 0.0,
+        "peak_admitted": peak,
+        "goodput": len(ok) / wall,
+    }
+
+
+async def run_batches(client: httpx.AsyncClient, args: argparse.Namespace) -> dict:
+    from app.services.llm_services.admission import estimate_bytes
+    from app.models.scoring.requests import ScoringRequest
+
+    os.environ["BATCH_MEMORY_BUDGET_MB"] = str(args.budget_mb)
+    _reset()
+    codes = sample_codes()
+    tag = time.time_ns()
+    batches = [
+        {"submissions": [build_request_body("ollama", codes[i % len(codes)] + f"\n// {tag} {b} {i}\n", f"b{b}-{i}")
+                         for i in range(args.batch_size)]}
+        for b in range(args.batches)
+    ]
+    size_mb = sum(estimate_bytes(ScoringRequest.model_validate(s)) for s in batches[0]["submissions"]) / 2**20
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(client.post("/batch-score?verbosity=scores", json=b) for b in batches))
+    return {
+        "batches": len(batches),
+        "batch_mb": size_mb,
+        "admitted": sum(1 for r in responses if r.status_code == 200),
+        "shed": sum(1 for r in responses if r.status_code == 503),
+        "too_large": sum(1 for r in responses if r.status_code == 413),
+        "wall_s": time.perf_counter() - started,
+    }
+
+
+def print_rows(rows: list[dict], width: int) -> None:
+    columns = list(rows[0])
+    print(" ".join(f"{c:>{width}}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>{width}.1f}" if isinstance(row[c], float) else f"{row[c]:>{width}}" for c in columns))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=24, help="/score requests per second")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=10, help="X-Request-Timeout seconds")
+    parser.add_argument("--inflight", type=int, default=4, help="LLM_MAX_INFLIGHT")
+    parser.add_argument("--max-queued", type=int, default=8, help="LLM_MAX_QUEUED in bounded mode")
+    parser.add_argument("--modes", default="unbounded,bounded")
+    parser.add_argument("--batches", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=40)
+    parser.add_argument("--budget-mb", type=float, default=2)
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    parser.set_defaults(latency_ms=500, jitter_ms=0)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    with mock_server(args.port, args) as base:
+        os.environ.update({
+            "OLLAMA_URL": base,
+            "OLLAMA_MODEL": "bench-model",
+            "LLM_MAX_INFLIGHT": str(args.inflight),
+            "RESULT_CACHE_TTL": "0",
+            "PAYLOAD_STORE_TTL": "0",
+            "SHARED_STATE_BACKEND": "memory",
+            "MODEL_WARMUP": "false",
+        })
+        # Imported late so the settings above are in place
+        from app.main import create_app
+
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=None) as client:
+            score_rows = [await run_scores(mode, client, args) for mode in args.modes.split(",")]
+            batch_row = await run_batches(client, args)
+
+    print(f"rate={args.rate}/s duration={args.duration}s timeout={args.timeout}s inflight={args.inflight} "
+          f"latency_ms={args.latency_ms} capacity~{args.inflight / (args.latency_ms / 1000):.1f}/s "
+          f"max_queued={args.max_queued}")
+    print_rows(score_rows, 13)
+    print(f"\nbatches: budget_mb={args.budget_mb} batch_size={args.batch_size}")
+    print_rows([batch_row], 10)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+Event-loop lag while parsing/validating many large LLM responses concurrently.
+
+Compares CPU_EXECUTOR=none|thread|process for the parse/validate/score stage.
+
+Run from Backend/:
+    python -m benchmarks.parse_offload --items 300 --rationale-chars 4000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.core import cpu_executor
+from app.models.scoring.requests import ScoringRequest
+from app.services.llm_services.ollama_service import OllamaService
+from benchmarks.fixtures import build_raw_response, build_request
+from benchmarks.loop_lag import LoopLagMonitor
+
+
+async def run_mode(mode: str, items: int, request: ScoringRequest, raw: str) -> dict[str, float]:
+    os.environ["CPU_EXECUTOR"] = mode
+    os.environ["CPU_OFFLOAD_MIN_CHARS"] = "0"
+    cpu_executor.shutdown_executor()
+    cpu_executor.get_executor()  # warm up pool outside the measurement
+    service = OllamaService()
+
+    async def one() -> None:
+        await asyncio.sleep(0)
+        await service._process_llm_output_async(request, raw)
+
+    async with LoopLagMonitor() as monitor:
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(items)))
+        elapsed = time.perf_counter() - started
+    cpu_executor.shutdown_executor()
+    return {"elapsed_s": elapsed, "items_per_s": items / elapsed, **monitor.summary()}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--rationale-chars", type=int, default=4000)
+    parser.add_argument("--modes", default="none,thread,process")
+    args = parser.parse_args()
+
+    request = build_request()
+    raw = build_raw_response(args.rationale_chars)
+    print(f"items={args.items} response_chars={len(raw)}")
+    print(f"{'mode':<8} {'elapsed_s':>10} {'items/s':>10} {'lag_p50_ms':>11} {'lag_p99_ms':>11} {'lag_max_ms':>11}")
+    for mode in args.modes.split(","):
+        r = await run_mode(mode.strip(), args.items, request, raw)
+        print(f"{mode:<8} {r['elapsed_s']:>10.3f} {r['items_per_s']:>10.1f} "
+              f"{r['lag_p50_ms']:>11.2f} {r['lag_p99_ms']:>11.2f} {r['lag_max_ms']:>11.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
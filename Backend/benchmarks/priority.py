@@ -0,0 +1,111 @@
+"""
+Interactive /score latency while a batch saturates the provider.
+
+Starts the mock LLM server, then for each mode scores one large batch and,
+while it runs, sends a single-submission probe every --probe-interval-ms:
+
+- idle:     probes only, no batch (the floor)
+- fifo:     probes queue in the batch's class, i.e. no priority
+- priority: probes run as interactive calls (what /score does)
+
+It reports probe latency, the batch's wall time, and the scheduler's
+queueing delay per class. LLM_MAX_INFLIGHT caps the provider slots, and
+MAX_CONCURRENCY lets the batch alone fill them.
+
+Run from Backend/:
+    python -m benchmarks.priority --batch-size 60 --inflight 4 --latency-ms 500
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from benchmarks.fixtures import build_request_body, sample_codes
+from benchmarks.load_test import mock_server
+from benchmarks.loop_lag import percentile
+from benchmarks.mock_llm_server import add_mock_arguments
+
+
+async def run_mode(mode: str, batch_size: int, probe_interval: float) -> dict:
+    # Imported late so the settings in main() are in place
+    from app.models.batch_scoring.requests import BatchScoringRequest
+    from app.models.scoring.requests import ScoringRequest
+    from app.services.llm_services import scheduler
+    from app.services.llm_services.llm_common_service import LLMCommonService
+
+    scheduler._schedulers.clear()  # fresh counters and settings per mode
+    codes = sample_codes()
+    tag = f"{mode}-{time.time_ns()}"
+    batch = BatchScoringRequest.model_validate({"submissions": [
+        build_request_body("ollama", codes[i % len(codes)] + f"\n// {tag} {i}\n", f"b{i}") for i in range(batch_size)
+    ]})
+    service = LLMCommonService.get_llm_service(batch.submissions[0].llm_provider)
+    latencies: list[float] = []
+
+    async def probe(i: int) -> None:
+        request = ScoringRequest.model_validate(build_request_body("ollama", codes[0] + f"\n// probe {tag} {i}\n"))
+        started = time.perf_counter()
+        if mode == "fifo":
+            with scheduler.priority_scope("batch"):
+                await service.generate_response(request)
+        else:
+            await service.generate_response(request)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    batch_task = asyncio.create_task(LLMCommonService.score_batch(batch)) if mode != "idle" else None
+    probes = []
+    i = 0
+    while (batch_task is not None and not batch_task.done()) or (batch_task is None and i < 10):
+        probes.append(asyncio.create_task(probe(i)))
+        i += 1
+        await asyncio.sleep(probe_interval)
+    batch_elapsed = time.perf_counter() - started if batch_task is not None else 0.0
+    if batch_task is not None:
+        await batch_task
+    await asyncio.gather(*probes)
+    classes = scheduler.scheduler_snapshot()["ollama"]["classes"]
+    return {
+        "mode": mode,
+        "probes": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "batch_s": batch_elapsed,
+        "wait_interactive_ms": classes["interactive"]["wait_avg_ms"],
+        "wait_batch_ms": classes["batch"]["wait_avg_ms"],
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=60)
+    parser.add_argument("--inflight", type=int, default=4, help="LLM_MAX_INFLIGHT")
+    parser.add_argument("--probe-interval-ms", type=float, default=500)
+    parser.add_argument("--modes", default="idle,fifo,priority")
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    parser.set_defaults(latency_ms=500, jitter_ms=0)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    with mock_server(args.port, args) as base:
+        os.environ.update({
+            "OLLAMA_URL": base,
+            "OLLAMA_MODEL": "bench-model",
+            "LLM_MAX_INFLIGHT": str(args.inflight),
+            "MAX_CONCURRENCY": str(args.inflight * 4),
+            "RESULT_CACHE_TTL": "0",
+            "SHARED_STATE_BACKEND": "memory",
+        })
+        rows = [await run_mode(mode, args.batch_size, args.probe_interval_ms / 1000) for mode in args.modes.split(",")]
+
+    print(f"batch_size={args.batch_size} inflight={args.inflight} latency_ms={args.latency_ms}")
+    columns = ["mode", "probes", "p50_ms", "p99_ms", "batch_s", "wait_interactive_ms", "wait_batch_ms"]
+    print(" ".join(f"{c:>19}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>19.1f}" if isinstance(row[c], float) else f"{row[c]:>19}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Regrading a class after a partial rubric edit: everything vs only what changed.
+
+Starts the mock LLM server with a per-category latency (generation time grows
+with the categories to grade), scores --submissions against the fixture
+rubric, then edits --changed categories' bands and adds a penalty rule, and
+regrades the class twice:
+
+- full:        every submission re-scored against the whole edited rubric
+- incremental: regrade_from each earlier result, so only the edited
+               categories and the new penalty are re-asked
+
+It reports wall time, mean latency per submission, the mock's total
+generation time, and how many categories each incremental regrade reused.
+
+Run from Backend/:
+    python -m benchmarks.regrade --submissions 40 --changed 1 --latency-ms 300 --category-ms 400
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from benchmarks.fixtures import CATEGORIES, build_request_body, build_rubric, sample_codes
+from benchmarks.load_test import mock_server
+from benchmarks.mock_llm_server import add_mock_arguments
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=40)
+    parser.add_argument("--changed", type=int, default=1, help="categories whose bands are edited")
+    parser.add_argument("--inflight", type=int, default=8, help="LLM_MAX_INFLIGHT")
+    parser.add_argument("--port", type=int, default=9100)
+    add_mock_arguments(parser)
+    parser.set_defaults(latency_ms=300, jitter_ms=0, category_ms=400)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+
+    with mock_server(args.port, args) as base:
+        os.environ.update({
+            "OLLAMA_URL": base,
+            "LLM_MAX_INFLIGHT": str(args.inflight),
+            "RESULT_CACHE_TTL": "0",
+            "SHARED_STATE_BACKEND": "memory",
+        })
+        # Imported late so the settings above are in place
+        from app.models.scoring.requests import ScoringRequest
+        from app.services.llm_services.llm_common_service import LLMCommonService
+
+        codes = sample_codes()
+        bodies = [build_request_body("ollama", codes[i % len(codes)] + f"\n// {i}\n", f"s{i}") for i in range(args.submissions)]
+        service = LLMCommonService.get_llm_service(ScoringRequest.model_validate(bodies[0]).llm_provider)
+        gate = asyncio.Semaphore(args.inflight)
+
+        async def score(body: dict):
+            async with gate:
+                started = time.perf_counter()
+                response = await service.generate_response(ScoringRequest.model_validate(body))
+                return response, time.perf_counter() - started
+
+        first = await asyncio.gather(*(score(b) for b in bodies))
+
+        edited = build_rubric()
+        for category in edited["categories"][:args.changed]:
+            category["bands"][1]["description"] = "Adequate, handles the leap-year edge cases"
+        edited["penalties"].append({"code": "hardcoded", "description": "Hard-coded answers", "points": -3})
+
+        rows = []
+        for mode in ("full", "incremental"):
+            regrade_bodies = [
+                {**body, "rubric": edited, **({"regrade_from": response.payload_id} if mode == "incremental" else {})}
+                for body, (response, _) in zip(bodies, first)
+            ]
+            before = sum(httpx.get(f"{base}/health").json()["generation_ms"].values())
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(*(score(b) for b in regrade_bodies))
+            wall = time.perf_counter() - started
+            after = sum(httpx.get(f"{base}/health").json()["generation_ms"].values())
+            assert all(len(r.category_results) == len(CATEGORIES) for r, _ in outcomes), "regrade lost categories"
+            reused = [len(r.regrade.reused) for r, _ in outcomes if r.regrade is not None]
+            rows.append({
+                "mode": mode,
+                "wall_s": wall,
+                "mean_ms": sum(t for _, t in outcomes) / len(outcomes) * 1000,
+                "generation_s": (after - before) / 1000,
+                "reused": sum(reused) / len(reused) if reused else 0.0,
+            })
+
+    print(f"submissions={args.submissions} categories={len(CATEGORIES)} changed={args.changed} "
+          f"latency_ms={args.latency_ms} category_ms={args.category_ms} inflight={args.inflight}")
+    columns = ["mode", "wall_s", "mean_ms", "generation_s", "reused"]
+    print(" ".join(f"{c:>13}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>13.1f}" if isinstance(row[c], float) else f"{row[c]:>13}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Re-scoring a class after a weight or penalty change, from stored payloads.
+
+For each size, scores N synthetic LLM answers through the normal output path,
+stores their payloads in the shared state backend, then changes every
+category weight and the penalty's points and measures:
+
+- load:    load_many, one round trip for all stored payloads
+- rescore: the vectorized rescore_payloads (load + rescore is what
+           POST /batch-score/rescore does)
+- scalar:  _score_results + _build_scoring_response per submission, the
+           per-item path the LLM answers originally went through, fed the
+           payloads with the edited penalty points; like the endpoint, it
+           keeps every response
+- llm:     the estimated wall time of asking the LLM again
+           (N x --latency-ms / --inflight)
+
+It also checks that both paths give the same totals.
+
+Run from Backend/:
+    python -m benchmarks.rescore --sizes 100,1000,5000 --backend sqlite
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+
+
+async def run_size(size: int, latency_ms: float, inflight: int) -> dict:
+    # Imported late so the settings in main() are in place
+    from app.models.scoring.requests import ScoringRequest
+    from app.services.llm_services.ollama_service import OllamaService
+    from app.services.rescoring import load_many, rescore_payloads, save
+    from benchmarks.fixtures import CATEGORIES, build_request_body, build_rubric
+
+    service = OllamaService()
+    rnd = random.Random(size)
+    request = ScoringRequest.model_validate(build_request_body())
+    payload_ids = []
+    for i in range(size):
+        answer = {
+            "category_results": [
+                {"category_name": name, "raw_score": score,
+                 "band_decision": {"min_score": band[0], "max_score": band[1], "description": "band",
+                                   "rationale": "Xử lý đúng các trường hợp cơ bản. " * 8}}
+                for name in CATEGORIES
+                for band in [rnd.choice([(0, 4), (5, 8), (9, 10)])]
+                for score in [round(rnd.uniform(*band), 1)]
+            ],
+            "penalties_applied": [{"code": "io_handling", "points": -1, "reason": "No validation"}] if i % 3 == 0 else [],
+            "feedback": "Bài làm khá tốt. " * 10,
+        }
+        response = service._process_llm_output(request, "```json\n" + json.dumps(answer, ensure_ascii=False) + "\n```")
+        payload_ids.append(await save(request.rubric, response))
+
+    edited = build_rubric()
+    for i, category in enumerate(edited["categories"]):
+        category["weight"] = round(0.05 + 0.05 * i, 2)
+    edited["penalties"][0]["points"] = -2
+    edited_request = ScoringRequest.model_validate({**build_request_body(), "rubric": edited})
+
+    gc.collect()  # each timing starts without garbage left by the previous step
+    started = time.perf_counter()
+    records = await load_many(payload_ids)
+    load_s = time.perf_counter() - started
+    gc.collect()
+    started = time.perf_counter()
+    result = rescore_payloads(edited_request.rubric, payload_ids, records)
+    rescore_s = time.perf_counter() - started
+    assert not result.errors, result.errors[:3]
+
+    points = {p.code: p.points for p in edited_request.rubric.penalties}
+    payloads = [
+        r.payload.model_copy(update={"penalties_applied": [
+            p.model_copy(update={"points": points[p.code]}) for p in r.payload.penalties_applied
+        ]})
+        for r in records
+    ]
+    gc.collect()
+    started = time.perf_counter()
+    scalar = []
+    for payload in payloads:
+        category_results, total = service._score_results(edited_request, payload)
+        scalar.append(service._build_scoring_response(payload, category_results, total))
+    scalar_s = time.perf_counter() - started
+
+    mismatches = sum(1 for a, b in zip(scalar, result.results) if abs(a.total_score - b.total_score) > 0.011)
+    return {
+        "size": size,
+        "load_ms": load_s * 1000,
+        "rescore_ms": rescore_s * 1000,
+        "scalar_ms": scalar_s * 1000,
+        "llm_s": size * latency_ms / 1000 / inflight,
+        "mismatches": mismatches,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--backend", choices=["sqlite", "memory"], default="sqlite")
+    parser.add_argument("--latency-ms", type=float, default=8000, help="per-call LLM latency for the estimate")
+    parser.add_argument("--inflight", type=int, default=8, help="LLM calls in flight for the estimate")
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "SHARED_STATE_BACKEND": args.backend,
+            "SHARED_STATE_PATH": os.path.join(tmp, "state.db"),
+        })
+        rows = [await run_size(int(size), args.latency_ms, args.inflight) for size in args.sizes.split(",")]
+        from app.core.shared_state import close_shared_state
+
+        await close_shared_state()
+
+    print(f"backend={args.backend} llm estimate: latency_ms={args.latency_ms} inflight={args.inflight}")
+    columns = ["size", "load_ms", "rescore_ms", "scalar_ms", "llm_s", "mismatches"]
+    print(" ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>12.1f}" if isinstance(row[c], float) else f"{row[c]:>12}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+CPU and memory per response from LLM output to HTTP body, at batch scale.
+
+For each size, takes N raw LLM answers (varied scores and Vietnamese
+rationales) through the stages every scored submission goes through:
+
+- validate:  _parse_llm_response, JSON text to a validated LLMScoringPayload
+- assemble:  _score_results + _build_scoring_response, payload to ScoringResponse
+- store:     the payload record save() writes for /batch-score/rescore
+- render:    the /batch-score body, BatchScoringResponse dumped and rendered
+             by ORJSONResponse (--verbosity)
+
+and reports, per response, the best CPU time over --repeat runs, the memory
+allocated at the stage's peak (tracemalloc) and, for validate and assemble,
+the memory each kept object still holds.
+
+Run from Backend/:
+    python -m benchmarks.response_assembly --sizes 100,1000,5000 --rationale-chars 400
+"""
+import argparse
+import gc
+import json
+import logging
+import random
+import time
+import tracemalloc
+
+from app.core.json_response import ORJSONResponse
+from app.models.batch_scoring.responses import BatchScoringResponse
+from app.services.export.response_shape import ResponseShape
+from app.services.llm_services.ollama_service import OllamaService
+from app.services.rescoring.payload_store import encode_record
+from benchmarks.fixtures import CATEGORIES, build_request
+
+
+WORDS = "bài làm đọc đúng dữ liệu đầu vào xử lý trường hợp biên vòng lặp hàm độ phức tạp".split()
+
+
+def build_answers(size: int, rationale_chars: int) -> list[str]:
+    rnd = random.Random(size)
+    answers = []
+    for _ in range(size):
+        text = " ".join(rnd.choice(WORDS) for _ in range(rationale_chars // 5))[:rationale_chars]
+        payload = {
+            "category_results": [
+                {"category_name": name, "raw_score": score,
+                 "band_decision": {"min_score": band[0], "max_score": band[1], "description": "band", "rationale": text}}
+                for name in CATEGORIES
+                for band in [rnd.choice([(0, 4), (5, 8), (9, 10)])]
+                for score in [round(rnd.uniform(*band), 1)]
+            ],
+            "penalties_applied": [{"code": "io_handling", "points": -1, "reason": "No validation"}],
+            "feedback": text,
+        }
+        answers.append("```json\n" + json.dumps(payload, ensure_ascii=False, indent=2) + "\n```")
+    return answers
+
+
+def measure(stage, repeat: int) -> tuple[float, int, int, object]:
+    """(best CPU seconds, peak bytes allocated, bytes still held by the result, result)."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.process_time()
+        result = stage()
+        best = min(best, time.process_time() - started)
+        del result
+    gc.collect()
+    tracemalloc.start()
+    result = stage()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, held, result
+
+
+def run_size(size: int, rationale_chars: int, verbosity: str, repeat: int) -> list[dict]:
+    service = OllamaService()
+    request = build_request()
+    answers = build_answers(size, rationale_chars)
+    shape = ResponseShape(verbosity)
+
+    def validate():
+        return [service._parse_llm_response(a) for a in answers]
+
+    def assemble():
+        responses = []
+        for payload in payloads:
+            category_results, total = service._score_results(request, payload)
+            responses.append(service._build_scoring_response(payload, category_results, total))
+        return responses
+
+    def store():
+        return [encode_record(request, r) for r in responses]
+
+    def render():
+        batch = BatchScoringResponse(results=responses, total_processed=len(responses), errors=[])
+        return ORJSONResponse(shape.dump_container(batch)).body
+
+    rows = []
+    payloads = responses = None
+    for name, stage in (("validate", validate), ("assemble", assemble), ("store", store), ("render", render)):
+        cpu, peak, held, result = measure(stage, repeat)
+        if name == "validate":
+            payloads = result
+        elif name == "assemble":
+            responses = result
+        rows.append({
+            "size": size,
+            "stage": name,
+            "us_per": cpu / size * 1e6,
+            "peak_kb_per": peak / size / 1024,
+            "held_kb_per": held / size / 1024 if name in ("validate", "assemble") else 0.0,
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--rationale-chars", type=int, default=400)
+    parser.add_argument("--verbosity", choices=["full", "summary", "scores"], default="full")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    rows = [row for size in args.sizes.split(",") for row in run_size(int(size), args.rationale_chars, args.verbosity, args.repeat)]
+
+    print(f"rationale_chars={args.rationale_chars} categories={len(CATEGORIES)} verbosity={args.verbosity}")
+    columns = ["size", "stage", "us_per", "peak_kb_per", "held_kb_per"]
+    print(" ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>12.1f}" if isinstance(row[c], float) else f"{row[c]:>12}" for c in columns))
+    totals: dict[int, float] = {}
+    for row in rows:
+        totals[row["size"]] = totals.get(row["size"], 0.0) + row["us_per"]
+    print("total us per response: " + ", ".join(f"{size}: {us:.1f}" for size, us in totals.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Serialization CPU and bytes on the wire for batch responses.
+
+Compares FastAPI's jsonable_encoder + json.dumps path with ORJSONResponse at
+each verbosity, and reports gzip / brotli sizes as produced by the
+compression middleware settings.
+
+Run from Backend/:
+    python -m benchmarks.serialization --sizes 10,100,500 --rationale-chars 600
+"""
+import argparse
+import json
+import random
+import timeit
+import zlib
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.compression import brotli, get_env_brotli_quality, get_env_gzip_level
+from app.core.json_response import ORJSONResponse
+from app.models.batch_scoring.responses import BatchScoringResponse
+from app.services.export.response_shape import ResponseShape
+from app.services.llm_services.ollama_service import OllamaService
+from benchmarks.fixtures import build_raw_response, build_request
+
+
+WORDS = "bài làm đọc đúng dữ liệu đầu vào xử lý trường hợp biên vòng lặp hàm độ phức tạp".split()
+
+
+def build_batch(size: int, rationale_chars: int, seed: int = 0) -> BatchScoringResponse:
+    """Batch of responses with varied Vietnamese rationales, so compression ratios are realistic."""
+    rnd = random.Random(seed)
+    template = OllamaService()._process_llm_output(build_request(), build_raw_response(rationale_chars))
+    results = []
+    for i in range(size):
+        text = " ".join(rnd.choice(WORDS) for _ in range(rationale_chars // 5))[:rationale_chars]
+        categories = [
+            c.model_copy(update={"band_decision": c.band_decision.model_copy(update={"rationale": text})})
+            for c in template.category_results
+        ]
+        results.append(template.model_copy(update={
+            "category_results": categories, "feedback": text, "student_id": f"student {i}",
+            "total_score": round(rnd.uniform(0, 10), 2),
+        }))
+    return BatchScoringResponse(results=results, total_processed=size, errors=[])
+
+
+def gzip_size(body: bytes) -> int:
+    compressor = zlib.compressobj(get_env_gzip_level(), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return len(compressor.compress(body) + compressor.flush())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,500")
+    parser.add_argument("--rationale-chars", type=int, default=600)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>5} {'method':<24} {'ms':>8} {'bytes':>10} {'gzip':>9} {'br':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        batch = build_batch(size, args.rationale_chars)
+        methods = {
+            "jsonable_encoder+json": lambda: json.dumps(jsonable_encoder(batch)).encode("utf-8"),
+        }
+        for verbosity in ("full", "summary", "scores"):
+            shape = ResponseShape(verbosity)
+            methods[f"orjson {verbosity}"] = lambda shape=shape: ORJSONResponse(shape.dump_container(batch)).body
+        for name, render in methods.items():
+            elapsed = timeit.timeit(render, number=args.number) / args.number * 1000
+            body = render()
+            br = len(brotli.compress(body, quality=get_env_brotli_quality())) if brotli else 0
+            print(f"{size:>5} {name:<24} {elapsed:>8.2f} {len(body):>10} {gzip_size(body):>9} {br if br else '-':>9}")
+
+
+if __name__ == "__main__":
+    main()
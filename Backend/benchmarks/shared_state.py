@@ -0,0 +1,72 @@
+"""
+Shared state store throughput and atomicity across processes.
+
+Each process runs a mix of incr/get/set/add operations against one store; at
+the end the shared counter must equal processes * ops, which checks that
+`incr` is atomic across workers.
+
+Run from Backend/:
+    python -m benchmarks.shared_state --processes 1,4,8 --ops 2000
+    SHARED_STATE_BACKEND=redis SHARED_STATE_URL=redis://localhost:6379/0 python -m benchmarks.shared_state
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from app.core import shared_state
+
+
+async def _worker_ops(ops: int, prefix: str) -> None:
+    state = shared_state.get_shared_state()
+    for i in range(ops):
+        await state.incr(f"{prefix}:counter", ttl=600)
+        await state.set(f"{prefix}:item:{os.getpid()}:{i % 50}", b"x" * 256, ttl=600)
+        await state.get(f"{prefix}:item:{os.getpid()}:{i % 50}")
+        await state.add(f"{prefix}:lock:{i % 10}", b"1", ttl=0.01)
+    await shared_state.close_shared_state()
+
+
+def _worker(ops: int, prefix: str) -> None:
+    asyncio.run(_worker_ops(ops, prefix))
+
+
+async def _read_counter(prefix: str) -> int:
+    value = await shared_state.get_shared_state().get(f"{prefix}:counter")
+    await shared_state.close_shared_state()
+    return int(value or 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", default="1,4,8")
+    parser.add_argument("--ops", type=int, default=2000, help="operation rounds per process (4 store calls each)")
+    args = parser.parse_args()
+
+    if shared_state.get_env_backend() == "sqlite" and "SHARED_STATE_PATH" not in os.environ:
+        os.environ["SHARED_STATE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    print(f"backend={shared_state.get_env_backend()} ops_per_process={args.ops}")
+    print(f"{'processes':>9} {'elapsed_s':>10} {'calls/s':>10} {'counter':>9} {'expected':>9}")
+
+    context = multiprocessing.get_context("spawn")
+    for count in (int(p) for p in args.processes.split(",")):
+        prefix = f"bench{count}-{time.time_ns()}"
+        started = time.perf_counter()
+        workers = [context.Process(target=_worker, args=(args.ops, prefix)) for _ in range(count)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        counter = asyncio.run(_read_counter(prefix))
+        expected = count * args.ops
+        # The memory backend is per process by design, so its counter is not shared
+        mismatch = counter != expected and shared_state.get_env_backend() != "memory"
+        print(f"{count:>9} {elapsed:>10.2f} {count * args.ops * 4 / elapsed:>10.0f} {counter:>9} {expected:>9}"
+              + ("  MISMATCH" if mismatch else ""))
+
+
+if __name__ == "__main__":
+    main()
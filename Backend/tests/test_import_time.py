@@ -0,0 +1,7 @@
+from benchmarks.import_time import DEFERRED_MODULES, measure
+
+
+def test_app_import_defers_provider_clients_and_numpy():
+    # The time budget depends on the machine; which modules load at startup does not
+    _, _, imported = measure("app.main")
+    assert [m for m in DEFERRED_MODULES if m in imported] == []
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import httpx
+
+from app.models.history.requests import HistoryFilter
+from app.models.scoring.requests import ScoringRequest
+from app.services import history
+from app.services.llm_services import lmstudio_service
+from app.services.llm_services.lmstudio_service import LMStudioService
+
+
+ANSWER = {
+    "category_results": [{
+        "category_name": "Correctness",
+        "raw_score": 7,
+        "band_decision": {"min_score": 5, "max_score": 8, "description": "Mostly correct", "rationale": "Misses edge cases"},
+    }],
+    "penalties_applied": [],
+    "feedback": "Handle empty input.",
+}
+
+
+def _request() -> ScoringRequest:
+    return ScoringRequest.model_validate({
+        "llm_provider": "lmstudio",
+        "model": "local-model",
+        "problem_description": "Sum two integers",
+        "student_code": "print(sum(map(int, input().split())))",
+        "programming_language": "python",
+        "student_id": "s1",
+        "rubric": {"categories": [{
+            "name": "Correctness",
+            "weight": 1,
+            "bands": [
+                {"min_score": 0, "max_score": 4, "description": "Mostly wrong"},
+                {"min_score": 5, "max_score": 8, "description": "Mostly correct"},
+                {"min_score": 9, "max_score": 10, "description": "Correct"},
+            ],
+        }]},
+    })
+
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def test_streamed_reply_keeps_token_counts(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("LLM_STREAM", "true")
+    monkeypatch.setenv("SHARED_STATE_BACKEND", "memory")
+    monkeypatch.setenv("RESULT_CACHE_TTL", "0")
+    monkeypatch.setenv("PAYLOAD_STORE_TTL", "0")
+    monkeypatch.setenv("GRADING_HISTORY", "true")
+    monkeypatch.setenv("GRADING_HISTORY_PATH", str(tmp_path / "history.db"))
+    sent: list[dict] = []
+
+    def reply(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        text = json.dumps(ANSWER)
+        body = "".join(
+            _sse({"choices": [{"index": 0, "delta": {"content": text[i:i + 40]}, "finish_reason": None}]})
+            for i in range(0, len(text), 40)
+        )
+        body += _sse({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        body += _sse({"choices": [], "usage": {"prompt_tokens": 321, "completion_tokens": 54}})
+        body += "data: [DONE]\n\n"
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    monkeypatch.setattr(
+        lmstudio_service, "llm_http_client",
+        lambda timeout: httpx.AsyncClient(timeout=timeout, transport=httpx.MockTransport(reply)),
+    )
+
+    async def score() -> tuple:
+        response = await LMStudioService().generate_response(_request())
+        await history.flush_history()
+        page = history.get_history_store().page(HistoryFilter(student_id="s1"), 10)
+        await history.close_history()
+        return response, page
+
+    response, page = asyncio.run(score())
+
+    assert sent[0]["stream"] is True
+    assert sent[0]["stream_options"] == {"include_usage": True}
+    assert (response.usage.prompt_tokens, response.usage.completion_tokens) == (321, 54)
+    assert [(e.prompt_tokens, e.completion_tokens) for e in page.items] == [(321, 54)]
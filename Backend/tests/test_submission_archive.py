@@ -0,0 +1,65 @@
+import io
+import zipfile
+
+import pytest
+
+from app.models.batch_scoring.responses import SkippedFile
+from app.services.ingestion.submission_archive import group_by_student, iter_upload_submissions
+
+
+def _zip(members: dict[str, str]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def _students(uploads: list) -> dict[str, list[str]]:
+    files = [f for f in iter_upload_submissions(uploads) if not isinstance(f, SkippedFile)]
+    return {student: [f.path for f in group] for student, group in group_by_student(files).items()}
+
+
+@pytest.mark.parametrize("members, expected", [
+    (
+        # Flat files under a zipped folder, with the metadata macOS adds
+        {
+            "Samples/student 1.txt": "a",
+            "Samples/student 2.txt": "b",
+            "__MACOSX/Samples/._student 1.txt": "x",
+        },
+        {"student 1": ["Samples/student 1.txt"], "student 2": ["Samples/student 2.txt"]},
+    ),
+    (
+        # One folder per student with nested source folders
+        {"alice/src/main.cpp": "a", "alice/src/util.h": "a", "bob/src/main.cpp": "b"},
+        {"alice": ["alice/src/main.cpp", "alice/src/util.h"], "bob": ["bob/src/main.cpp"]},
+    ),
+    (
+        # Student folders under a zipped root, next to a loose file of its own
+        {"hw1/alice/main.cpp": "a", "hw1/bob/src/main.cpp": "b", "hw1/carol.cpp": "c"},
+        {"alice": ["hw1/alice/main.cpp"], "bob": ["hw1/bob/src/main.cpp"], "carol": ["hw1/carol.cpp"]},
+    ),
+    (
+        # Dotfiles do not count as a second root
+        {"hw1/.DS_Store": "x", ".hidden/a.cpp": "x", "hw1/alice.py": "a", "hw1/bob.py": "b"},
+        {"alice": ["hw1/alice.py"], "bob": ["hw1/bob.py"]},
+    ),
+])
+def test_zip_layouts(members: dict[str, str], expected: dict[str, list[str]]) -> None:
+    assert _students([("submissions.zip", _zip(members))]) == expected
+
+
+def test_folder_upload_layout() -> None:
+    uploads = [
+        ("Samples/alice/main.cpp", io.BytesIO(b"a")),
+        ("Samples/.DS_Store", io.BytesIO(b"x")),
+        ("Samples/bob/src/main.cpp", io.BytesIO(b"b")),
+        ("Samples/carol.cpp", io.BytesIO(b"c")),
+    ]
+    assert _students(uploads) == {
+        "alice": ["Samples/alice/main.cpp"],
+        "bob": ["Samples/bob/src/main.cpp"],
+        "carol": ["Samples/carol.cpp"],
+    }